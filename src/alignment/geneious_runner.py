@@ -0,0 +1,177 @@
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class GeneiousCall:
+    """
+    Represents one Geneious command-line invocation.
+
+    Attributes:
+        inputs (tuple): Input file paths.
+        output (str): Output file path.
+        operation (str): Optional Geneious operation (e.g. "muscle_alignment").
+    """
+    inputs: tuple
+    output: str
+    operation: str | None = None
+
+    def command(self, executable: str = "geneious") -> list:
+        """
+        Gets the command line of this call.
+
+        Args:
+            executable (str): Geneious executable.
+
+        Returns:
+            list: Command arguments.
+        """
+        command = [executable, "-i", *map(str, self.inputs), "-o", str(self.output)]
+        if self.operation:
+            command += ["--operation", self.operation]
+        return command
+
+
+@dataclass
+class GeneiousResult:
+    """
+    Represents the outcome of a Geneious invocation.
+
+    Attributes:
+        call (GeneiousCall): The invocation.
+        returncode (int): Exit code, or None if the process could not be started or timed out.
+        stdout (str): Captured standard output.
+        stderr (str): Captured standard error, or the launch error.
+        elapsed (float): Wall-clock seconds.
+    """
+    call: GeneiousCall
+    returncode: int | None
+    stdout: str
+    stderr: str
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+class GeneiousRunner:
+    """
+    Represents a long-lived Geneious execution layer shared across proteins.
+    Independent chains of calls run in parallel up to a concurrency cap; calls within a chain run in order.
+    The timing and output of the latest calls are kept in results, up to max_results; drain() takes them.
+
+    Attributes:
+        executable (str): Geneious executable.
+        max_concurrent (int): Maximum concurrent Geneious processes.
+        timeout (float): Per-call timeout in seconds.
+        results (deque): GeneiousResults of the latest calls, oldest first.
+    """
+    def __init__(self, executable: str = "geneious", max_concurrent: int = 2, timeout: float | None = None,
+                 max_results: int = 100):
+        """
+        Constructor for GeneiousRunner.
+
+        Args:
+            executable (str): Geneious executable.
+            max_concurrent (int): Maximum concurrent Geneious processes. Each one starts its own JVM.
+            timeout (float): Per-call timeout in seconds.
+            max_results (int): Number of latest results kept.
+        """
+        self.executable = executable
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.results = deque(maxlen=max_results)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def run(self, call: GeneiousCall) -> GeneiousResult:
+        """
+        Runs a single call and records its result.
+
+        Args:
+            call (GeneiousCall): Invocation to run.
+
+        Returns:
+            GeneiousResult: Outcome of the call.
+        """
+        start = time.perf_counter()
+        try:
+            completed = subprocess.run(call.command(self.executable), capture_output=True, text=True, timeout=self.timeout)
+            result = GeneiousResult(call, completed.returncode, completed.stdout, completed.stderr, time.perf_counter() - start)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            result = GeneiousResult(call, None, "", str(e), time.perf_counter() - start)
+        with self._lock:
+            self.results.append(result)
+        return result
+
+    def _run_chain(self, calls: list) -> list:
+        results = []
+        for call in calls:
+            result = self.run(call)
+            results.append(result)
+            if not result.ok:
+                break
+        return results
+
+    def submit_chain(self, calls: list) -> Future:
+        """
+        Submits calls that depend on each other; they run in order and stop at the first failure.
+
+        Args:
+            calls (list): GeneiousCalls, in dependency order.
+
+        Returns:
+            Future: Resolves to the list of GeneiousResults of the calls that ran.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="geneious")
+            return self._executor.submit(self._run_chain, calls)
+
+    def run_batch(self, chains: list) -> list:
+        """
+        Runs independent chains of calls (e.g. annotate then align, for each protein of a batch) in parallel.
+
+        Args:
+            chains (list): Lists of GeneiousCalls.
+
+        Returns:
+            list: Lists of GeneiousResults, in chain order.
+        """
+        futures = [self.submit_chain(calls) for calls in chains]
+        return [future.result() for future in futures]
+
+    def failures(self) -> list:
+        """
+        Gets the recorded results of failed calls.
+
+        Returns:
+            list: Failed GeneiousResults.
+        """
+        with self._lock:
+            return [result for result in self.results if not result.ok]
+
+    def drain(self) -> list:
+        """
+        Takes the recorded results, leaving none.
+
+        Returns:
+            list: GeneiousResults, oldest first.
+        """
+        with self._lock:
+            results = list(self.results)
+            self.results.clear()
+        return results
+
+    def shutdown(self):
+        """
+        Stops the worker threads.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
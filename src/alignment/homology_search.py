@@ -0,0 +1,243 @@
+import math
+from dataclasses import dataclass
+import numpy as np
+from alignment.pairwise import align
+from alignment.substitution import ALPHABET, BLOSUM62, encode
+
+_SEPARATOR = ALPHABET.index("*")
+_UNKNOWN = ALPHABET.index("X")
+_NEG = -1e9
+
+# Karlin-Altschul parameters of BLOSUM62 with gap cost 11 + k (gap_open 10, gap_extend 1)
+_LAMBDA = 0.267
+_K = 0.041
+
+@dataclass
+class HomologyHit:
+    """
+    Represents a database sequence similar to a query.
+
+    Attributes:
+        accession (str): Database sequence identifier.
+        score (float): Banded Smith-Waterman score.
+        bit_score (float): Normalized score, in bits.
+        evalue (float): Expected number of chance hits scoring at least as high in this database.
+        diagonal (int): Seed diagonal (database position minus query position).
+        identity (float): Percent identity of the local alignment, if computed.
+    """
+    accession: str
+    score: float
+    bit_score: float
+    evalue: float
+    diagonal: int
+    identity: float | None = None
+
+
+def _kmer_codes(codes: np.ndarray, k: int) -> tuple:
+    """
+    Gets the k-mer code at each position of an encoded sequence, and whether the k-mer is searchable
+    (contains no separator or unknown residue).
+    """
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    kmers = np.zeros(n, dtype=np.int64)
+    valid = np.ones(n, dtype=bool)
+    for offset in range(k):
+        window = codes[offset:offset + n]
+        kmers = kmers * len(ALPHABET) + window
+        valid &= (window != _SEPARATOR) & (window != _UNKNOWN)
+    return kmers, valid
+
+
+def banded_smith_waterman(query: np.ndarray, targets: list, diagonals: np.ndarray, band: int = 32,
+                          gap_open: float = 10, gap_extend: float = 1) -> np.ndarray:
+    """
+    Scores local alignments of a query against several targets at once, each restricted to a band around a diagonal.
+    Rows of the query are swept in order; each step updates every target's band as one array operation.
+    Horizontal gaps within a row are resolved with a prefix maximum, which is exact while gap_open >= 0.
+
+    Args:
+        query (np.ndarray): Encoded query.
+        targets (list): Encoded targets.
+        diagonals (np.ndarray): Band center per target (target position minus query position).
+        band (int): Half-width of the band.
+        gap_open (float): Gap open penalty.
+        gap_extend (float): Gap extension penalty. A gap of length k costs gap_open + gap_extend * k.
+
+    Returns:
+        np.ndarray: Best local score per target.
+    """
+    width = 2 * band + 1
+    offsets = np.arange(-band, band + 1)
+    lengths = np.array([len(target) for target in targets])
+    padded = np.full((len(targets), lengths.max() + 1), _SEPARATOR, dtype=np.int64)
+    for b, target in enumerate(targets):
+        padded[b, :len(target)] = target
+    scores = BLOSUM62.astype(np.float32)
+    rows = np.arange(len(targets))[:, None]
+
+    h = np.zeros((len(targets), width), dtype=np.float32)
+    f = np.full((len(targets), width), _NEG, dtype=np.float32)
+    best = np.zeros(len(targets), dtype=np.float32)
+    ramp = (gap_extend * offsets).astype(np.float32)
+
+    for i, residue in enumerate(query):
+        j = i + diagonals[:, None] + offsets
+        valid = (j >= 0) & (j < lengths[:, None])
+        match = np.where(valid, scores[residue, padded[rows, np.clip(j, 0, padded.shape[1] - 1)]], _NEG)
+
+        # Cell (i, j) at offset o: diagonal predecessor (i-1, j-1) is offset o, vertical (i-1, j) is offset o+1
+        up_h = np.concatenate((h[:, 1:], np.full((len(targets), 1), _NEG, dtype=np.float32)), axis=1)
+        up_f = np.concatenate((f[:, 1:], np.full((len(targets), 1), _NEG, dtype=np.float32)), axis=1)
+        f = np.maximum(up_f - gap_extend, up_h - gap_open - gap_extend)
+        h = np.maximum(np.maximum(h + match, f), 0)
+
+        # Horizontal gaps: E[o] = max over o' < o of H[o'] - gap_open - gap_extend * (o - o')
+        lead = np.maximum.accumulate(h + ramp, axis=1)
+        e = np.concatenate((np.full((len(targets), 1), _NEG, dtype=np.float32), lead[:, :-1]), axis=1) - gap_open - ramp
+        h = np.where(valid, np.maximum(h, e), 0)
+        f = np.where(valid, f, _NEG)
+        best = np.maximum(best, h.max(axis=1))
+    return best
+
+
+class KmerIndex:
+    """
+    Represents an inverted k-mer index over a set of protein sequences (e.g. an organism proteome),
+    searched BLAST-style: exact k-mer seeds, two-hit diagonals, ungapped diagonal extension, then banded Smith-Waterman.
+
+    Attributes:
+        accessions (list): Sequence identifiers.
+        k (int): k-mer length.
+        residues (int): Total residues indexed.
+    """
+    def __init__(self, accessions: list, sequences: list, k: int = 3):
+        """
+        Constructor for KmerIndex. Sequences are concatenated with separators and their k-mers sorted into posting lists.
+
+        Args:
+            accessions (list): Sequence identifiers.
+            sequences (list): Amino acid sequences, in accession order.
+            k (int): k-mer length.
+        """
+        self.accessions = list(accessions)
+        self.k = k
+        self._raw = list(sequences)
+        self._sequences = [encode(seq).astype(np.int64) for seq in self._raw]
+        lengths = np.array([len(seq) for seq in self._sequences], dtype=np.int64)
+        self.residues = int(lengths.sum())
+        self._lengths = lengths
+        self._max_length = int(lengths.max()) if len(lengths) else 0
+
+        # Sequence s occupies [starts[s], starts[s] + lengths[s]) of the concatenation, followed by a separator
+        self._starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])).astype(np.int64)
+        concatenated = np.full(int(lengths.sum() + len(lengths)), _SEPARATOR, dtype=np.int64)
+        for start, seq in zip(self._starts, self._sequences):
+            concatenated[start:start + len(seq)] = seq
+        self._concatenated = concatenated
+
+        kmers, valid = _kmer_codes(concatenated, k)
+        positions = np.flatnonzero(valid)
+        order = np.argsort(kmers[positions], kind="stable")
+        self._postings = positions[order]
+        self._offsets = np.searchsorted(kmers[positions][order], np.arange(len(ALPHABET) ** k + 1))
+
+    def _seeds(self, query: np.ndarray, window: int) -> tuple:
+        """
+        Finds two-hit diagonals: per sequence and diagonal, the number of k-mer hits, keeping diagonals with at least
+        two hits within window residues of each other.
+
+        Returns:
+            tuple: Sequence indices, diagonals and hit counts of the seeded diagonals.
+        """
+        kmers, valid = _kmer_codes(query, self.k)
+        query_positions = np.flatnonzero(valid)
+        lo = self._offsets[kmers[query_positions]]
+        hi = self._offsets[kmers[query_positions] + 1]
+        counts = hi - lo
+        if not counts.sum():
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Expand posting list ranges into one array of (query position, database position) hits
+        hit_query = np.repeat(query_positions, counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        hit_db = self._postings[np.repeat(lo, counts) + within]
+        sequence = np.searchsorted(self._starts, hit_db, side="right") - 1
+        diagonal = hit_db - self._starts[sequence] - hit_query
+
+        # Sort hits by (sequence, diagonal, query position); a hit pairs with the previous one on its diagonal
+        span = len(query) + 1
+        stride = span + self._max_length + 1
+        key = sequence * stride + diagonal + span
+        order = np.lexsort((hit_query, key))
+        key, hit_query = key[order], hit_query[order]
+        paired = np.zeros(len(key), dtype=bool)
+        paired[1:] = (key[1:] == key[:-1]) & (hit_query[1:] - hit_query[:-1] <= window)
+
+        seeded_keys, seeded_counts = np.unique(key[paired], return_counts=True)
+        return seeded_keys // stride, seeded_keys % stride - span, seeded_counts + 1
+
+    def _ungapped(self, query: np.ndarray, sequence: np.ndarray, diagonal: np.ndarray, chunk: int = 1024) -> np.ndarray:
+        """
+        Extends each seed diagonal without gaps: the best-scoring run along the whole diagonal (maximum subarray).
+        Diagonals are scored in chunks, each as one (chunk, query length) array operation.
+        """
+        scores = np.zeros(len(sequence))
+        i = np.arange(len(query))
+        for lo in range(0, len(sequence), chunk):
+            seeds = slice(lo, lo + chunk)
+            j = i[None, :] + diagonal[seeds, None]
+            valid = (j >= 0) & (j < self._lengths[sequence[seeds], None])
+            position = np.clip(self._starts[sequence[seeds], None] + j, 0, len(self._concatenated) - 1)
+            pair = np.where(valid, BLOSUM62[query[None, :], self._concatenated[position]], 0)
+            cumulative = np.concatenate((np.zeros((len(pair), 1)), np.cumsum(pair, axis=1)), axis=1)
+            scores[seeds] = (cumulative - np.minimum.accumulate(cumulative, axis=1)).max(axis=1)
+        return scores
+
+    def search(self, query: str, max_hits: int = 5, max_extensions: int = 200, band: int = 32, window: int = 40,
+               evalue: float = 1e-5, identity: bool = True) -> list:
+        """
+        Searches the index for sequences homologous to the query.
+
+        Args:
+            query (str): Query amino acid sequence.
+            max_hits (int): Maximum hits returned.
+            max_extensions (int): Sequences, ranked by ungapped score, scored with banded Smith-Waterman.
+            band (int): Half-width of the Smith-Waterman band around the seed diagonal.
+            window (int): Maximum distance between two seed hits on a diagonal.
+            evalue (float): Maximum E-value of a reported hit.
+            identity (bool): Whether to compute percent identity of reported hits with a full local alignment.
+
+        Returns:
+            list: HomologyHits, best first.
+        """
+        codes = encode(query).astype(np.int64)
+        sequence, diagonal, _ = self._seeds(codes, window)
+        if not len(sequence):
+            return []
+
+        # Best ungapped diagonal per sequence
+        ungapped = self._ungapped(codes, sequence, diagonal)
+        order = np.lexsort((-ungapped, sequence))
+        first = np.concatenate(([True], sequence[order][1:] != sequence[order][:-1]))
+        best = order[first]
+        best = best[np.argsort(-ungapped[best], kind="stable")][:max_extensions]
+
+        targets = [self._sequences[s] for s in sequence[best]]
+        scores = banded_smith_waterman(codes, targets, diagonal[best], band=band)
+
+        hits = []
+        for rank in np.argsort(-scores, kind="stable")[:max_hits]:
+            score = float(scores[rank])
+            bit_score = (_LAMBDA * score - math.log(_K)) / math.log(2)
+            expected = _K * len(codes) * self.residues * math.exp(-_LAMBDA * score)
+            if expected > evalue:
+                break
+            s = int(sequence[best[rank]])
+            hit = HomologyHit(accession=self.accessions[s], score=score, bit_score=round(bit_score, 1),
+                              evalue=expected, diagonal=int(diagonal[best[rank]]))
+            if identity:
+                hit.identity = float(align(query, self._raw[s], mode="local").identity)
+            hits.append(hit)
+        return hits
@@ -0,0 +1,236 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+from alignment.pairwise import align_scored
+from alignment.substitution import ALPHABET, BLOSUM62, encode
+from utils.file_utils import safe_open_write
+from utils.process_pool import process_pool
+
+GAP = -1
+_KMER = 3
+
+# Clustal conservation groups
+_STRONG_GROUPS = ["STA", "NEQK", "NHQK", "NDEQ", "QHRK", "MILV", "MILF", "HY", "FYW"]
+_WEAK_GROUPS = ["CSA", "ATV", "SAG", "STNK", "STPA", "SGND", "SNDEQK", "NDEQHK", "NEQHRK", "FVLIM", "HFY"]
+
+def kmer_distances(codes: list, k: int = _KMER) -> np.ndarray:
+    """
+    Computes k-mer distances between sequences: 1 minus the fraction of shared k-mers.
+
+    Args:
+        codes (list): Encoded sequences.
+        k (int): k-mer length.
+
+    Returns:
+        np.ndarray: Symmetric distance matrix.
+    """
+    base = len(ALPHABET)
+    counts = np.zeros((len(codes), base ** k), dtype=np.int32)
+    for s, seq in enumerate(codes):
+        if len(seq) >= k:
+            kmers = np.zeros(len(seq) - k + 1, dtype=np.int64)
+            for offset in range(k):
+                kmers = kmers * base + seq[offset:len(seq) - k + 1 + offset]
+            counts[s] = np.bincount(kmers, minlength=base ** k)
+
+    lengths = np.array([max(len(seq) - k + 1, 1) for seq in codes])
+    distances = np.zeros((len(codes), len(codes)))
+    for s in range(len(codes)):
+        shared = np.minimum(counts[s], counts[s + 1:]).sum(axis=1)
+        distances[s, s + 1:] = 1.0 - shared / np.minimum(lengths[s], lengths[s + 1:])
+    return np.maximum(distances, distances.T)
+
+
+def upgma(distances: np.ndarray) -> list:
+    """
+    Builds a UPGMA guide tree.
+
+    Args:
+        distances (np.ndarray): Symmetric distance matrix.
+
+    Returns:
+        list: Merge steps as (node_a, node_b) pairs. Leaves are 0..n-1, and merge k creates node n+k.
+    """
+    n = len(distances)
+    d = distances.astype(np.float64).copy()
+    np.fill_diagonal(d, np.inf)
+    sizes = {i: 1 for i in range(n)}
+    active = list(range(n))
+    node_of = {i: i for i in range(n)}
+    merges = []
+
+    while len(active) > 1:
+        sub = d[np.ix_(active, active)]
+        a, b = np.unravel_index(np.argmin(sub), sub.shape)
+        i, j = active[a], active[b]
+        merges.append((node_of[i], node_of[j]))
+
+        size_i, size_j = sizes[i], sizes[j]
+        d[i, :] = (d[i, :] * size_i + d[j, :] * size_j) / (size_i + size_j)
+        d[:, i] = d[i, :]
+        d[i, i] = np.inf
+        sizes[i] = size_i + size_j
+        node_of[i] = n + len(merges) - 1
+        active.remove(j)
+    return merges
+
+
+def _profile(rows: np.ndarray) -> np.ndarray:
+    """
+    Gets residue frequencies per column of aligned rows; gap positions contribute nothing.
+    """
+    freqs = np.zeros((rows.shape[1], len(ALPHABET)))
+    for row in rows:
+        present = row != GAP
+        np.add.at(freqs, (np.flatnonzero(present), row[present]), 1.0)
+    return freqs / len(rows)
+
+
+def _merge(rows_a: np.ndarray, rows_b: np.ndarray, gap_open: float, gap_extend: float) -> np.ndarray:
+    """
+    Aligns two profiles and merges their rows.
+    """
+    xa = _profile(rows_a) @ BLOSUM62.astype(np.float64)
+    xb = _profile(rows_b)
+    index_a, index_b = align_scored(xa, xb, mode="global", gap_open=gap_open, gap_extend=gap_extend)
+
+    merged = np.full((len(rows_a) + len(rows_b), len(index_a)), GAP, dtype=np.int16)
+    merged[:len(rows_a), index_a >= 0] = rows_a[:, index_a[index_a >= 0]]
+    merged[len(rows_a):, index_b >= 0] = rows_b[:, index_b[index_b >= 0]]
+    return merged
+
+
+@dataclass
+class MultipleAlignment:
+    """
+    Represents a multiple sequence alignment.
+
+    Attributes:
+        names (list): Sequence names.
+        rows (list): Aligned sequences, with "-" for gaps.
+        conservation (np.ndarray): Per-column fraction of sequences sharing the column's most common residue.
+    """
+    names: list
+    rows: list
+    conservation: np.ndarray
+
+    def _conservation_symbols(self) -> str:
+        """
+        Gets the Clustal conservation line ("*" identical, ":" strongly similar, "." weakly similar).
+        """
+        symbols = []
+        for column in zip(*self.rows):
+            residues = set(column)
+            if "-" in residues:
+                symbols.append(" ")
+            elif len(residues) == 1:
+                symbols.append("*")
+            elif any(residues <= set(group) for group in _STRONG_GROUPS):
+                symbols.append(":")
+            elif any(residues <= set(group) for group in _WEAK_GROUPS):
+                symbols.append(".")
+            else:
+                symbols.append(" ")
+        return "".join(symbols)
+
+    def to_fasta(self, path: Path) -> str:
+        """
+        Writes this alignment as aligned FASTA.
+
+        Args:
+            path (Path): Output path.
+
+        Returns:
+            str: Output path.
+        """
+        with safe_open_write(Path(path), 'w') as fh:
+            for name, row in zip(self.names, self.rows):
+                fh.write(f">{name}\n")
+                for k in range(0, len(row), 60):
+                    fh.write(row[k:k + 60] + "\n")
+        return str(path)
+
+    def to_clustal(self, path: Path, block: int = 60) -> str:
+        """
+        Writes this alignment in Clustal format.
+
+        Args:
+            path (Path): Output path.
+            block (int): Columns per block.
+
+        Returns:
+            str: Output path.
+        """
+        width = max(len(name) for name in self.names) + 4
+        symbols = self._conservation_symbols()
+        with safe_open_write(Path(path), 'w') as fh:
+            fh.write("CLUSTAL W multiple sequence alignment\n\n\n")
+            for k in range(0, len(self.rows[0]), block):
+                for name, row in zip(self.names, self.rows):
+                    fh.write(f"{name:<{width}}{row[k:k + block]}\n")
+                fh.write(" " * width + symbols[k:k + block] + "\n\n")
+        return str(path)
+
+
+def progressive_align(sequences: dict, gap_open: float = 10, gap_extend: float = 1) -> MultipleAlignment:
+    """
+    Aligns sequences progressively: a UPGMA guide tree is built from k-mer distances, then profiles are
+    aligned along the tree with the vectorized pairwise DP.
+
+    Args:
+        sequences (dict): Sequence name to amino acid sequence.
+        gap_open (float): Gap open penalty.
+        gap_extend (float): Gap extension penalty.
+
+    Returns:
+        MultipleAlignment: The alignment, rows in input order.
+    """
+    names = list(sequences)
+    codes = [encode(sequences[name]).astype(np.int16) for name in names]
+
+    # Each node holds (member indices, aligned rows)
+    nodes = [([k], code[None, :]) for k, code in enumerate(codes)]
+    for node_a, node_b in upgma(kmer_distances(codes)):
+        members_a, rows_a = nodes[node_a]
+        members_b, rows_b = nodes[node_b]
+        nodes.append((members_a + members_b, _merge(rows_a, rows_b, gap_open, gap_extend)))
+
+    members, rows = nodes[-1]
+    rows = rows[np.argsort(members)]
+
+    # GAP (-1) indexes the trailing "-"
+    alphabet = np.array(list(ALPHABET + "-"))
+    aligned = ["".join(alphabet[row]) for row in rows]
+
+    if rows.shape[1]:
+        counts = np.stack([(rows == code).sum(axis=0) for code in range(len(ALPHABET))])
+        conservation = counts.max(axis=0) / len(rows)
+    else:
+        conservation = np.zeros(0)
+    return MultipleAlignment(names=names, rows=aligned, conservation=conservation)
+
+
+def _progressive_align_args(args: tuple) -> MultipleAlignment:
+    sequences, kwargs = args
+    return progressive_align(sequences, **kwargs)
+
+
+def progressive_align_many(sequence_sets: list, max_workers: int | None = None, **kwargs) -> list:
+    """
+    Builds several multiple sequence alignments (e.g. one per protein) in parallel across processes.
+
+    Args:
+        sequence_sets (list): Dicts of sequence name to amino acid sequence.
+        max_workers (int): Maximum worker processes. Defaults to the CPU count.
+        **kwargs: Options passed to progressive_align.
+
+    Returns:
+        list: MultipleAlignments, in input order.
+    """
+    jobs = [(sequences, kwargs) for sequences in sequence_sets]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [_progressive_align_args(job) for job in jobs]
+    with process_pool(workers) as executor:
+        return list(executor.map(_progressive_align_args, jobs))
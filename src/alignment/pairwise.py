@@ -0,0 +1,377 @@
+import os
+from dataclasses import dataclass
+import numpy as np
+from alignment.substitution import BLOSUM62, encode
+from utils.process_pool import process_pool
+
+# Cells above which alignments switch to the linear-memory Hirschberg mode
+LINEAR_MEMORY_CELLS = 4_000_000
+# Total cells below which align_pairs stays in-process; starting worker processes costs more than the work
+IN_PROCESS_CELLS = 2_500_000
+# Sub-problems at or below this many cells are solved with a full traceback matrix
+_BASE_CELLS = 1 << 16
+
+_DIAG, _FROM_E, _FROM_F, _STOP = 0, 1, 2, 3
+_E_EXTEND = 4
+_F_EXTEND = 8
+
+def _pair_scores(xa: np.ndarray, xb: np.ndarray, ia: np.ndarray, jb: np.ndarray) -> np.ndarray:
+    """
+    Scores residue (or profile column) pairs.
+    xa holds one substitution score row per position of a. xb holds residue codes of b, or one weight row
+    per profile column of b.
+    """
+    if xb.ndim == 1:
+        return xa[ia, xb[jb]]
+    return np.einsum("ij,ij->i", xa[ia], xb[jb])
+
+
+def _sweep(xa: np.ndarray, xb: np.ndarray, gap_open: float, gap_extend: float, tb: float, local: bool, pointers: bool) -> dict:
+    """
+    Runs affine-gap (Gotoh) dynamic programming over anti-diagonals, vectorizing all cells of a diagonal at once.
+    Only the last two diagonals are kept, so memory is linear unless pointers are requested.
+
+    Args:
+        xa (np.ndarray): Scoring rows of sequence a (rows of the DP matrix).
+        xb (np.ndarray): Codes or scoring rows of sequence b (columns of the DP matrix).
+        gap_open (float): Gap open penalty.
+        gap_extend (float): Gap extension penalty.
+        tb (float): Open score of a gap in a running down column 0 (-gap_open, or 0 if it continues a gap).
+        local (bool): Whether to compute local (Smith-Waterman) scores.
+        pointers (bool): Whether to record a traceback matrix.
+
+    Returns:
+        dict: last_h and last_f (scores of the last row), pointers, best (local score, i, j).
+    """
+    m, n = len(xa), len(xb)
+    neg = -np.inf
+    open_cost = gap_open + gap_extend
+
+    h2, h1, h0 = (np.full(m + 1, neg) for _ in range(3))
+    e1, e0 = np.full(m + 1, neg), np.full(m + 1, neg)
+    f1, f0 = np.full(m + 1, neg), np.full(m + 1, neg)
+    h1[0] = 0.0
+
+    last_h = np.full(n + 1, neg)
+    last_f = np.full(n + 1, neg)
+    if m == 0:
+        last_h[0] = 0.0
+    ptr = np.zeros((m + 1, n + 1), dtype=np.uint8) if pointers else None
+    if pointers and local:
+        ptr[0, :] = _STOP
+        ptr[:, 0] = _STOP
+    best = (0.0, 0, 0)
+
+    for d in range(1, m + n + 1):
+        lo, hi = max(1, d - n), min(m, d - 1)
+        if lo <= hi:
+            rows = np.arange(lo, hi + 1)
+            cols = d - rows
+
+            e_extend = e1[lo:hi + 1] - gap_extend
+            e_open = h1[lo:hi + 1] - open_cost
+            e = np.maximum(e_extend, e_open)
+
+            f_extend = f1[lo - 1:hi] - gap_extend
+            f_open = h1[lo - 1:hi] - open_cost
+            f = np.maximum(f_extend, f_open)
+
+            diag = h2[lo - 1:hi] + _pair_scores(xa, xb, rows - 1, cols - 1)
+            if local:
+                candidates = np.stack((diag, e, f, np.zeros_like(diag)))
+            else:
+                candidates = np.stack((diag, e, f))
+            h = candidates.max(axis=0)
+
+            h0[lo:hi + 1] = h
+            e0[lo:hi + 1] = e
+            f0[lo:hi + 1] = f
+
+            if pointers:
+                source = candidates.argmax(axis=0).astype(np.uint8)
+                ptr[rows, cols] = source | (e_extend >= e_open) * _E_EXTEND | (f_extend >= f_open) * _F_EXTEND
+            if local:
+                k = int(h.argmax())
+                if h[k] > best[0]:
+                    best = (float(h[k]), int(rows[k]), int(cols[k]))
+
+        if d <= n:
+            # Row 0: leading gap in a
+            h0[0] = 0.0 if local else -(gap_open + gap_extend * d)
+            e0[0] = neg if local else h0[0]
+            f0[0] = neg
+            if pointers and not local:
+                ptr[0, d] = _FROM_E | (_E_EXTEND if d > 1 else 0)
+        if d <= m:
+            # Column 0: leading gap in b
+            h0[d] = 0.0 if local else tb - gap_extend * d
+            f0[d] = neg if local else h0[d]
+            e0[d] = neg
+            if pointers and not local:
+                ptr[d, 0] = _FROM_F | (_F_EXTEND if d > 1 else 0)
+
+        if 0 <= d - m <= n:
+            last_h[d - m] = h0[m]
+            last_f[d - m] = f0[m]
+
+        h2, h1, h0 = h1, h0, h2
+        e1, e0 = e0, e1
+        f1, f0 = f0, f1
+
+    return {"last_h": last_h, "last_f": last_f, "pointers": ptr, "best": best}
+
+
+def _traceback(ptr: np.ndarray, i: int, j: int, state: int) -> list:
+    """
+    Follows traceback pointers from cell (i, j).
+
+    Returns:
+        list: (index in a or -1, index in b or -1) alignment columns, in order.
+    """
+    columns = []
+    while i > 0 or j > 0:
+        p = ptr[i, j]
+        if state == _DIAG:
+            source = p & 3
+            if source == _STOP:
+                break
+            if source == _DIAG:
+                i, j = i - 1, j - 1
+                columns.append((i, j))
+            else:
+                state = source
+        elif state == _FROM_E:
+            j -= 1
+            columns.append((-1, j))
+            state = _FROM_E if p & _E_EXTEND else _DIAG
+        else:
+            i -= 1
+            columns.append((i, -1))
+            state = _FROM_F if p & _F_EXTEND else _DIAG
+    columns.reverse()
+    return columns
+
+
+def _full_global(xa, xb, gap_open, gap_extend, tb, te) -> list:
+    """
+    Globally aligns with a full traceback matrix. te is the open score of a gap in b ending at the last column.
+    """
+    m, n = len(xa), len(xb)
+    result = _sweep(xa, xb, gap_open, gap_extend, tb, local=False, pointers=True)
+    state = _DIAG
+    if n > 0 and result["last_f"][n] + gap_open + te > result["last_h"][n]:
+        state = _FROM_F
+    return _traceback(result["pointers"], m, n, state)
+
+
+def _hirschberg(xa, xb, gap_open, gap_extend, tb, te) -> list:
+    """
+    Globally aligns in linear memory by divide and conquer (Myers-Miller affine-gap Hirschberg).
+
+    Returns:
+        list: Alignment columns, as in _traceback.
+    """
+    m, n = len(xa), len(xb)
+    if n == 0:
+        return [(i, -1) for i in range(m)]
+    if m == 0:
+        return [(-1, j) for j in range(n)]
+    if m <= 1 or (m + 1) * (n + 1) <= _BASE_CELLS:
+        return _full_global(xa, xb, gap_open, gap_extend, tb, te)
+
+    mid = m // 2
+    forward = _sweep(xa[:mid], xb, gap_open, gap_extend, tb, local=False, pointers=False)
+    reverse = _sweep(xa[mid:][::-1], xb[::-1], gap_open, gap_extend, te, local=False, pointers=False)
+
+    through_match = forward["last_h"] + reverse["last_h"][::-1]
+    # A gap in b crossing the midpoint is opened once, not in both halves
+    through_gap = forward["last_f"] + reverse["last_f"][::-1] + gap_open
+    j_match = int(through_match.argmax())
+    j_gap = int(through_gap.argmax())
+
+    if through_match[j_match] >= through_gap[j_gap]:
+        left = _hirschberg(xa[:mid], xb[:j_match], gap_open, gap_extend, tb, -gap_open)
+        right = _hirschberg(xa[mid:], xb[j_match:], gap_open, gap_extend, -gap_open, te)
+        return left + _shift(right, mid, j_match)
+
+    left = _hirschberg(xa[:mid - 1], xb[:j_gap], gap_open, gap_extend, tb, 0.0)
+    right = _hirschberg(xa[mid + 1:], xb[j_gap:], gap_open, gap_extend, 0.0, te)
+    return left + [(mid - 1, -1), (mid, -1)] + _shift(right, mid + 1, j_gap)
+
+
+def _shift(columns: list, di: int, dj: int) -> list:
+    return [(i + di if i >= 0 else -1, j + dj if j >= 0 else -1) for i, j in columns]
+
+
+def align_scored(xa: np.ndarray, xb: np.ndarray, mode: str = "global", gap_open: float = 10, gap_extend: float = 1,
+                 linear_memory: bool | None = None) -> tuple:
+    """
+    Aligns two pre-scored sequences or profiles.
+
+    Args:
+        xa (np.ndarray): Substitution score rows of a, shape (M, K).
+        xb (np.ndarray): Residue codes of b, shape (N,), or weight rows of b, shape (N, K).
+        mode (str): "global" or "local".
+        gap_open (float): Gap open penalty.
+        gap_extend (float): Gap extension penalty. A gap of length k scores -(gap_open + gap_extend * k).
+        linear_memory (bool): Whether to use the Hirschberg mode. Defaults to True above LINEAR_MEMORY_CELLS.
+
+    Returns:
+        tuple: Index arrays into a and b per alignment column (-1 for gaps).
+    """
+    m, n = len(xa), len(xb)
+    if linear_memory is None:
+        linear_memory = (m + 1) * (n + 1) > LINEAR_MEMORY_CELLS
+
+    if mode == "local":
+        if linear_memory:
+            _, end_i, end_j = _sweep(xa, xb, gap_open, gap_extend, -gap_open, local=True, pointers=False)["best"]
+            _, len_i, len_j = _sweep(xa[:end_i][::-1], xb[:end_j][::-1], gap_open, gap_extend, -gap_open,
+                                     local=True, pointers=False)["best"]
+            start_i, start_j = end_i - len_i, end_j - len_j
+            columns = _shift(_hirschberg(xa[start_i:end_i], xb[start_j:end_j], gap_open, gap_extend, -gap_open, -gap_open),
+                             start_i, start_j)
+        else:
+            result = _sweep(xa, xb, gap_open, gap_extend, -gap_open, local=True, pointers=True)
+            _, end_i, end_j = result["best"]
+            columns = _traceback(result["pointers"], end_i, end_j, _DIAG)
+    elif linear_memory:
+        columns = _hirschberg(xa, xb, gap_open, gap_extend, -gap_open, -gap_open)
+    else:
+        columns = _full_global(xa, xb, gap_open, gap_extend, -gap_open, -gap_open)
+
+    if not columns:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    index = np.array(columns, dtype=np.int64)
+    return index[:, 0], index[:, 1]
+
+
+@dataclass
+class PairwiseAlignment:
+    """
+    Represents a pairwise protein sequence alignment.
+
+    Attributes:
+        seq_a (str): First sequence.
+        seq_b (str): Second sequence.
+        index_a (np.ndarray): Index into seq_a per alignment column (-1 for gaps).
+        index_b (np.ndarray): Index into seq_b per alignment column (-1 for gaps).
+        score (float): Alignment score.
+    """
+    seq_a: str
+    seq_b: str
+    index_a: np.ndarray
+    index_b: np.ndarray
+    score: float
+
+    def _aligned(self, seq: str, index: np.ndarray) -> str:
+        return "".join(seq[k] if k >= 0 else "-" for k in index)
+
+    @property
+    def aligned_a(self) -> str:
+        return self._aligned(self.seq_a, self.index_a)
+
+    @property
+    def aligned_b(self) -> str:
+        return self._aligned(self.seq_b, self.index_b)
+
+    def _paired_codes(self) -> tuple:
+        paired = (self.index_a >= 0) & (self.index_b >= 0)
+        return encode(self.seq_a)[self.index_a[paired]], encode(self.seq_b)[self.index_b[paired]]
+
+    @property
+    def identity(self) -> float:
+        """
+        Percentage of alignment columns with identical residues.
+        """
+        if not len(self.index_a):
+            return 0.0
+        codes_a, codes_b = self._paired_codes()
+        return round(100.0 * np.count_nonzero(codes_a == codes_b) / len(self.index_a), 1)
+
+    @property
+    def similarity(self) -> float:
+        """
+        Percentage of alignment columns with a positive BLOSUM62 score.
+        """
+        if not len(self.index_a):
+            return 0.0
+        codes_a, codes_b = self._paired_codes()
+        return round(100.0 * np.count_nonzero(BLOSUM62[codes_a, codes_b] > 0) / len(self.index_a), 1)
+
+
+def score_columns(seq_a: str, seq_b: str, index_a: np.ndarray, index_b: np.ndarray, gap_open: float = 10, gap_extend: float = 1) -> float:
+    """
+    Scores an alignment given as per-column index arrays.
+    """
+    paired = (index_a >= 0) & (index_b >= 0)
+    score = float(BLOSUM62[encode(seq_a)[index_a[paired]], encode(seq_b)[index_b[paired]]].astype(np.int64).sum())
+    for gaps in (index_a < 0, index_b < 0):
+        run_starts = np.flatnonzero(np.diff(np.concatenate(([0], gaps.astype(np.int8)))) == 1)
+        score -= gap_open * len(run_starts) + gap_extend * np.count_nonzero(gaps)
+    return score
+
+
+def align(seq_a: str, seq_b: str, mode: str = "global", gap_open: float = 10, gap_extend: float = 1,
+          linear_memory: bool | None = None) -> PairwiseAlignment:
+    """
+    Aligns two protein sequences with BLOSUM62 and affine gaps.
+
+    Args:
+        seq_a (str): First sequence.
+        seq_b (str): Second sequence.
+        mode (str): "global" (Needleman-Wunsch) or "local" (Smith-Waterman).
+        gap_open (float): Gap open penalty.
+        gap_extend (float): Gap extension penalty. A gap of length k scores -(gap_open + gap_extend * k).
+        linear_memory (bool): Whether to use the linear-memory Hirschberg mode. Defaults to True for long sequences.
+
+    Returns:
+        PairwiseAlignment: The optimal alignment.
+    """
+    xa = BLOSUM62[encode(seq_a)].astype(np.float64)
+    xb = encode(seq_b).astype(np.intp)
+    index_a, index_b = align_scored(xa, xb, mode=mode, gap_open=gap_open, gap_extend=gap_extend, linear_memory=linear_memory)
+    score = score_columns(seq_a, seq_b, index_a, index_b, gap_open, gap_extend)
+    return PairwiseAlignment(seq_a=seq_a, seq_b=seq_b, index_a=index_a, index_b=index_b, score=score)
+
+
+def _align_args(args: tuple) -> PairwiseAlignment:
+    seq_a, seq_b, kwargs = args
+    return align(seq_a, seq_b, **kwargs)
+
+
+def align_pairs(pairs: list, max_workers: int | None = None, **kwargs) -> list:
+    """
+    Aligns sequence pairs in parallel across processes. Small batches (under IN_PROCESS_CELLS in total)
+    are aligned in the calling process.
+
+    Args:
+        pairs (list): (seq_a, seq_b) tuples.
+        max_workers (int): Maximum worker processes. Defaults to the CPU count.
+        **kwargs: Options passed to align.
+
+    Returns:
+        list: PairwiseAlignments, in input order.
+    """
+    jobs = [(seq_a, seq_b, kwargs) for seq_a, seq_b in pairs]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1 or sum(len(seq_a) * len(seq_b) for seq_a, seq_b, _ in jobs) < IN_PROCESS_CELLS:
+        return [_align_args(job) for job in jobs]
+    with process_pool(workers) as executor:
+        return list(executor.map(_align_args, jobs))
+
+
+def align_many(reference: str, sequences: list, max_workers: int | None = None, **kwargs) -> list:
+    """
+    Aligns each sequence against a reference, in parallel across processes.
+
+    Args:
+        reference (str): Reference sequence.
+        sequences (list): Sequences to align against the reference.
+        max_workers (int): Maximum worker processes. Defaults to the CPU count.
+        **kwargs: Options passed to align.
+
+    Returns:
+        list: PairwiseAlignments, in input order.
+    """
+    return align_pairs([(reference, seq) for seq in sequences], max_workers=max_workers, **kwargs)
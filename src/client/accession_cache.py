@@ -0,0 +1,74 @@
+import sqlite3
+import time
+from pathlib import Path
+from utils.file_utils import ensure_directory
+
+class AccessionCache():
+    """
+    Represents a persistent cache of NCBI gene ID to protein reference lookups.
+    Entries older than ttl are treated as missing and refreshed on the next lookup.
+
+    Attributes:
+        path (Path): SQLite database path.
+        ttl (float): Entry lifetime in seconds.
+    """
+    def __init__(self, path: Path, ttl: float = 30 * 24 * 3600):
+        """
+        Constructor for AccessionCache.
+
+        Args:
+            path (Path): SQLite database path.
+            ttl (float): Entry lifetime in seconds. Defaults to 30 days.
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens a connection, creating the database on first use. One connection per call keeps the cache thread-safe.
+        """
+        if not self._ready:
+            ensure_directory(self.path.parent)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            conn.execute("CREATE TABLE IF NOT EXISTS gene_accession ("
+                         "gene_id TEXT PRIMARY KEY, source TEXT NOT NULL, accession TEXT NOT NULL, updated REAL NOT NULL)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get(self, gene_id) -> tuple | None:
+        """
+        Gets the cached protein reference of a gene.
+
+        Args:
+            gene_id: NCBI gene ID.
+
+        Returns:
+            tuple: (source, accession), e.g. ('uniprot', 'P12345'), or None if missing or expired.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT source, accession FROM gene_accession WHERE gene_id = ? AND updated >= ?",
+                               (str(gene_id), time.time() - self.ttl)).fetchone()
+        finally:
+            conn.close()
+        return tuple(row) if row else None
+
+    def put(self, gene_id, reference: tuple):
+        """
+        Caches the protein reference of a gene.
+
+        Args:
+            gene_id: NCBI gene ID.
+            reference (tuple): (source, accession).
+        """
+        source, accession = reference
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO gene_accession VALUES (?, ?, ?, ?)",
+                             (str(gene_id), source, accession, time.time()))
+        finally:
+            conn.close()
@@ -1,35 +1,107 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 import requests, urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 from bs4 import BeautifulSoup
+from client.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
 
 class NCBIClient():
     """
     Represents NCBI client.
+    All instances share one rate budget: 3 requests per second, or 10 with an NCBI_API_KEY.
+
+    Attributes:
+        API_KEY (str): NCBI API key, read from the NCBI_API_KEY environment variable.
+        rate_limiter (RateLimiter): Shared request rate limiter.
     """
+    API_KEY = os.environ.get("NCBI_API_KEY")
+    rate_limiter = RateLimiter(rate=10 if API_KEY else 3, burst=3)
+
+    def _get(self, url, params=None, api_key=True):
+        """
+        Sends a GET request within the shared rate budget.
+        """
+        params = dict(params or {})
+        headers = {}
+        if api_key and self.API_KEY:
+            # E-utilities read the query parameter, Datasets the header
+            params["api_key"] = self.API_KEY
+            headers["api-key"] = self.API_KEY
+        self.rate_limiter.acquire()
+        return requests.get(url, params=params, headers=headers)
     
-    def get_orthologs(self, gene_id, taxon_list):
+    def iter_orthologs(self, gene_id, taxon_list, page_size=100, retries=2):
         """
-        Gets taxon_list orthologs of given gene_id.
+        Yields taxon_list ortholog reports of given gene_id page by page, following next_page_token,
+        so only one page is held at a time. Rate-limited (429) and server error responses are retried
+        within the shared rate budget.
+
+        Raises:
+            requests.HTTPError: If a page still fails after retries, naming its page token, rather than ending
+                with a partial list.
         """
         url = f"https://api.ncbi.nlm.nih.gov/datasets/v2/gene/id/{gene_id}/orthologs"
         params = {
-            "taxon_filter": taxon_list
+            "taxon_filter": taxon_list,
+            "page_size": page_size
         }
-        
-        r = requests.get(url, params=params)
-        
-        if not r.ok:
-            return {}
-        
-        data = r.json()
-        return data
+
+        while True:
+            r = self._get(url, params=params)
+            for _ in range(retries):
+                if r.ok or (r.status_code != 429 and r.status_code < 500):
+                    break
+                r = self._get(url, params=params)
+            if not r.ok:
+                page = params.get("page_token", "first")
+                raise requests.HTTPError(f"NCBI ortholog page {page} of gene {gene_id} failed "
+                                         f"with status {r.status_code}", response=r)
+            page = r.json()
+            yield from page.get('reports', [])
+            token = page.get('next_page_token')
+            if not token:
+                return
+            params["page_token"] = token
+
+    def get_orthologs(self, gene_id, taxon_list, chunk_size=20, max_workers=4):
+        """
+        Gets taxon_list orthologs of given gene_id.
+        Large taxon lists are split into chunks queried in parallel within the shared rate budget, then merged.
+        A chunk that fails is logged and left out whole, so its taxa are reported as missing and callers fall back
+        to other sources for them, rather than getting a partial list.
+        """
+        taxon_list = list(taxon_list)
+        chunks = [taxon_list[k:k + chunk_size] for k in range(0, len(taxon_list), chunk_size)] or [taxon_list]
+
+        def fetch(chunk):
+            try:
+                return list(self.iter_orthologs(gene_id, chunk))
+            except requests.RequestException as e:
+                logger.warning("NCBI orthologs of gene %s unavailable for taxa %s: %s", gene_id, chunk, e)
+                return []
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            chunk_reports = list(executor.map(fetch, chunks))
+
+        reports = []
+        seen = set()
+        for report in (report for chunk in chunk_reports for report in chunk):
+            key = report.get('gene', {}).get('gene_id')
+            if key is not None and key in seen:
+                continue
+            seen.add(key)
+            reports.append(report)
+        return {'reports': reports}
 
     def get_protein_reference_id(self, gene_id) -> str:
         """
         Gets protein ortholog information.
         """
         url = f"https://www.ncbi.nlm.nih.gov/gene/{gene_id}"
-        r = requests.get(url)
+        r = self._get(url, api_key=False)
         
         if not r.ok:
             return ""
@@ -81,5 +153,5 @@ class NCBIClient():
             "retmode": "text"
         }
         
-        r = requests.get(url, params=params)
+        r = self._get(url, params=params)
         return ('ncbi', r.text)
\ No newline at end of file
@@ -0,0 +1,39 @@
+import threading
+import time
+
+class RateLimiter():
+    """
+    Represents a thread-safe token bucket limiting requests per second.
+
+    Attributes:
+        rate (float): Requests allowed per second.
+        burst (int): Requests allowed back to back.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Constructor for RateLimiter.
+
+        Args:
+            rate (float): Requests allowed per second.
+            burst (int): Requests allowed back to back.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
@@ -1,14 +1,32 @@
+import logging
 import requests, urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+logger = logging.getLogger(__name__)
+
 class UniProtClient():
     """
     Represents UniProt client.
 
     Attributes:
         BASE_URL (str): Base url.
+        ENTRY_FIELDS (list): UniProtKB fields returned for entries.
     """
     BASE_URL = "https://rest.uniprot.org"
+    ENTRY_FIELDS = [
+        "accession",
+        "protein_name",
+        "organism_name",
+        "sequence",
+        "mass",
+        "cc_subcellular_location",
+        "xref_pdb",
+        "cc_function",
+        "cc_tissue_specificity",
+        "xref_string",
+        "gene_names",
+        "xref_geneid"
+        ]
 
     def get_entry(self, protein_id, **kwargs) -> dict:
         """
@@ -21,20 +39,7 @@ class UniProtClient():
             dict: Uniprot data.
         """
         params = {
-            "fields": [
-                "accession",
-                "protein_name",
-                "organism_name",
-                "sequence",
-                "mass",
-                "cc_subcellular_location",
-                "xref_pdb",
-                "cc_function",
-                "cc_tissue_specificity",
-                "xref_string",
-                "gene_names",
-                "xref_geneid"
-                ]
+            "fields": self.ENTRY_FIELDS
             }
         
         headers = {
@@ -69,6 +74,35 @@ class UniProtClient():
         data = r.json()
         return data
     
+    def get_entries(self, accessions, batch_size=500) -> list:
+        """
+        Gets the UniProtKB entries of several accessions, batch_size accessions per request.
+
+        Args:
+            accessions (list): UniProtKB accessions.
+            batch_size (int): Accessions per request.
+
+        Returns:
+            list: UniProtKB entries, with the same fields as get_entry. Accessions that failed are missing.
+        """
+        accessions = list(dict.fromkeys(accessions))
+        url = '/'.join([self.BASE_URL, "uniprotkb", "accessions"])
+        headers = {
+            "accept": "application/json"
+            }
+        entries = []
+        for k in range(0, len(accessions), batch_size):
+            params = {
+                "accessions": ",".join(accessions[k:k + batch_size]),
+                "fields": ",".join(self.ENTRY_FIELDS)
+                }
+            r = requests.get(url, headers=headers, params=params, verify=False)
+            if r.ok:
+                entries.extend(r.json().get('results', []))
+            else:
+                logger.warning("UniProtKB accessions request failed with status %s", r.status_code)
+        return entries
+
     def get_fasta(self, protein_id):
         url = '/'.join([self.BASE_URL, "uniprotkb", protein_id + ".fasta"])
         r = requests.get(url, verify=False)
@@ -78,4 +112,29 @@ class UniProtClient():
         url = f"https://rest.uniprot.org/uniprotkb/{protein_id}.json?fields=ft_var_seq%2Cft_variant%2Cft_non_cons%2Cft_non_std%2Cft_non_ter%2Cft_conflict%2Cft_unsure%2Cft_act_site%2Cft_binding%2Cft_dna_bind%2Cft_site%2Cft_mutagen%2Cft_intramem%2Cft_topo_dom%2Cft_transmem%2Cft_chain%2Cft_crosslnk%2Cft_disulfid%2Cft_carbohyd%2Cft_init_met%2Cft_lipid%2Cft_mod_res%2Cft_peptide%2Cft_propep%2Cft_signal%2Cft_transit%2Cft_strand%2Cft_helix%2Cft_turn%2Cft_coiled%2Cft_compbias%2Cft_domain%2Cft_motif%2Cft_region%2Cft_repeat%2Cft_zn_fing"
         r = requests.get(url, verify=False)
         return r.json()
-            
\ No newline at end of file
+
+    def stream_proteome(self, tax_id) -> list:
+        """
+        Downloads every entry of an organism's reference proteome in one request through the stream endpoint.
+
+        Args:
+            tax_id (int): Organism taxonomic ID.
+
+        Returns:
+            list: UniProtKB entries, with the same fields as get_entry.
+        """
+        url = '/'.join([self.BASE_URL, "uniprotkb", "stream"])
+        params = {
+            "query": f"organism_id:{tax_id} AND keyword:KW-1185",
+            "fields": ",".join(self.ENTRY_FIELDS),
+            "format": "json"
+            }
+        headers = {
+            "accept": "application/json"
+            }
+        r = requests.get(url, headers=headers, params=params, verify=False)
+
+        if not r.ok:
+            return []
+
+        return r.json().get('results', [])
@@ -1,3 +1,5 @@
+import os
+from pathlib import Path
 from client.uniprot_client import UniProtClient
 from client.alphafold_client import AlphaFoldClient
 from client.string_client import StringClient
@@ -7,10 +9,15 @@ from models.protein_model.human_protein import HumanProtein
 from models.protein_model.ortholog import Ortholog
 from models.protein_model.protein import Protein
 from models.organism import Organism, CustomOrganism
+from models.feature_table import FeatureTable
+from models.snapshot import Snapshot
 from ortholog_finders.ncbi_ortholog_finder import NCBIOrthologFinder
+from ortholog_finders.ortholog_index import OrthologIndex
 from ortholog_finders.uniref_ortholog_finder import UniRefOrthologFinder
 
 class Driver:
+    ORTHOLOG_INDEX_PATH = Path(os.environ.get("ORTHOLOG_INDEX", Path(__file__).parent.parent / ".ortholog_index" / "orthologs.sqlite3"))
+
     def __init__(self, protein_id, custom_organisms=None):
         self.uniprot_client = UniProtClient()
         self.af_client = AlphaFoldClient()
@@ -18,7 +25,11 @@ class Driver:
         self.ncbi_client = NCBIClient()
         self.therasabdab_client = TherasabdabClient()
         self.ncbi_ortholog_finder = NCBIOrthologFinder()
+        self.ortholog_index = OrthologIndex(self.ORTHOLOG_INDEX_PATH)
         self.uniref_ortholog_finder = UniRefOrthologFinder()
+        self.protein_name = None
+        self.protein_id = protein_id
+        self.proteins = {}
         self._set_protein_information(protein_id, custom_organisms)
     
     def _set_protein_information(self, protein_id, custom_organisms=None):
@@ -32,6 +43,7 @@ class Driver:
         self.protein_information[Organism.HUMAN] = human_data
     
     def drive(self, protein_name, protein_id, selected_organisms=None):
+        self.protein_name = protein_name
         gene_id = next(entry["id"] for entry in self.protein_information[Organism.HUMAN]['uniProtKBCrossReferences'] 
                if entry["database"] == "GeneID")
         excluded = Organism.HUMAN
@@ -44,7 +56,11 @@ class Driver:
         
         organism_list = [o.tax_id for o in organisms_to_process]
         
-        ncbi_ids = self.ncbi_ortholog_finder.get_orthologs(gene_id, organism_list)
+        # Answer from the offline index first; only organisms it misses go to NCBI
+        ncbi_ids = self.ortholog_index.get_orthologs(gene_id, organism_list)
+        missing = [tax_id for tax_id in organism_list if str(tax_id) not in ncbi_ids]
+        if missing:
+            ncbi_ids.update(self.ncbi_ortholog_finder.get_orthologs(gene_id, missing))
         
         # Create a mapping of tax_id to organism for both predefined and custom organisms
         tax_id_to_organism = {}
@@ -94,35 +110,25 @@ class Driver:
                     proteins[organism] = protein
                 else:
                     fasta = self._get_fasta_content(results['primaryAccession'])
-                    annotations_text = self._get_annotations_text(results['primaryAccession'])
+                    features = self._get_features(results['primaryAccession'])
                     af_pdb = self._get_af_pdb(results['primaryAccession'])
                     if af_pdb:
                         if organism == Organism.HUMAN:
-                            protein = HumanProtein.from_uniprot_result(protein_name=protein_name, uniprot_results=results, af_results=af_pdb, annotations_text=annotations_text, fasta=fasta)
+                            protein = HumanProtein.from_uniprot_result(protein_name=protein_name, uniprot_results=results, af_results=af_pdb, features=features, fasta=fasta)
                         else:
-                            protein = Ortholog.from_uniprot_result(protein_name=protein_name, uniprot_results=results, af_results=af_pdb, annotations_text=annotations_text, organism=organism, fasta=fasta)
+                            protein = Ortholog.from_uniprot_result(protein_name=protein_name, uniprot_results=results, af_results=af_pdb, features=features, organism=organism, fasta=fasta)
                         proteins[organism] = protein
+        # Stage boundary: make every protein's files durable before alignment and rendering read them
+        Protein.artifact_writer.barrier()
+        self.proteins = proteins
         return proteins
 
     def _get_fasta_content(self, protein_id) -> str:
         return self.uniprot_client.get_fasta(protein_id=protein_id)
     
-    def _get_annotations_text(self, protein_id) -> str:
+    def _get_features(self, protein_id) -> FeatureTable:
         result = self.uniprot_client.get_annotations(protein_id=protein_id)
-        gff = self._json_to_gff(result, protein_id)
-        return gff
-
-    def _json_to_gff(self, json, protein_id):
-        gff = "##gff-version 3\n"
-        features = json.get('features')
-        if features:
-            for annotation in features:
-                gff += f"{protein_id}\tUniProtKB\t{annotation['type']}\t"
-                start = str(annotation['location']['start']['value'])
-                end = str(annotation['location']['end']['value'])
-                note = annotation['description']
-                gff += f"{start}\t{end}\t.\t.\t.\t{note}\n"
-            return gff
+        return FeatureTable.from_uniprot_features(result)
 
     def _get_af_pdb(self, protein_id) -> dict:
         return self.af_client.get_af_pdb(protein_id=protein_id)
@@ -133,6 +139,19 @@ class Driver:
     def _get_therasabdab_info(self, protein_name):
         return self.therasabdab_client.fetch(protein_name)
     
+    def snapshot(self, images: dict | None = None) -> Snapshot:
+        """
+        Captures the resolved protein information and proteins of the last drive, so the deck can be rebuilt offline.
+
+        Args:
+            images (dict): Deck images: 'structure' (path, caption), 'alignments' list of (path, caption) and 'string_network' path.
+
+        Returns:
+            Snapshot: The snapshot.
+        """
+        return Snapshot(protein_name=self.protein_name, protein_id=self.protein_id,
+                        protein_information=self.protein_information, proteins=self.proteins, images=images or {})
+
     def set_ortholog_selection_callback(self, callback):
         """
         Set a callback function for ortholog selection when multiple options are found.
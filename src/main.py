@@ -5,8 +5,14 @@ from client.uniprot_client import UniProtClient
 from models.organism import Organism, CustomOrganism
 from models.entry import Entry
 from models.image import Img
+from models.passport_report import PassportReport
+from models.protein_model.human_protein import HumanProtein
+from models.portfolio import PortfolioWriter
+from rendering.render_profile import RenderProfile
 from driver import Driver
 
+TEMPLATE_PATH = Path(__file__).resolve().parent.parent / "assets" / "template.pptx"
+
 if 'cancel_process' not in st.session_state:
     st.session_state.cancel_process = False
 
@@ -28,7 +34,7 @@ def _create_ortholog_selection_callback(protein_id):
         
         Args:
             organism_name: Name of the organism
-            options: List of dicts with 'accession', 'source', and 'entry' keys
+            options: List of dicts with 'accession', 'source', 'entry', 'identity' and 'score' keys, best-ranked first
             
         Returns:
             Selected accession ID, or None if user selection is needed
@@ -98,7 +104,10 @@ def _handle_pending_ortholog_selections(protein_id):
                     protein_name = accession
             else:
                 protein_name = accession
-            option_labels.append(f"{accession} ({source}) - {protein_name}")
+            label = f"{accession} ({source}) - {protein_name}"
+            if opt.get('identity') is not None:
+                label += f" - {opt['identity']}% identity, score {opt['score']}"
+            option_labels.append(label)
         
         # Get current selection or default to first
         current_selection = selection_data.get('selected')
@@ -127,9 +136,12 @@ def _handle_pending_ortholog_selections(protein_id):
     
     return not all_selected
 
-def _run_stepwise(protein_id, protein_name, full_name, selected_organisms, custom_organisms):
+def _retrieve(protein_id, protein_name, selected_organisms, custom_organisms):
     """
-    Run protein passport in steps so we can cancel mid-process.
+    Retrieves the human protein and its orthologs.
+
+    Returns:
+        tuple: Driver, HumanProtein and Orthologs, or None if cancelled or waiting on an ortholog selection.
     """
     driver = Driver(protein_id, custom_organisms=custom_organisms)
     
@@ -162,32 +174,53 @@ def _run_stepwise(protein_id, protein_name, full_name, selected_organisms, custo
         return
     human = proteins.get(Organism.HUMAN)
     orthologs = [protein for org, protein in proteins.items() if org != Organism.HUMAN]
+    return driver, human, orthologs
 
-    st.info("Annotating and aligning sequences...")
-    human.annotate_align_seq_geneious(orthologs)
+def _warn_geneious_failures(results):
+    for result in results:
+        if not result.ok:
+            st.warning(f"Geneious {result.call.operation or 'annotation'} failed after {result.elapsed:.1f}s: {result.stderr}")
+
+def _complete(driver, human, orthologs, protein_name, full_name, render_profile=RenderProfile.SLIDE):
+    """
+    Compares, renders and saves the passport of aligned proteins.
+
+    Returns:
+        str: Path of the saved passport, or None if cancelled.
+    """
+    human.compute_similarity(orthologs)
     if st.session_state.cancel_process:
         st.warning("Process cancelled during annotation/alignment!")
         return
 
     st.info("Performing structural alignment...")
-    annotated_img_path = human.annotate_3d_structure()
+    # Structure images are rendered at the size of the template slots they fill
+    slot_sizes = Entry.slot_sizes(TEMPLATE_PATH)
+    annotated_img_path = human.annotate_3d_structure(profile=render_profile, size_inches=slot_sizes['structure'])
     slide_1_img = Img(annotated_img_path, caption=human.pred_pdb_id)
     if st.session_state.cancel_process:
         st.warning("Process cancelled during 3D annotation!")
         return
 
-    rmsd_map = human.structure_align(orthologs)
+    rmsd_map = human.structure_align(orthologs, profile=render_profile, size_inches=slot_sizes['alignment'])
     slide_3_imgs = []
-    for ortholog, (img_path, rmsd) in rmsd_map.items():
+    for ortholog, (img_path, rmsd, aligned_ranges) in rmsd_map.items():
         # Use scientific name for display (value[0] for both Organism enum and CustomOrganism)
         organism_display_name = ortholog.organism.value[0]
+        ranges_text = ", ".join(f"{start}-{end}" for start, end in aligned_ranges)
         slide_3_imgs.append(
-            Img(img_path, caption=f"Human:{organism_display_name}\nRMSD: {rmsd}Å")
+            Img(img_path, caption=f"Human:{organism_display_name}\nRMSD: {rmsd}Å ({ranges_text})")
         )
     if st.session_state.cancel_process:
         st.warning("Process cancelled during structure alignment!")
         return
 
+    st.info("Comparing structures across organisms...")
+    matrix_table, matrix_heatmap = human.structure_matrix(orthologs)
+    if st.session_state.cancel_process:
+        st.warning("Process cancelled during structure comparison!")
+        return
+
     st.info("Retrieving STRING DB interactions...")
     slide_4_img = driver._get_string_db_interactions(protein_name, human.string_id)
     if st.session_state.cancel_process:
@@ -195,15 +228,71 @@ def _run_stepwise(protein_id, protein_name, full_name, selected_organisms, custo
         return
 
     st.info("Creating PowerPoint...")
-    base_dir = Path(__file__).resolve().parent.parent  
-    template_path = base_dir / "assets" / "template.pptx"
-    entry = Entry(template_path=str(template_path), human=human, orthologs=orthologs, user_name=full_name)
-    entry.populate_info_table_slide(slide_1_img)
-    entry.populate_hu_seq_slide()
-    entry.populate_str_align_slide(slide_3_imgs)
-    entry.populate_string_db_slide(slide_4_img)
+    # The snapshot lets the deck be rebuilt (other template or user name) without repeating any lookup
+    snapshot = driver.snapshot(images={
+        'structure': (slide_1_img.path, slide_1_img.caption),
+        'alignments': [(img.path, img.caption) for img in slide_3_imgs],
+        'string_network': slide_4_img,
+        'structure_matrix': {'table': matrix_table, 'heatmap': matrix_heatmap},
+    })
+    snapshot.save(human.file_name.parent / f"{protein_name}_snapshot.bin")
+    passport_path = Entry.from_snapshot(TEMPLATE_PATH, snapshot, full_name).save()
+    PassportReport.from_snapshot(snapshot).save()
 
     st.success("Process completed successfully!")
+    return passport_path
+
+def _run_stepwise(protein_id, protein_name, full_name, selected_organisms, custom_organisms, render_profile=RenderProfile.SLIDE, 
+                  alignment_backend="native"):
+    """
+    Run protein passport in steps so we can cancel mid-process.
+
+    Returns:
+        str: Path of the saved passport, or None if cancelled or waiting on an ortholog selection.
+    """
+    retrieved = _retrieve(protein_id, protein_name, selected_organisms, custom_organisms)
+    if retrieved is None:
+        return
+    driver, human, orthologs = retrieved
+
+    st.info("Annotating and aligning sequences...")
+    alignment_result = human.align_sequences(orthologs, backend=alignment_backend)
+    if alignment_backend == "geneious":
+        _warn_geneious_failures(alignment_result)
+    return _complete(driver, human, orthologs, protein_name, full_name, render_profile)
+
+def _run_batch(proteins, full_name, selected_organisms, custom_organisms, render_profile=RenderProfile.SLIDE,
+               alignment_backend="native"):
+    """
+    Runs the passports of several proteins. Every protein is retrieved first, so that with Geneious the whole batch
+    is annotated and aligned together in one run of calls.
+
+    Returns:
+        list: Paths of the saved passports, in input order, skipping cancelled or pending ones.
+    """
+    retrieved = []
+    for protein_name, protein_id in proteins:
+        result = _retrieve(protein_id, protein_name, selected_organisms, custom_organisms)
+        if st.session_state.cancel_process:
+            return []
+        if result is not None:
+            retrieved.append((protein_name, *result))
+
+    st.info("Annotating and aligning sequences...")
+    if alignment_backend == "geneious":
+        jobs = [(human, orthologs) for _, _, human, orthologs in retrieved]
+        for results in HumanProtein.annotate_align_seq_geneious_batch(jobs):
+            _warn_geneious_failures(results)
+    else:
+        for _, _, human, orthologs in retrieved:
+            human.align_sequences(orthologs, backend=alignment_backend)
+
+    passport_paths = []
+    for protein_name, driver, human, orthologs in retrieved:
+        passport_path = _complete(driver, human, orthologs, protein_name, full_name, render_profile)
+        if passport_path:
+            passport_paths.append(passport_path)
+    return passport_paths
 
 def main():
     st.title("Protein Passport Generator")
@@ -215,6 +304,23 @@ def main():
     st.markdown("## Input Options")
     input_option = st.radio("Choose input method:", ["Single Entry", "CSV Upload"])
 
+    st.markdown("## Render Quality")
+    render_profile = st.radio(
+        "Structure image quality:",
+        list(RenderProfile),
+        index=list(RenderProfile).index(RenderProfile.SLIDE),
+        format_func=lambda p: p.name.capitalize(),
+        horizontal=True
+    )
+
+    st.markdown("## Sequence Alignment")
+    alignment_backend = st.radio(
+        "Alignment backend:",
+        ["native", "geneious"],
+        format_func=lambda b: "Built-in" if b == "native" else "Geneious (requires license)",
+        horizontal=True
+    )
+
     st.markdown("## Organism Selection")
     st.markdown("Select which organisms to use as orthologs (all selected by default):")
     
@@ -324,8 +430,18 @@ def main():
         # Get custom organisms that are selected
         selected_custom_orgs = [org for org in st.session_state.custom_organisms 
                                 if org in selected_organisms]
-        for protein_name, protein_id in proteins:
-            _run_stepwise(protein_id, protein_name, full_name, selected_organisms, st.session_state.custom_organisms)
+        if len(proteins) > 1:
+            passport_paths = _run_batch(proteins, full_name, selected_organisms, st.session_state.custom_organisms, render_profile, alignment_backend)
+            passport_paths = [passport_path for passport_path in passport_paths if passport_path]
+            # Several passports are also collected into one portfolio deck; it is discarded if any of them fails to append
+            if passport_paths:
+                with PortfolioWriter(Path(__file__).resolve().parent.parent / "portfolio_protein_passport.pptx") as portfolio:
+                    for passport_path in passport_paths:
+                        portfolio.add_pptx(passport_path)
+                st.success(f"Portfolio of {portfolio.passports} passports saved to {portfolio.output_path}")
+        else:
+            for protein_name, protein_id in proteins:
+                _run_stepwise(protein_id, protein_name, full_name, selected_organisms, st.session_state.custom_organisms, render_profile, alignment_backend)
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,8 @@
+import argparse
+import copy
+import os
+import threading
+import uuid
 from pptx import Presentation
 from pptx.util import Pt, Inches
 from pptx.dml.color import RGBColor
@@ -5,9 +10,42 @@ from pathlib import Path
 from models.protein_model.human_protein import HumanProtein
 from models.annotation import Annotation
 from dataclasses import dataclass, field
+from typing import ClassVar
 from models.image import Img
+from models.organism import Organism
+from models.snapshot import Snapshot
+from rendering.image_pipeline import EMU_PER_INCH, ImagePipeline
 from utils.file_utils import ensure_directory
 
+def _shape_roles(slide) -> dict:
+    """
+    Indexes a slide's shapes by role, in shape order.
+
+    Returns:
+        dict: Role ('title', 'pictures', 'captions', 'tables', 'footer') to shape positions.
+    """
+    roles = {'title': [], 'pictures': [], 'captions': [], 'tables': [], 'footer': []}
+    for i, shape in enumerate(slide.shapes):
+        if 'Title' in shape.name:
+            roles['title'].append(i)
+        if 'Picture' in shape.name:
+            roles['pictures'].append(i)
+        if 'TextBox' in shape.name:
+            roles['captions'].append(i)
+        if shape.has_table:
+            roles['tables'].append(i)
+        if 'Footer' in shape.name:
+            roles['footer'].append(i)
+    return roles
+
+
+def _long_edge_inches(shapes) -> float | None:
+    """
+    Gets the longest edge of the given shapes, in inches, or None if there are none.
+    """
+    return max((max(shape.width, shape.height) / EMU_PER_INCH for shape in shapes), default=None)
+
+
 @dataclass
 class Entry:
     """
@@ -18,10 +56,14 @@ class Entry:
         human (HumanProtein): HumanProtein of this Entry.
         orthologs (list): List of Orthologs of this Entry.
         user_name (str): User's name.
-        powerpoint (Presentation): Presentation object of this Entry.
+        powerpoint (Presentation): Presentation object of this Entry, cloned from the parsed template.
         slides (Slides): Slides of this Entry's Presentation.
+        roles (list): Per slide, role ('title', 'pictures', 'captions', 'tables', 'footer') to shapes.
         table_cells (list): List containing text to fill table cells of first slide in this Entry.
         output_path (Path): Output path.
+        templates (dict): Parsed templates, their shape-role maps and image slot sizes, shared by all entries
+            and keyed by template path.
+        image_pipeline (ImagePipeline): Resamples and compresses images to their slot size, shared by all entries.
     """
     template_path: str
     human: HumanProtein
@@ -31,19 +73,107 @@ class Entry:
     slides: list = field(init=False)
     table_cells: list = field(init=False)
     output_path: Path = field(init=False)
+    roles: list = field(init=False)
+    templates: ClassVar[dict] = {}
+    _templates_lock: ClassVar[threading.Lock] = threading.Lock()
+    image_pipeline: ClassVar[ImagePipeline] = ImagePipeline(Path(__file__).parent.parent.parent / ".image_cache")
 
     def __post_init__(self):
         """
-        Post init method for Entry. Sets powerpoint, slides, output_path, and table_cells fields.
+        Post init method for Entry. Sets powerpoint, slides, roles, output_path, and table_cells fields.
         """
-        self.powerpoint = Presentation(self.template_path)
+        template, template_roles, _ = self._template(self.template_path)
+        self.powerpoint = copy.deepcopy(template)
         self.slides = self.powerpoint.slides
+        self.roles = []
+        for slide, slide_roles in zip(self.slides, template_roles):
+            shapes = list(slide.shapes)
+            self.roles.append({role: [shapes[i] for i in positions] for role, positions in slide_roles.items()})
         self.output_path = Path(__file__).parent.parent.parent / f"output_{self.human.name}" / f"{self.human.name}_protein_passport.pptx"
-        # Ensure output directory exists before saving
-        ensure_directory(self.output_path.parent)
         self._build_table_cells()
         self._set_footer()
 
+    @classmethod
+    def _template(cls, template_path: str) -> tuple:
+        """
+        Gets a parsed template, its per-slide shape-role map and its image slot sizes,
+        parsing it only on first use or after it changed.
+
+        Returns:
+            tuple: Presentation (not to be accessed; clone it), per-slide role to shape positions, and slot sizes.
+        """
+        path = Path(template_path).resolve()
+        key = (str(path), path.stat().st_mtime_ns)
+        with cls._templates_lock:
+            if key not in cls.templates:
+                template = Presentation(str(path))
+                # Slide and shape proxies cache XML subtrees that deepcopy would detach from a clone's tree,
+                # so the template itself is never traversed; roles are read from a throwaway clone
+                slides = list(copy.deepcopy(template).slides)
+                roles = [_shape_roles(slide) for slide in slides]
+                pictures = [[list(slide.shapes)[i] for i in slide_roles['pictures']] for slide, slide_roles in zip(slides, roles)]
+                captions = [[list(slide.shapes)[i] for i in slide_roles['captions']] for slide, slide_roles in zip(slides, roles)]
+                # Slots filled by populate_info_table_slide (last picture) and populate_str_align_slide (pictures from
+                # the third); alignment images without a picture slot sit above their captions, as wide as them
+                alignment = None
+                if len(slides) > 2:
+                    alignment = _long_edge_inches(pictures[2][2:]) or max((shape.width / EMU_PER_INCH for shape in captions[2][1:]), default=None)
+                sizes = {
+                    'structure': _long_edge_inches(pictures[0][-1:]) if slides else None,
+                    'alignment': alignment,
+                }
+                for stale in [k for k in cls.templates if k[0] == key[0]]:
+                    del cls.templates[stale]
+                cls.templates[key] = (template, roles, sizes)
+            return cls.templates[key]
+
+    @classmethod
+    def slot_sizes(cls, template_path: str) -> dict:
+        """
+        Gets the size of the template's image slots, so images can be rendered at the size they are shown.
+
+        Args:
+            template_path (str): Path of the template ppt.
+
+        Returns:
+            dict: 'structure' and 'alignment' to the long edge of their picture slots in inches, or None if the
+                template has no such slot.
+        """
+        return cls._template(template_path)[2]
+
+    def _shape(self, slide: int, role: str):
+        """
+        Gets the last shape of a role on a slide, or None.
+        """
+        shapes = self.roles[slide][role]
+        return shapes[-1] if shapes else None
+
+    @classmethod
+    def from_snapshot(cls, template_path: str, snapshot: Snapshot | str, user_name: str) -> "Entry":
+        """
+        Builds and populates a passport from a snapshot, without network requests. Call save to write it.
+
+        Args:
+            template_path (str): Path of the template ppt.
+            snapshot (Snapshot | str): Snapshot, or path of a saved snapshot.
+            user_name (str): User's name.
+
+        Returns:
+            Entry: The populated Entry.
+        """
+        if not isinstance(snapshot, Snapshot):
+            snapshot = Snapshot.load(snapshot)
+        human = snapshot.proteins[Organism.HUMAN]
+        orthologs = [protein for organism, protein in snapshot.proteins.items() if organism != Organism.HUMAN]
+        entry = cls(template_path=str(template_path), human=human, orthologs=orthologs, user_name=user_name)
+
+        path, caption = snapshot.images['structure']
+        entry.populate_info_table_slide(Img(path, caption=caption))
+        entry.populate_hu_seq_slide()
+        entry.populate_str_align_slide([Img(path, caption=caption) for path, caption in snapshot.images['alignments']])
+        entry.populate_string_db_slide(snapshot.images['string_network'])
+        return entry
+
     def _build_table_cells(self):
         """
         Sets table_cells field.
@@ -60,7 +190,7 @@ class Entry:
                 f"{self.human.passport_table_data['length']} aa {self.human.passport_table_data['mass']} kDa",
                 ""
             ],
-            [f"{o.organism.value[0]}: %" for o in self.orthologs],
+            [f"{o.organism.value[0]}: {self._format_identity(o)}" for o in self.orthologs],
             [
                 f"Experimental PDBs: {', '.join(self.human.passport_table_data['exp_pdbs'])}",
                 f"Predicted: {self.human.pred_pdb_id}"
@@ -69,15 +199,45 @@ class Entry:
             [f"{self.human.passport_table_data['known_activity']}."]
         ]
 
+    def save(self, stream=None) -> str | None:
+        """
+        Saves the presentation once all slides are populated. Slides are built in memory; the file is written
+        to a temporary path and renamed over output_path, so readers never see a partial deck.
+
+        Args:
+            stream: Optional binary file-like object to write to instead of output_path, e.g. io.BytesIO.
+
+        Returns:
+            str: Output path, or None if written to stream.
+        """
+        if stream is not None:
+            self.powerpoint.save(stream)
+            return None
+        ensure_directory(self.output_path.parent)
+        tmp_path = self.output_path.with_name(f".{self.output_path.name}.{uuid.uuid4().hex}")
+        try:
+            self.powerpoint.save(tmp_path)
+            os.replace(tmp_path, self.output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return str(self.output_path)
+
+    @staticmethod
+    def _format_identity(ortholog) -> str:
+        """
+        Formats an ortholog's % identity and % similarity to human.
+        """
+        if ortholog.identity is None:
+            return "%"
+        return f"{ortholog.identity}% (similarity {ortholog.similarity}%)"
+
     def _set_footer(self):
         """
         Writes user's name to footer.
         """
-        for slide in self.slides:
-            for shape in slide.shapes:
-                if 'Footer' in shape.name:
-                    shape.text=self.user_name
-                    break
+        for slide_roles in self.roles:
+            if slide_roles['footer']:
+                slide_roles['footer'][0].text = self.user_name
 
     def populate_info_table_slide(self, img: Img):
         """
@@ -86,24 +246,17 @@ class Entry:
         Args:
             img (Img): Human protein 3d structure image.
         """
-        slide = self.slides[0]
-
-        for shape in slide.shapes:
-            if 'Title' in shape.name:
-                title = shape
-            if 'Picture' in shape.name:
-                picture = shape
-            if 'Text' in shape.name:
-                pbd_id_caption = shape
-            if shape.has_table:
-                table = shape.table
+        title = self._shape(0, 'title')
+        picture = self._shape(0, 'pictures')
+        pbd_id_caption = self._shape(0, 'captions')
+        table_frame = self._shape(0, 'tables')
+        table = table_frame.table if table_frame else None
         
         if title:
             title.text = "Protein Passport - " + self.human.name
 
         if picture:
-            img.vertical()
-            picture.insert_picture(img.path)
+            picture.insert_picture(self.image_pipeline.prepare(img.path, (picture.width, picture.height), rotate="vertical"))
         
         if pbd_id_caption:
             pbd_id_caption.text = img.caption
@@ -120,16 +273,12 @@ class Entry:
                         run.font.bold = False
                         run.font.color.rbg = RGBColor(0, 0, 0)
 
-        self.powerpoint.save(self.output_path)
     
     def populate_hu_seq_slide(self):
         """
         Populates the second slide of protein passport ppt template.
         """
-        slide = self.slides[1]
-        for shape in slide.shapes:
-            if 'Title' in shape.name:
-                title = shape
+        title = self._shape(1, 'title')
         
         if title:
             title.text = self.human.name + " Human Sequence Annotated"
@@ -151,23 +300,11 @@ class Entry:
             pictures.append(i.path)
             captions.append(i.caption)
             
-        placeholders = []
-        textboxes = []
-        table = None
-        title = None
-
-        # Collect all shapes
-        for shape in slide.shapes:
-            if 'Picture' in shape.name:
-                placeholders.append(shape)
-            if 'Table' in shape.name:
-                table = shape.table
-            if 'TextBox' in shape.name:
-                textboxes.append(shape)
-            if 'Title' in shape.name:
-                title = shape
-
-        textboxes = textboxes[1:]
+        placeholders = self.roles[2]['pictures']
+        textboxes = self.roles[2]['captions'][1:]
+        table_frame = self._shape(2, 'tables')
+        table = table_frame.table if table_frame else None
+        title = self._shape(2, 'title')
         
         if title:
             if Annotation.ECD in self.human.annotations:
@@ -176,9 +313,10 @@ class Entry:
                 title.text = 'Mature Alignment'
         
         # Insert pictures into placeholders (skip first placeholder if it's for something else)
-        zipped = zip(placeholders[2:], pictures)
-        for z in zipped:
-            z[0].insert_picture(z[1])
+        zipped = list(zip(placeholders[2:], pictures))
+        prepared = [self.image_pipeline.submit(picture, (placeholder.width, placeholder.height)) for placeholder, picture in zipped]
+        for (placeholder, _), future in zip(zipped, prepared):
+            placeholder.insert_picture(future.result())
 
         # Handle textboxes dynamically based on number of captions
         num_captions = len(captions)
@@ -261,10 +399,9 @@ class Entry:
                 id_cell.text_frame.paragraphs[0].runs[0].font.size = Pt(14)
 
                 similarity_cell = table.cell(i, 2)
-                similarity_cell.text = "%"
+                similarity_cell.text = f"{ortholog.identity}%" if ortholog.identity is not None else "%"
                 similarity_cell.text_frame.paragraphs[0].runs[0].font.size = Pt(14)
 
-        self.powerpoint.save(self.output_path)
     
     def populate_string_db_slide(self, network_img: str, pred_partners_img=None):
         """
@@ -276,8 +413,15 @@ class Entry:
         """
         slide = self.slides[3]
         
-        slide.shapes.add_picture(network_img, left=1, top=1)
+        slide_size = (self.powerpoint.slide_width, self.powerpoint.slide_height)
+        slide.shapes.add_picture(self.image_pipeline.prepare(network_img, slide_size, cover=False), left=1, top=1)
 
-        self.powerpoint.save(self.output_path)
-    
-    
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild a protein passport from a saved snapshot.")
+    parser.add_argument("snapshot", help="Snapshot file (output_<protein>/<protein>_snapshot.bin)")
+    parser.add_argument("--template", default=Path(__file__).parent.parent.parent / "assets" / "template.pptx")
+    parser.add_argument("--user", default="", help="Name written to the slide footers")
+    args = parser.parse_args()
+    print(Entry.from_snapshot(args.template, args.snapshot, args.user).save())
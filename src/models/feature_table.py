@@ -0,0 +1,213 @@
+import io
+from pathlib import Path
+import numpy as np
+from models.annotation import Annotation
+from utils.file_utils import safe_write_bytes
+
+_ANNOTATIONS = list(Annotation)
+
+class FeatureTable:
+    """
+    Represents a protein's sequence features as parallel arrays.
+
+    Attributes:
+        starts (np.ndarray): 1-based feature starts.
+        ends (np.ndarray): 1-based inclusive feature ends.
+        type_codes (np.ndarray): Index into types per feature.
+        annotation_codes (np.ndarray): Index into Annotation members per feature, -1 if the feature is not an Annotation.
+        types (list): Distinct UniProt feature types.
+        descriptions (list): Feature descriptions.
+    """
+    def __init__(self, starts, ends, type_codes, annotation_codes, types: list, descriptions: list):
+        """
+        Constructor for FeatureTable.
+        """
+        self.starts = np.asarray(starts, dtype=np.int32)
+        self.ends = np.asarray(ends, dtype=np.int32)
+        self.type_codes = np.asarray(type_codes, dtype=np.int16)
+        self.annotation_codes = np.asarray(annotation_codes, dtype=np.int8)
+        self.types = types
+        self.descriptions = descriptions
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @staticmethod
+    def _annotation_code(feature_type: str, description: str) -> int:
+        """
+        Gets the index of the Annotation member matching a feature, or -1.
+        Features already typed with an Annotation name (as in to_gff output) match that member.
+        """
+        for code, annotation in enumerate(_ANNOTATIONS):
+            if feature_type == annotation.name:
+                return code
+            if feature_type == annotation.feature and (annotation.attr is None or annotation.attr in description):
+                return code
+        return -1
+
+    @classmethod
+    def from_rows(cls, rows) -> "FeatureTable":
+        """
+        Builds a FeatureTable from (type, start, end, description) rows.
+        """
+        types = []
+        type_index = {}
+        starts, ends, type_codes, annotation_codes, descriptions = [], [], [], [], []
+        for feature_type, start, end, description in rows:
+            if feature_type not in type_index:
+                type_index[feature_type] = len(types)
+                types.append(feature_type)
+            starts.append(int(start))
+            ends.append(int(end))
+            type_codes.append(type_index[feature_type])
+            annotation_codes.append(cls._annotation_code(feature_type, description))
+            descriptions.append(description)
+        return cls(starts, ends, type_codes, annotation_codes, types, descriptions)
+
+    @classmethod
+    def from_uniprot_features(cls, json: dict) -> "FeatureTable":
+        """
+        Builds a FeatureTable from a UniProt entry's feature JSON.
+
+        Args:
+            json (dict): UniProt entry JSON with a "features" list.
+
+        Returns:
+            FeatureTable: Features with a numeric location.
+        """
+        rows = []
+        for feature in json.get('features') or []:
+            start = feature['location']['start'].get('value')
+            end = feature['location']['end'].get('value')
+            if start is None or end is None:
+                continue
+            rows.append((feature['type'], start, end, feature.get('description', '')))
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_gff(cls, gff: str) -> "FeatureTable":
+        """
+        Builds a FeatureTable from GFF3 text.
+
+        Args:
+            gff (str): GFF3 text.
+
+        Returns:
+            FeatureTable: Features of the GFF.
+        """
+        rows = []
+        for line in gff.splitlines():
+            if line.startswith("#"):
+                continue
+            parts = line.split("\t")
+            if len(parts) < 9:
+                continue
+            rows.append((parts[2], parts[3], parts[4], parts[8]))
+        return cls.from_rows(rows)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes this table as an .npz archive.
+
+        Returns:
+            bytes: Archive contents, readable with load.
+        """
+        buffer = io.BytesIO()
+        np.savez(buffer, starts=self.starts, ends=self.ends, type_codes=self.type_codes,
+                 annotation_codes=self.annotation_codes, types=np.array(self.types, dtype=str),
+                 descriptions=np.array(self.descriptions, dtype=str))
+        return buffer.getvalue()
+
+    def save(self, path: Path) -> str:
+        """
+        Saves this table as an .npz archive.
+
+        Args:
+            path (Path): Output path.
+
+        Returns:
+            str: Output path.
+        """
+        safe_write_bytes(Path(path), self.to_bytes())
+        return str(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "FeatureTable":
+        """
+        Loads a table saved with save.
+
+        Args:
+            path (Path): .npz path.
+
+        Returns:
+            FeatureTable: The saved table.
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            return cls(archive["starts"], archive["ends"], archive["type_codes"], archive["annotation_codes"],
+                       archive["types"].tolist(), archive["descriptions"].tolist())
+
+    def ranges(self, annotation: Annotation) -> list:
+        """
+        Gets the ranges of an annotation type.
+
+        Args:
+            annotation (Annotation): Annotation type.
+
+        Returns:
+            list: (start, end) ranges, in feature order.
+        """
+        idx = np.flatnonzero(self.annotation_codes == _ANNOTATIONS.index(annotation))
+        return list(zip(self.starts[idx].tolist(), self.ends[idx].tolist()))
+
+    def annotation_ranges(self) -> dict:
+        """
+        Gets the ranges of every Annotation type present.
+        When an extracellular domain is annotated, signal and chain ranges are left out.
+
+        Returns:
+            dict: Annotation to list of (start, end) ranges.
+        """
+        annotations = {}
+        for code in np.unique(self.annotation_codes[self.annotation_codes >= 0]):
+            annotation = _ANNOTATIONS[code]
+            annotations[annotation] = self.ranges(annotation)
+        if Annotation.ECD in annotations:
+            annotations.pop(Annotation.SIGNAL, None)
+            annotations.pop(Annotation.CHAIN, None)
+        return annotations
+
+    @staticmethod
+    def merge(ranges: list) -> list:
+        """
+        Merges overlapping or adjacent ranges.
+
+        Args:
+            ranges (list): (start, end) ranges.
+
+        Returns:
+            list: Disjoint (start, end) ranges, in order.
+        """
+        if not ranges:
+            return []
+        bounds = np.array(sorted(ranges), dtype=np.int64)
+        running_end = np.maximum.accumulate(bounds[:, 1])
+        breaks = np.flatnonzero(bounds[1:, 0] > running_end[:-1] + 1) + 1
+        group_starts = np.concatenate(([0], breaks))
+        group_ends = np.concatenate((breaks - 1, [len(bounds) - 1]))
+        return list(zip(bounds[group_starts, 0].tolist(), running_end[group_ends].tolist()))
+
+    def to_gff(self, seq_id: str) -> str:
+        """
+        Writes the Annotation features as GFF3, with the Annotation name as feature type.
+
+        Args:
+            seq_id (str): Sequence ID of the first column.
+
+        Returns:
+            str: GFF3 text.
+        """
+        lines = ["##gff-version 3"]
+        for k in np.flatnonzero(self.annotation_codes >= 0):
+            lines.append("\t".join([seq_id, "UniProtKB", _ANNOTATIONS[self.annotation_codes[k]].name,
+                                    str(self.starts[k]), str(self.ends[k]), ".", ".", ".", self.descriptions[k]]))
+        return "\n".join(lines)
@@ -27,9 +27,10 @@ class Img():
         """
         self.path = path
         self.caption = caption
-        img = Image.open(path)
-        self.width = img.width
-        self.height = img.height
+        # Only the header is read; the pixels are decoded by whoever processes the image
+        with Image.open(path) as img:
+            self.width = img.width
+            self.height = img.height
 
     
     def vertical(self):
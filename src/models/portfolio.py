@@ -0,0 +1,294 @@
+import argparse
+import hashlib
+import io
+import os
+import posixpath
+import uuid
+import zipfile
+from pathlib import Path
+from lxml import etree
+from models.entry import Entry
+from utils.file_utils import ensure_directory
+
+_PKG_RELS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_CONTENT_TYPES = "http://schemas.openxmlformats.org/package/2006/content-types"
+_P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_SLIDE_REL = _R + "/slide"
+_IMAGE_REL = _R + "/image"
+_LAYOUT_REL = _R + "/slideLayout"
+_NOTES_REL = _R + "/notesSlide"
+_SLIDE_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+
+# Parts rewritten per portfolio, or per slide, instead of copied from the first passport
+_OWN_PARTS = ("[Content_Types].xml", "ppt/presentation.xml", "ppt/_rels/presentation.xml.rels")
+_SLIDE_DIRS = ("ppt/slides/", "ppt/notesSlides/", "ppt/media/")
+# Parts that must match across passports for their slides to share one master
+_TEMPLATE_DIRS = ("ppt/slideMasters/", "ppt/slideLayouts/", "ppt/theme/")
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _resolve(part: str, target: str) -> str:
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+
+
+class PortfolioWriter:
+    """
+    Represents one presentation holding the slides of many passports, written as passports arrive.
+    Each passport's slides are copied into the output archive straight away, so only one passport is held in memory.
+    Images are stored once by content (SHA-256) and shared by every slide that shows them.
+    The master, layouts and theme come from the first passport; all passports must use the same template.
+
+    The archive is written to a temporary file and renamed to output_path by close().
+
+    Attributes:
+        output_path (Path): Output path.
+        passports (int): Passports added.
+        slides (int): Slides added.
+    """
+    def __init__(self, output_path: Path):
+        """
+        Constructor for PortfolioWriter.
+
+        Args:
+            output_path (Path): Output path of the portfolio presentation.
+        """
+        self.output_path = Path(output_path)
+        self.passports = 0
+        self.slides = 0
+        ensure_directory(self.output_path.parent)
+        self._tmp_path = self.output_path.with_name(f".{self.output_path.name}.{uuid.uuid4().hex}")
+        self._zip = zipfile.ZipFile(self._tmp_path, 'w', zipfile.ZIP_DEFLATED)
+        self._media = {}
+        self._defaults = {}
+        self._template_digest = None
+        self._presentation = None
+        self._presentation_rels = None
+        self._content_types = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    @staticmethod
+    def _template_digest_of(deck: zipfile.ZipFile) -> str:
+        digest = hashlib.sha256()
+        for name in sorted(deck.namelist()):
+            if name.startswith(_TEMPLATE_DIRS):
+                digest.update(name.encode())
+                digest.update(deck.read(name))
+        return digest.hexdigest()
+
+    def _copy_template(self, deck: zipfile.ZipFile, content_types: etree._Element):
+        """
+        Copies the parts shared by all passports (master, layouts, theme, properties) and the media they use.
+        """
+        shared = [name for name in deck.namelist() if not name.startswith(_SLIDE_DIRS) and name not in _OWN_PARTS]
+        media = set()
+        for name in shared:
+            if name.endswith(".rels"):
+                part = posixpath.join(posixpath.dirname(posixpath.dirname(name)), posixpath.basename(name)[:-5])
+                for rel in etree.fromstring(deck.read(name)):
+                    if rel.get("Type") == _IMAGE_REL and rel.get("TargetMode") != "External":
+                        media.add(_resolve(part, rel.get("Target")))
+        for name in shared:
+            self._zip.writestr(name, deck.read(name))
+        for name in sorted(media):
+            content = deck.read(name)
+            self._zip.writestr(name, content, compress_type=zipfile.ZIP_STORED)
+            self._media.setdefault(hashlib.sha256(content).hexdigest(), name)
+
+        self._presentation = deck.read("ppt/presentation.xml")
+        self._presentation_rels = deck.read("ppt/_rels/presentation.xml.rels")
+        self._content_types = content_types
+        self._template_digest = self._template_digest_of(deck)
+
+    def _add_media(self, deck: zipfile.ZipFile, name: str, content_types: dict) -> str:
+        """
+        Stores a slide image unless already stored, and gets its part name.
+        """
+        content = deck.read(name)
+        digest = hashlib.sha256(content).hexdigest()
+        if digest not in self._media:
+            ext = posixpath.splitext(name)[1].lstrip(".").lower()
+            part = f"ppt/media/portfolio{len(self._media) + 1}.{ext}"
+            self._defaults.setdefault(ext, content_types.get(ext) or content_types.get("/" + name))
+            # Images are already compressed
+            self._zip.writestr(part, content, compress_type=zipfile.ZIP_STORED)
+            self._media[digest] = part
+        return self._media[digest]
+
+    def add_pptx(self, source) -> int:
+        """
+        Appends the slides of a passport presentation.
+
+        Args:
+            source: Path or bytes of a .pptx file.
+
+        Returns:
+            int: Slides appended.
+
+        Raises:
+            ValueError: If the passport's template differs from the first passport's, or a slide holds parts
+                other than images, layouts and notes.
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        with zipfile.ZipFile(source) as deck:
+            types = etree.fromstring(deck.read("[Content_Types].xml"))
+            content_types = {}
+            for element in types:
+                if element.tag == f"{{{_CONTENT_TYPES}}}Default":
+                    content_types[element.get("Extension").lower()] = element.get("ContentType")
+                else:
+                    content_types[element.get("PartName")] = element.get("ContentType")
+
+            if self._template_digest is None:
+                self._copy_template(deck, types)
+            elif self._template_digest_of(deck) != self._template_digest:
+                raise ValueError("Passports in a portfolio must use the same template")
+
+            presentation = etree.fromstring(deck.read("ppt/presentation.xml"))
+            targets = {rel.get("Id"): rel.get("Target") for rel in etree.fromstring(deck.read("ppt/_rels/presentation.xml.rels"))}
+            slide_ids = presentation.find(f"{{{_P}}}sldIdLst")
+            slides = [_resolve("ppt/presentation.xml", targets[slide_id.get(f"{{{_R}}}id")])
+                      for slide_id in (slide_ids if slide_ids is not None else [])]
+
+            # Check every slide before writing any, so a rejected passport leaves the portfolio unchanged
+            slide_rels = [(slide, etree.fromstring(deck.read(_rels_path(slide)))) for slide in slides]
+            for _, rels in slide_rels:
+                for rel in rels:
+                    if rel.get("TargetMode") != "External" and rel.get("Type") not in (_LAYOUT_REL, _NOTES_REL, _IMAGE_REL):
+                        raise ValueError(f"Unsupported slide relationship: {rel.get('Type')}")
+
+            for slide, rels in slide_rels:
+                self.slides += 1
+                part = f"ppt/slides/slide{self.slides}.xml"
+                for rel in list(rels):
+                    if rel.get("TargetMode") == "External":
+                        continue
+                    if rel.get("Type") == _NOTES_REL:
+                        rels.remove(rel)
+                    elif rel.get("Type") == _IMAGE_REL:
+                        media = self._add_media(deck, _resolve(slide, rel.get("Target")), content_types)
+                        rel.set("Target", posixpath.relpath(media, posixpath.dirname(part)))
+                self._zip.writestr(part, deck.read(slide))
+                self._zip.writestr(_rels_path(part), etree.tostring(rels, xml_declaration=True, encoding="UTF-8", standalone=True))
+        self.passports += 1
+        return len(slides)
+
+    def add(self, entry: Entry) -> int:
+        """
+        Appends the slides of a populated Entry.
+
+        Args:
+            entry (Entry): Populated passport.
+
+        Returns:
+            int: Slides appended.
+        """
+        buffer = io.BytesIO()
+        entry.save(buffer)
+        return self.add_pptx(buffer.getvalue())
+
+    def _write_presentation(self):
+        """
+        Writes the presentation part, its relationships and the content types, listing every appended slide.
+        """
+        rels = etree.fromstring(self._presentation_rels)
+        for rel in list(rels):
+            if rel.get("Type") == _SLIDE_REL:
+                rels.remove(rel)
+        used = {rel.get("Id") for rel in rels}
+        next_id = 1
+        slide_rels = []
+        for i in range(1, self.slides + 1):
+            while f"rId{next_id}" in used:
+                next_id += 1
+            slide_rels.append(f"rId{next_id}")
+            used.add(f"rId{next_id}")
+            etree.SubElement(rels, f"{{{_PKG_RELS}}}Relationship", Id=f"rId{next_id}", Type=_SLIDE_REL, Target=f"slides/slide{i}.xml")
+
+        presentation = etree.fromstring(self._presentation)
+        slide_ids = presentation.find(f"{{{_P}}}sldIdLst")
+        if slide_ids is None:
+            slide_ids = etree.Element(f"{{{_P}}}sldIdLst")
+            presentation.find(f"{{{_P}}}sldMasterIdLst").addnext(slide_ids)
+        slide_ids.clear()
+        for i, rel_id in enumerate(slide_rels):
+            etree.SubElement(slide_ids, f"{{{_P}}}sldId", {"id": str(256 + i), f"{{{_R}}}id": rel_id})
+        # Sections name slide ids of the first passport only
+        for sections in list(presentation.iter("{http://schemas.microsoft.com/office/powerpoint/2010/main}sectionLst")):
+            extension = sections.getparent()
+            extension.getparent().remove(extension)
+
+        # Keep overrides of the parts written; slide overrides are listed anew
+        types = self._content_types
+        written = set(self._zip.namelist()) | set(_OWN_PARTS)
+        for element in list(types):
+            part = element.get("PartName")
+            if part and (part.startswith("/ppt/slides/") or part[1:] not in written):
+                types.remove(element)
+        defaults = {element.get("Extension").lower() for element in types if element.get("Extension")}
+        for ext, content_type in self._defaults.items():
+            if ext not in defaults and content_type:
+                types.insert(0, etree.Element(f"{{{_CONTENT_TYPES}}}Default", Extension=ext, ContentType=content_type))
+        for i in range(1, self.slides + 1):
+            etree.SubElement(types, f"{{{_CONTENT_TYPES}}}Override", PartName=f"/ppt/slides/slide{i}.xml", ContentType=_SLIDE_TYPE)
+
+        def serialize(element):
+            return etree.tostring(element, xml_declaration=True, encoding="UTF-8", standalone=True)
+        self._zip.writestr("ppt/presentation.xml", serialize(presentation))
+        self._zip.writestr("ppt/_rels/presentation.xml.rels", serialize(rels))
+        self._zip.writestr("[Content_Types].xml", serialize(types))
+
+    def close(self) -> str:
+        """
+        Finishes the portfolio and moves it to output_path.
+
+        Returns:
+            str: Output path.
+
+        Raises:
+            ValueError: If no passport was added.
+        """
+        if not self.passports:
+            self.discard()
+            raise ValueError("No passports were added to the portfolio")
+        try:
+            self._write_presentation()
+            self._zip.close()
+            os.replace(self._tmp_path, self.output_path)
+        finally:
+            self._tmp_path.unlink(missing_ok=True)
+        return str(self.output_path)
+
+    def discard(self):
+        """
+        Abandons the portfolio and deletes its temporary file.
+        """
+        self._zip.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build one portfolio deck from saved passport snapshots.")
+    parser.add_argument("output", help="Portfolio .pptx path")
+    parser.add_argument("snapshots", nargs="+", help="Snapshot files (output_<protein>/<protein>_snapshot.bin)")
+    parser.add_argument("--template", default=Path(__file__).parent.parent.parent / "assets" / "template.pptx")
+    parser.add_argument("--user", default="", help="Name written to the slide footers")
+    args = parser.parse_args()
+
+    with PortfolioWriter(args.output) as portfolio:
+        for snapshot in args.snapshots:
+            portfolio.add(Entry.from_snapshot(args.template, snapshot, args.user))
+    print(f"{portfolio.output_path}: {portfolio.passports} passports, {portfolio.slides} slides")
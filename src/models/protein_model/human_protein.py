@@ -1,6 +1,13 @@
+import json
+from pathlib import Path
 from models.protein_model.protein import Protein
 from models.organism import Organism
-import subprocess
+from models.feature_table import FeatureTable
+from models.annotation import Annotation
+from alignment.geneious_runner import GeneiousCall, GeneiousRunner
+from alignment.msa import MultipleAlignment, progressive_align
+from alignment.pairwise import align_pairs
+import numpy as np
 
 class HumanProtein(Protein):
     """
@@ -13,16 +20,23 @@ class HumanProtein(Protein):
         string_id (str): STRING database ID.
         file_name (Path): Path to this protein's directory.
         seq (str): Path to .fasta containing amino acid sequence.
-        annotations (dict): Protein annotations.
+        features_path (str): Path to .npz containing sequence features.
+        features (FeatureTable): Sequence features, loaded from features_path once and kept.
+        annotations (dict): Protein annotations, derived from features once and kept.
         annotations_path (str): Path to .gff containing annotations.
         pred_pdb (str): Path to predicted structure PDB.
         pred_pdb_id (str): AlphaFold ID.
         structure_file (str): Path to PDB file.
-        passport_table_data (dict): Data to fill the info table for protein passport.
+        passport_table_path (str): Path to .json containing passport_table_data.
+        passport_table_data (dict): Data to fill the info table for protein passport, loaded from passport_table_path once and kept.
         fasta (str): FASTA sequence.
+        geneious_runner (GeneiousRunner): Geneious execution layer shared by all human proteins.
     """
+    __slots__ = ("passport_table_path", "_passport_table")
+    _CACHE_SLOTS = Protein._CACHE_SLOTS + ("_passport_table",)
+    geneious_runner = GeneiousRunner()
 
-    def __init__(self, id: str, name: str, seq: str, annotations: str, pred_pdb: str, 
+    def __init__(self, id: str, name: str, seq: str, annotations: FeatureTable, pred_pdb: str, 
                  pred_pdb_content, length: int, mass: float, rec_name: str, target_type: str, 
                  known_activity: str, exp_pattern: str, string_id: str, fasta: str, aliases: list | None = None, exp_pdbs: list | None = None):
         """
@@ -32,7 +46,7 @@ class HumanProtein(Protein):
             id (str): UniProt ID.
             name (str): Name of protein.
             seq (str): Path to .fasta containing amino acid sequence.
-            annotations (str): Protein annotations.
+            annotations (FeatureTable): Protein sequence features.
             pred_pdb (str): Path to predicted structure PDB.
             pred_pdb_content: 3d coordinates of protein.
             length (int): Length of protein (#aa).
@@ -48,7 +62,7 @@ class HumanProtein(Protein):
         """
         super().__init__(id=id, organism=Organism.HUMAN, name=name, seq=seq, annotations=annotations, pred_pdb=pred_pdb, 
                          pred_pdb_content=pred_pdb_content, string_id=string_id, fasta=fasta)
-        self.passport_table_data = {
+        passport_table_data = {
             "rec_name": rec_name,
             "aliases": aliases,
             "gene_id": name,
@@ -59,9 +73,23 @@ class HumanProtein(Protein):
             "known_activity": known_activity,
             "exp_pattern": exp_pattern
         }
+        self._passport_table = None
+        passport_table_path = self.file_name / f"{self.id}_passport.json"
+        self.passport_table_path = self.artifact_writer.write_text(passport_table_path, json.dumps(passport_table_data), mode=0o444)
+
+    @property
+    def passport_table_data(self) -> dict:
+        """
+        Data to fill the info table for protein passport, read from its .json file on first access.
+        """
+        if self._passport_table is None:
+            self.artifact_writer.wait(self.passport_table_path)
+            with open(self.passport_table_path) as fh:
+                self._passport_table = json.load(fh)
+        return self._passport_table
     
     @classmethod
-    def from_uniprot_result(cls, protein_name, uniprot_results, af_results, annotations_text, fasta):
+    def from_uniprot_result(cls, protein_name, uniprot_results, af_results, features, fasta):
         id=uniprot_results['primaryAccession']
         name=protein_name
         seq=uniprot_results['sequence']['value']
@@ -108,32 +136,145 @@ class HumanProtein(Protein):
                    pred_pdb=pred_pdb,
                    pred_pdb_content=pred_pdb_content,
                    seq=seq,
-                   annotations=annotations_text,
+                   annotations=features,
                    known_activity=function,
                    exp_pattern=tissue_specificity,
                    string_id=string_id,
                    fasta=fasta)
     
-    def annotate_align_seq_geneious(self, proteins: list):
+    def align_sequences(self, proteins: list, backend: str = "native") -> MultipleAlignment | list:
+        """
+        Aligns the given proteins against this HumanProtein with the chosen backend.
+
+        Args:
+            proteins (list): Proteins to be aligned against this HumanProtein.
+            backend (str): "native" for the built-in progressive aligner, or "geneious" for GeneiousPrime.
+
+        Returns:
+            MultipleAlignment | list: The alignment for the native backend, GeneiousResults for Geneious.
+        """
+        if backend == "geneious":
+            return self.annotate_align_seq_geneious(proteins)
+        return self.align_seq_native(proteins)
+
+    def align_seq_native(self, proteins: list) -> MultipleAlignment:
+        """
+        Aligns the given proteins against this HumanProtein with the built-in progressive aligner. 
+        Creates alignment.fasta, alignment.aln (Clustal) and alignment_conservation.npy (per-column conservation).
+
+        Args:
+            proteins (list): Proteins to be aligned against this HumanProtein.
+
+        Returns:
+            MultipleAlignment: The alignment.
+        """
+        sequences = {f"{p.organism.name}_{p.id}": p.sequence for p in [self, *proteins]}
+        alignment = progressive_align(sequences)
+
+        output_dir = self.file_name.parent
+        alignment.to_fasta(output_dir / "alignment.fasta")
+        alignment.to_clustal(output_dir / "alignment.aln")
+        np.save(output_dir / "alignment_conservation.npy", alignment.conservation)
+        return alignment
+
+    def geneious_calls(self, proteins: list) -> list:
+        """
+        Gets the Geneious invocations that annotate this HumanProtein and align the given proteins against it.
+
+        Args:
+            proteins (list): Proteins to be aligned against this HumanProtein.
+
+        Returns:
+            list: GeneiousCalls, in dependency order.
+        """
+        self.artifact_writer.flush()
+        seq_output_file = self.file_name.parent / "annotated_seq_human.geneious"
+        align_output_file = self.file_name.parent / "alignment.geneious"
+        protein_seq_paths = [p.file_name / f"{p.organism.name}_{p.id}_seq.fasta" for p in proteins]
+
+        annotate_call = GeneiousCall(inputs=(self.seq, self.annotations_path), output=str(seq_output_file))
+        align_call = GeneiousCall(inputs=(str(seq_output_file), *map(str, protein_seq_paths)), 
+                                  output=str(align_output_file), 
+                                  operation="muscle_alignment")
+        return [annotate_call, align_call]
+
+    def annotate_align_seq_geneious(self, proteins: list) -> list:
         """
         Annotates and aligns the given proteins against this HumanProtein using GeneiousPrime. 
         Creates output .geneious files containing annotations and alignment.
 
         Args:
             proteins (list): Proteins to be annotated and aligned against this HumanProtein.
+
+        Returns:
+            list: GeneiousResults (exit code, output and timing) of the invocations that ran.
         """
-        seq_output_file = self.file_name.parent / "annotated_seq_human.geneious"
-        align_output_file = self.file_name.parent / "alignment.geneious"
+        return self.geneious_runner.submit_chain(self.geneious_calls(proteins)).result()
 
-        annotate_command = ["geneious", "-i", self.seq, self.annotations_path, "-o", str(seq_output_file)]
-        subprocess.run(annotate_command, capture_output=True, text=True)
+    @classmethod
+    def geneious_batch_calls(cls, jobs: list, output_file: Path) -> tuple:
+        """
+        Gets the Geneious invocations for several passports: one call annotating every human protein together,
+        and one alignment per passport. Alignments read the human sequence with its .gff annotations directly,
+        so they do not wait on the annotation call, and a batch of N passports takes N + 1 calls instead of 2N.
 
-        protein_seq_paths = [p.file_name / f"{p.organism.name}_{p.id}_seq.fasta" for p in proteins]
+        Args:
+            jobs (list): (HumanProtein, proteins to align against it) pairs.
+            output_file (Path): Output .geneious file of the annotated human sequences.
 
-        align_command = ["geneious", "-i", str(seq_output_file), 
-                         *map(str, protein_seq_paths), "-o", str(align_output_file),
-                         "--operation", "muscle_alignment"]
-        subprocess.run(align_command, capture_output=True, text=True)
+        Returns:
+            tuple: The annotation GeneiousCall, and the alignment GeneiousCalls in job order.
+        """
+        cls.artifact_writer.flush()
+        annotate_inputs = tuple(path for human, _ in jobs for path in (human.seq, human.annotations_path))
+        annotate_call = GeneiousCall(inputs=annotate_inputs, output=str(output_file))
+        align_calls = []
+        for human, proteins in jobs:
+            protein_seq_paths = [p.file_name / f"{p.organism.name}_{p.id}_seq.fasta" for p in proteins]
+            align_calls.append(GeneiousCall(inputs=(human.seq, human.annotations_path, *map(str, protein_seq_paths)),
+                                            output=str(human.file_name.parent / "alignment.geneious"),
+                                            operation="muscle_alignment"))
+        return annotate_call, align_calls
 
-        
+    @classmethod
+    def annotate_align_seq_geneious_batch(cls, jobs: list, output_file: Path | None = None) -> list:
+        """
+        Annotates and aligns several passports with GeneiousPrime in N + 1 calls, run in parallel.
+
+        Args:
+            jobs (list): (HumanProtein, proteins to align against it) pairs.
+            output_file (Path): Output .geneious file of the annotated human sequences.
+                Defaults to annotated_seq_human_batch.geneious next to the passports' output directories.
+
+        Returns:
+            list: Lists of GeneiousResults (the shared annotation call, then the passport's alignment), in job order.
+        """
+        if not jobs:
+            return []
+        if output_file is None:
+            output_file = jobs[0][0].file_name.parent.parent / "annotated_seq_human_batch.geneious"
+        annotate_call, align_calls = cls.geneious_batch_calls(jobs, output_file)
+        annotate_results, *align_results = cls.geneious_runner.run_batch([[annotate_call], *[[call] for call in align_calls]])
+        return [annotate_results + results for results in align_results]
+
+    def compute_similarity(self, orthologs: list):
+        """
+        Computes % identity and % similarity of the given orthologs to this HumanProtein from global BLOSUM62 alignments, 
+        run in parallel. Extracellular domains are compared when both proteins have one annotated, otherwise full sequences.
+
+        Args:
+            orthologs (list): Orthologs to compare against this HumanProtein.
+        """
+        human_ecd = self.region_sequence(Annotation.ECD)
+        human_sequence = self.sequence
+        pairs = []
+        for ortholog in orthologs:
+            ortholog_ecd = ortholog.region_sequence(Annotation.ECD)
+            if human_ecd and ortholog_ecd:
+                pairs.append((human_ecd, ortholog_ecd))
+            else:
+                pairs.append((human_sequence, ortholog.sequence))
 
+        for ortholog, alignment in zip(orthologs, align_pairs(pairs)):
+            ortholog.set_identity(alignment.identity)
+            ortholog.set_similarity(alignment.similarity)
@@ -1,5 +1,6 @@
 from models.protein_model.protein import Protein
 from models.organism import Organism
+from models.feature_table import FeatureTable
 
 class Ortholog(Protein):
     """
@@ -12,17 +13,22 @@ class Ortholog(Protein):
         string_id (str): STRING database ID.
         file_name (Path): Path to this protein's directory.
         seq (str): Path to .fasta containing amino acid sequence.
-        annotations (dict): Protein annotations.
+        features_path (str): Path to .npz containing sequence features.
+        features (FeatureTable): Sequence features, loaded from features_path once and kept.
+        annotations (dict): Protein annotations, derived from features once and kept.
         annotations_path (str): Path to .gff containing annotations.
         pred_pdb (str): Path to predicted structure PDB.
         pred_pdb_id (str): AlphaFold ID.
         structure_file (str): Path to PDB file.
+        identity (float): % identity to human protein.
         similarity (float): % similarity to human protein.
         rmsd (float): RMSD of against human protein.
+        aligned_ranges (list): Residue ranges used in the structural alignment against human protein.
         fasta (str): FASTA sequence.
     """
+    __slots__ = ("identity", "similarity", "rmsd")
 
-    def __init__(self, id: str, organism: Organism, name: str, seq: str, annotations: str, pred_pdb: str, 
+    def __init__(self, id: str, organism: Organism, name: str, seq: str, annotations: FeatureTable, pred_pdb: str, 
                  pred_pdb_content, string_id: str, fasta: str):
         """
         Constructor for Ortholog.
@@ -32,7 +38,7 @@ class Ortholog(Protein):
             organism (Organism): Organism of protein.
             name (str): Name of protein.
             seq (str): Path to .fasta containing amino acid sequence.
-            annotations (str): Protein annotations.
+            annotations (FeatureTable): Protein sequence features.
             pred_pdb (str): Path to predicted structure PDB.
             pred_pdb_content: 3d coordinates of protein.
             string_id (str): STRING database ID.
@@ -40,10 +46,12 @@ class Ortholog(Protein):
         """
         super().__init__(id=id, organism=organism, name=name, seq=seq, annotations=annotations, pred_pdb=pred_pdb, 
                          pred_pdb_content=pred_pdb_content, string_id=string_id, fasta=fasta)
+        self.identity = None
         self.similarity = None
+        self.rmsd = None
     
     @classmethod
-    def from_uniprot_result(cls, protein_name, uniprot_results, af_results, annotations_text, organism, fasta):
+    def from_uniprot_result(cls, protein_name, uniprot_results, af_results, features, organism, fasta):
         id=uniprot_results['primaryAccession']
         name=protein_name
         seq=uniprot_results['sequence']['value']
@@ -60,7 +68,7 @@ class Ortholog(Protein):
                    pred_pdb=pred_pdb,
                    pred_pdb_content=pred_pdb_content,
                    seq=seq,
-                   annotations=annotations_text,
+                   annotations=features,
                    string_id=string_id,
                    fasta=fasta)
         
@@ -78,6 +86,15 @@ class Ortholog(Protein):
                    string_id=None,
                    fasta=fasta)
     
+    def set_identity(self, identity: float):
+        '''
+        Sets identity field.
+
+        Args:
+            identity (float): the identity value to set to.
+        '''
+        self.identity = identity
+
     def set_similarity(self, similarity: float):
         '''
         Sets similarity field.
@@ -94,4 +111,13 @@ class Ortholog(Protein):
         Args:
             rmsd (float): the RMSD value to set to.
         '''
-        self.rmsd = rmsd
\ No newline at end of file
+        self.rmsd = rmsd
+    
+    def set_aligned_ranges(self, aligned_ranges: list):
+        '''
+        Sets aligned_ranges field.
+
+        Args:
+            aligned_ranges (list): the (start, end) residue ranges used in the structural alignment.
+        '''
+        self.aligned_ranges = aligned_ranges
\ No newline at end of file
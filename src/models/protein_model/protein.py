@@ -1,14 +1,26 @@
-from collections import defaultdict
 from pathlib import Path
 from abc import ABC
 from models.organism import Organism
 from models.annotation import Annotation
+from models.feature_table import FeatureTable
 from pymol import cmd
-from utils.file_utils import ensure_directory, safe_write_text, safe_write_bytes
+from rendering.render_cache import RenderCache
+from rendering.render_job import RenderJob
+from rendering.render_pool import RenderPool
+from rendering.render_profile import RenderProfile
+from rendering.residue_colors import ResidueColors
+from structure.comparison import compare_structures
+from structure.confidence import confident_segments, ranges_selection, residue_plddt
+from structure.coordinates import load_coordinates
+from utils.artifact_store import ArtifactStore
+from utils.artifact_writer import ArtifactWriter
+from utils.file_utils import ensure_directory
+from utils.shared_resource import SharedResource
 
 class Protein(ABC):
     """
     Represents an abstract Protein object with sequence and structure information.
+    Only paths and small scalars are held; the sequence, features and structure are read from disk on access.
 
     Attributes:
         id (str): UniProt ID.
@@ -17,15 +29,27 @@ class Protein(ABC):
         string_id (str): STRING database ID.
         file_name (Path): Path to this protein's directory.
         seq (str): Path to .fasta containing amino acid sequence.
-        annotations (dict): Protein annotations.
+        features_path (str): Path to .npz containing sequence features.
+        features (FeatureTable): Sequence features, loaded from features_path once and kept.
+        annotations (dict): Protein annotations, derived from features once and kept.
         annotations_path (str): Path to .gff containing annotations.
         pred_pdb (str): Path to predicted structure PDB.
         pred_pdb_id (str): AlphaFold ID.
         structure_file (str): Path to PDB file.
         fasta (str): FASTA sequence.
+        aligned_ranges (list): Residue ranges of this Protein used in its last structural alignment.
+        render_pool (RenderPool): Worker pool shared by all proteins for rendering structure images, created on first use.
+        artifact_writer (ArtifactWriter): Write-behind writer shared by all proteins for their output files,
+            which are deduplicated through a content-addressed store. Created on first use.
     """
+    __slots__ = ("id", "organism", "name", "string_id", "file_name", "seq", "features_path", "_annotations_path",
+                 "pred_pdb", "pred_pdb_id", "from_ncbi", "aligned_ranges", "_sequence", "_features", "_annotations")
+    # In-memory copies of file contents, left out of state
+    _CACHE_SLOTS = ("_sequence", "_features", "_annotations")
+    render_pool = SharedResource(lambda: RenderPool(cache=RenderCache(Path(__file__).parent.parent.parent.parent / ".render_cache")))
+    artifact_writer = SharedResource(lambda: ArtifactWriter(store=ArtifactStore(Path(__file__).parent.parent.parent.parent / ".artifact_store")))
 
-    def __init__(self, id: str, organism: Organism, name: str, seq: str, annotations: str, pred_pdb: str, pred_pdb_content, string_id: str, fasta: str):
+    def __init__(self, id: str, organism: Organism, name: str, seq: str, annotations: FeatureTable, pred_pdb: str, pred_pdb_content, string_id: str, fasta: str):
         """
         Constructor for Protein.
 
@@ -34,7 +58,7 @@ class Protein(ABC):
             organism (Organism): Organism of protein.
             name (str): Name of protein.
             seq (str): Path to .fasta containing amino acid sequence.
-            annotations (str): Protein annotations.
+            annotations (FeatureTable): Protein sequence features.
             pred_pdb (str): Path to predicted structure PDB.
             pred_pdb_content: 3d coordinates of protein.
             string_id (str): STRING database ID.
@@ -44,66 +68,160 @@ class Protein(ABC):
         self.organism = organism
         self.name = name
         self.string_id = string_id
+        self.aligned_ranges = None
 
         project_root = Path(__file__).parent.parent.parent.parent
         self.file_name = project_root / f"output_{name}" / f"{self.organism.name.lower()}_{self.name}"
-        ensure_directory(self.file_name)
 
         self._set_save_seq(fasta)
         self._set_save_annotations(annotations)
         self._set_save_af_pdb(pred_pdb, pred_pdb_content)
     
-    def annotate_3d_structure(self) -> str:
+    def state(self) -> dict:
+        """
+        Gets the slot values of this Protein, e.g. to snapshot it. Files are referenced by path, not copied.
+
+        Returns:
+            dict: Slot name to value, over this Protein's class and its bases, without cached file contents.
+        """
+        return {slot: getattr(self, slot, None) for klass in type(self).__mro__ for slot in getattr(klass, '__slots__', ())
+                if slot not in self._CACHE_SLOTS}
+
+    @classmethod
+    def from_state(cls, state: dict):
+        """
+        Recreates a Protein from state without writing any files.
+
+        Args:
+            state (dict): Slot values, as returned by state.
+
+        Returns:
+            Protein: The recreated Protein.
+        """
+        protein = cls.__new__(cls)
+        for slot in cls._CACHE_SLOTS:
+            setattr(protein, slot, None)
+        for slot, value in state.items():
+            setattr(protein, slot, value)
+        return protein
+
+    @property
+    def sequence(self) -> str:
+        """
+        Amino acid sequence of this Protein, read from its .fasta file on first access.
+        """
+        if self._sequence is None:
+            self.artifact_writer.wait(self.seq)
+            with open(self.seq) as fh:
+                self._sequence = "".join(line.strip() for line in fh if not line.startswith(">"))
+        return self._sequence
+
+    def region_sequence(self, annotation: Annotation) -> str | None:
+        """
+        Gets the part of this Protein's sequence spanned by the given annotation's ranges.
+
+        Args:
+            annotation (Annotation): Annotation type, e.g. Annotation.ECD.
+
+        Returns:
+            str: Subsequence from the first annotated start to the last annotated end, or None if not annotated.
+        """
+        ranges = self.annotations.get(annotation)
+        if not ranges:
+            return None
+        merged = FeatureTable.merge(ranges)
+        return self.sequence[merged[0][0] - 1:merged[-1][1]]
+
+    def coordinates(self):
+        """
+        Gets the atoms of this Protein's predicted structure from its memory-mapped coordinate cache.
+
+        Returns:
+            np.ndarray: Atoms with residue number, atom name, coordinates and B-factor (pLDDT) fields.
+        """
+        self.artifact_writer.wait(self.pred_pdb)
+        return load_coordinates(self.pred_pdb)
+
+    def residue_colors(self) -> ResidueColors:
+        """
+        Gets the per-residue annotation colors of this Protein, shared by the annotated structure and alignment images.
+
+        Returns:
+            ResidueColors: Per-residue colors, with overlaps resolved by annotation priority.
+        """
+        return ResidueColors.from_annotations(self.annotations, len(self.sequence))
+
+    def annotate_3d_structure(self, profile: RenderProfile = RenderProfile.SLIDE, size_inches: float | None = None) -> str:
         """
         Annotates 3d structure of this Protein using Pymol and takes snapshot.
 
+        Args:
+            profile (RenderProfile): Render quality tier.
+            size_inches (float): Long edge of the slide slot the snapshot fills, e.g. from Entry.slot_sizes.
+                Without it, the full-resolution width is used.
+
         Returns:
             str: Path to snapshot of annotated 3d structure.
         """
-        cmd.load(self.pred_pdb)
-
-        for annotation, idxs in self.annotations.items():
-            for (start, end) in idxs:
-                cmd.color(annotation.color, f"resi {start}-{end}")
-        
-        cmd.orient()
+        self.artifact_writer.flush()
         png_path = self.file_name / f"{self.name}_structure_ss.png"
         pse_path = self.file_name / f"{self.name}_annotated_structure.pse"
-        cmd.png(str(png_path), width=2000, ray=1)
-        cmd.save(str(pse_path))
-        cmd.delete("all")
-        return str(png_path)
+        job = RenderJob(objects=((self.pred_pdb_id, self.pred_pdb),), 
+                        png_path=str(png_path), 
+                        residue_colors=((self.pred_pdb_id, self.residue_colors().runs()),), 
+                        settings=profile.settings, 
+                        view="orient", 
+                        width=profile.image_width(size_inches, default=2000), 
+                        ray=profile.ray, 
+                        pse_path=str(pse_path))
+        return self.render_pool.submit(job).result()
     
-    def structure_align(self, mobile_proteins) -> dict:
+    def structure_align(self, mobile_proteins, profile: RenderProfile = RenderProfile.SLIDE, size_inches: float | None = None, 
+                        plddt_threshold: float = 70.0) -> dict:
         """
         Aligns 3d structure of given protein against this Protein. Prioritizes aligning domains of interest with corresponding annotations. 
-        If none exist, aligns according to this Protein's annotations.
+        If none exist, aligns according to this Protein's annotations. 
+        Only confidently predicted segments (pLDDT >= plddt_threshold) inside those ranges are aligned.
 
         Args:
             mobile_proteins (list): the mobile proteins to align.
+            profile (RenderProfile): Render quality tier of the alignment images.
+            size_inches (float): Long edge of the slide slot each alignment image fills, e.g. from Entry.slot_sizes.
+                Without it, the full-resolution width is used.
+            plddt_threshold (float): Minimum pLDDT of aligned residues.
 
         Returns:
-            dict: calculated RMSDs after alignment.
+            dict: image path, calculated RMSD and aligned residue ranges of each mobile protein.
         """
+        self.artifact_writer.flush()
         pse_path = self.file_name.parent / "alignments.pse"
         target_path = self.pred_pdb
         target = self.organism.name + "_" + self.id
-        (target_start, target_end) = (1, self.passport_table_data['length'])
+        length = self.passport_table_data['length']
+        annotations = self.annotations
+        (target_start, target_end) = (1, length)
             
-        if (self.annotations.get(Annotation.ECD) or self.annotations.get(Annotation.CHAIN)):
-            (target_start, target_end) = (self.passport_table_data['length'], 1)
-            for (start, end) in (self.annotations.get(Annotation.ECD) or self.annotations.get(Annotation.CHAIN)):
-                target_start = min(target_start, int(start))
-                target_end = max(target_end, int(end))
+        if (annotations.get(Annotation.ECD) or annotations.get(Annotation.CHAIN)):
+            merged = FeatureTable.merge(annotations.get(Annotation.ECD) or annotations.get(Annotation.CHAIN))
+            (target_start, target_end) = (merged[0][0], merged[-1][1])
+
+        target_ranges = confident_segments(*residue_plddt(self.coordinates()), target_start, target_end, threshold=plddt_threshold)
+        self.aligned_ranges = target_ranges
+        target_runs = self.residue_colors().runs()
 
         cmd.load(target_path, target)
 
-        cmd.select(f"{target}_sele", f"{target} and resi {target_start}-{target_end}")
+        cmd.select(f"{target}_sele", f"{target} and {ranges_selection(target_ranges)}")
         cmd.create(f"{target}_chain", f"{target}_sele")
         cmd.delete(f"{target}_sele")
         cmd.delete(f"{target}")
 
-        rmsd_dict = {}
+        images_dir = self.file_name.parent / "structure_alignment_images"
+        ensure_directory(images_dir)
+        target_chain_path = images_dir / f"{target}_chain.pdb"
+        cmd.save(str(target_chain_path), f"{target}_chain")
+
+        futures = {}
 
         for mobile_protein in mobile_proteins:
             if mobile_protein.from_ncbi:
@@ -115,18 +233,22 @@ class Protein(ABC):
             (mobile_start, mobile_end) = (target_start, target_end)
             
             '''
-            if (mobile_protein.annotations.get(Annotation.CHAIN)):
-                (mobile_start, mobile_end) = mobile_protein.annotations.get(Annotation.CHAIN)[0]
-                if mobile_end == self.passport_table_data['length']:
+            if (mobile_annotations.get(Annotation.CHAIN)):
+                (mobile_start, mobile_end) = mobile_annotations.get(Annotation.CHAIN)[0]
+                if mobile_end == length:
                     mobile_end = target_end
             '''
             
-            if (mobile_protein.annotations.get(Annotation.ECD)):
-                (mobile_start, mobile_end) = mobile_protein.annotations.get(Annotation.ECD)[0]
-                if mobile_end == self.passport_table_data['length']:
+            mobile_annotations = mobile_protein.annotations
+            if (mobile_annotations.get(Annotation.ECD)):
+                (mobile_start, mobile_end) = mobile_annotations.get(Annotation.ECD)[0]
+                if mobile_end == length:
                     mobile_end = target_end
 
-            cmd.select(f"{mobile}_sele", f"{mobile} and resi {mobile_start}-{mobile_end}")
+            mobile_ranges = confident_segments(*residue_plddt(mobile_protein.coordinates()), mobile_start, mobile_end, threshold=plddt_threshold)
+            mobile_protein.set_aligned_ranges(mobile_ranges)
+
+            cmd.select(f"{mobile}_sele", f"{mobile} and {ranges_selection(mobile_ranges)}")
             cmd.create(f"{mobile}_chain", f"{mobile}_sele")
             cmd.delete(f"{mobile}_sele")
             cmd.delete(f"{mobile}")
@@ -134,21 +256,52 @@ class Protein(ABC):
             result = cmd.align(f"polymer and name CA and {mobile}_chain", f"polymer and name CA and {target}_chain")
             mobile_protein.set_rmsd(round(result[0], 2))
 
-            png_path = self.file_name.parent / "structure_alignment_images" / f"{mobile}_human_aligned_ss.png"
-            ensure_directory(png_path.parent)
-            
-            cmd.disable("all")
-            cmd.enable(mobile)
-            cmd.enable(target)
-            cmd.color("green", target)
-            cmd.zoom()
-            cmd.png(str(png_path), width=3000, ray=1)
-            cmd.save(str(pse_path))
-
-            rmsd_dict[mobile_protein] = (str(png_path), round(result[0], 2))
+            # Save the superposed chain so the image can be rendered in a worker process
+            mobile_chain_path = images_dir / f"{mobile}_chain_aligned.pdb"
+            cmd.save(str(mobile_chain_path), f"{mobile}_chain")
+
+            png_path = images_dir / f"{mobile}_human_aligned_ss.png"
+            job = RenderJob(objects=((f"{target}_chain", str(target_chain_path)), 
+                                     (f"{mobile}_chain", str(mobile_chain_path))), 
+                            png_path=str(png_path), 
+                            colors=(("green", f"{target}_chain"),), 
+                            residue_colors=((f"{target}_chain", target_runs),), 
+                            settings=profile.settings, 
+                            view="zoom", 
+                            width=profile.image_width(size_inches, default=3000), 
+                            ray=profile.ray)
+            futures[mobile_protein] = self.render_pool.submit(job)
+
+        cmd.save(str(pse_path))
+
+        rmsd_dict = {}
+        for mobile_protein, future in futures.items():
+            rmsd_dict[mobile_protein] = (future.result(), mobile_protein.rmsd, mobile_protein.aligned_ranges)
         
         return rmsd_dict
 
+    def structure_matrix(self, proteins) -> tuple:
+        """
+        Compares the 3d structures of this Protein and the given proteins all-vs-all. 
+        Saves the RMSD and TM-score matrices as a table and a heatmap image.
+
+        Args:
+            proteins (list): the proteins to compare alongside this Protein.
+
+        Returns:
+            tuple: Paths to the matrix table (.csv) and heatmap (.png).
+        """
+        self.artifact_writer.flush()
+        structures = {self.organism.name: self.pred_pdb}
+        for protein in proteins:
+            if not protein.from_ncbi:
+                structures[protein.organism.name] = protein.pred_pdb
+
+        matrix = compare_structures(structures)
+        csv_path = matrix.to_csv(self.file_name.parent / "structure_matrix.csv")
+        png_path = matrix.to_heatmap(self.file_name.parent / "structure_matrix.png")
+        return csv_path, png_path
+
     def _set_save_seq(self, seq):
         '''
         Saves sequence to .fasta file and sets seq field to the path of the file.
@@ -157,51 +310,57 @@ class Protein(ABC):
             seq (str): Sequence.
         '''
         seq_path = self.file_name / f"{self.organism.name}_{self.id}_seq.fasta"
-        safe_write_text(seq_path, seq)
-        self.seq = str(seq_path)
+        self.seq = self.artifact_writer.write_text(seq_path, seq, mode=0o444)
+        self._sequence = None
 
-    def _set_save_annotations(self, annotations):
+    def _set_save_annotations(self, features: FeatureTable | None):
         '''
-        Saves annotations to .gff file and sets annotations_path and annotations field.
+        Saves features to .npz file and sets features_path field. The .gff file is only written when annotations_path is first used.
 
         Args:
-            annotations (str): Annotations.
+            features (FeatureTable): Sequence features.
         '''
-        if not annotations:
-            self.annotations = {}
-            return
-        
-        gff_text = annotations.splitlines()
+        features = features if features is not None else FeatureTable.from_rows([])
+        self.features_path = self.artifact_writer.write_bytes(self.file_name / f"{self.id}_features.npz", features.to_bytes(), mode=0o444)
+        self._annotations_path = None
+        self._features = features
+        self._annotations = None
+
+    @property
+    def features(self) -> FeatureTable:
+        '''
+        Sequence features of this Protein, read from its .npz file on first access.
+        '''
+        if self._features is None:
+            self.artifact_writer.wait(self.features_path)
+            self._features = FeatureTable.load(self.features_path)
+        return self._features
 
-        annotations_dict = defaultdict(list)
-        renamed = []
+    @property
+    def annotations(self) -> dict:
+        '''
+        Annotation ranges of this Protein, derived from its features on first access.
+        '''
+        if self._annotations is None:
+            self._annotations = self.features.annotation_ranges()
+        return self._annotations
 
-        for line in gff_text:
-            if line.startswith("#"):
-                renamed.append(line)
-                continue
-            parts = line.split("\t")
-            if len(parts) < 9:
-                continue
-            feature_type = parts[2]
-            attributes = parts[8]
-            
-            for annotation in Annotation:
-                if feature_type == annotation.feature and (annotation.attr is None or annotation.attr in attributes):
-                    parts[2] = annotation.name
-                    annotations_dict[annotation].append((parts[3], parts[4]))
-                    renamed.append("\t".join(parts))
-                    break
-        gff_path = self.file_name / f"{self.id}_annotations.gff"
-        safe_write_text(gff_path, "\n".join(renamed))
-        self.annotations_path = str(gff_path)
-        if Annotation.ECD in annotations_dict:
-            annotations_dict.pop(Annotation.SIGNAL, None)
-            annotations_dict.pop(Annotation.CHAIN, None)
-        self.annotations = annotations_dict
+    @property
+    def annotations_path(self) -> str:
+        '''
+        Path to .gff containing annotations, written on first access for external tools.
+        '''
+        if self._annotations_path is None:
+            gff_path = self.file_name / f"{self.id}_annotations.gff"
+            self.artifact_writer.write_text(gff_path, self.features.to_gff(self.id), mode=0o444)
+            self.artifact_writer.wait(gff_path)
+            self._annotations_path = str(gff_path)
+        return self._annotations_path
 
     def _set_save_af_pdb(self, pdb_name, pdb_content):
         if not pdb_name:
+            self.pred_pdb_id = None
+            self.pred_pdb = None
             self.from_ncbi = True
             return
         '''
@@ -212,9 +371,8 @@ class Protein(ABC):
             pdb_content: 3d coordinates of protein.
         '''
         pdb_path = self.file_name / pdb_name
-        safe_write_bytes(pdb_path, pdb_content)
         self.pred_pdb_id = pdb_name[:-4]
-        self.pred_pdb = str(pdb_path)
+        self.pred_pdb = self.artifact_writer.write_bytes(pdb_path, pdb_content, mode=0o444)
         self.from_ncbi = False
 
     
\ No newline at end of file
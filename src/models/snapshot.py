@@ -0,0 +1,157 @@
+import json
+import os
+import struct
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+from models.organism import Organism, CustomOrganism
+from models.protein_model.human_protein import HumanProtein
+from models.protein_model.ortholog import Ortholog
+from utils.file_utils import ensure_directory
+
+SNAPSHOT_VERSION = 1
+
+# File layout: magic, big-endian schema version, then the zlib-compressed JSON payload
+_MAGIC = b"PPSNAP"
+_HEADER = struct.Struct(">6sH")
+_PROTEIN_TYPES = {cls.__name__: cls for cls in (HumanProtein, Ortholog)}
+
+
+def _encode_organism(organism):
+    if isinstance(organism, CustomOrganism):
+        return list(organism.value)
+    return organism.name
+
+
+def _decode_organism(value):
+    if isinstance(value, list):
+        return CustomOrganism(value[0], value[1])
+    return Organism[value]
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not snapshot serializable")
+
+
+def _encode_protein(protein) -> dict:
+    state = protein.state()
+    state['organism'] = _encode_organism(state['organism'])
+    return {'type': type(protein).__name__, 'state': state}
+
+
+def _decode_protein(value: dict):
+    state = value['state']
+    state['organism'] = _decode_organism(state['organism'])
+    state['file_name'] = Path(state['file_name'])
+    if state.get('aligned_ranges') is not None:
+        state['aligned_ranges'] = [tuple(r) for r in state['aligned_ranges']]
+    return _PROTEIN_TYPES[value['type']].from_state(state)
+
+
+@dataclass
+class Snapshot:
+    """
+    Represents the resolved state of a passport run: the fetched protein information, the protein models and
+    the images placed on the deck. A saved snapshot rebuilds the deck without network requests.
+
+    Models are stored by their slot values; their sequence, feature and structure files stay in the output directory.
+
+    Attributes:
+        protein_name (str): Protein name.
+        protein_id (str): Human UniProt accession.
+        protein_information (dict): Organism to UniProtKB entry, ('ncbi', fasta) or None, as resolved by Driver.
+        proteins (dict): Organism to Protein.
+        images (dict): 'structure' (path, caption), 'alignments' list of (path, caption), 'string_network' path
+            and 'structure_matrix' table and heatmap paths.
+    """
+    protein_name: str
+    protein_id: str
+    protein_information: dict
+    proteins: dict
+    images: dict = field(default_factory=dict)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes this snapshot.
+
+        Returns:
+            bytes: Versioned snapshot, readable with from_bytes.
+        """
+        payload = {
+            'protein_name': self.protein_name,
+            'protein_id': self.protein_id,
+            'protein_information': [[_encode_organism(o), data] for o, data in self.protein_information.items()],
+            'proteins': [[_encode_organism(o), _encode_protein(p)] for o, p in self.proteins.items()],
+            'images': self.images,
+        }
+        body = zlib.compress(json.dumps(payload, default=_default, separators=(",", ":")).encode('utf-8'))
+        return _HEADER.pack(_MAGIC, SNAPSHOT_VERSION) + body
+
+    @classmethod
+    def from_bytes(cls, content: bytes) -> "Snapshot":
+        """
+        Deserializes a snapshot.
+
+        Args:
+            content (bytes): Snapshot, as returned by to_bytes.
+
+        Returns:
+            Snapshot: The snapshot.
+
+        Raises:
+            ValueError: If content is not a snapshot or was written with another schema version.
+        """
+        if len(content) < _HEADER.size:
+            raise ValueError("Not a passport snapshot")
+        magic, version = _HEADER.unpack_from(content)
+        if magic != _MAGIC:
+            raise ValueError("Not a passport snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Snapshot schema version {version} is not supported (expected {SNAPSHOT_VERSION})")
+
+        payload = json.loads(zlib.decompress(content[_HEADER.size:]))
+        images = payload['images']
+        if images.get('structure'):
+            images['structure'] = tuple(images['structure'])
+        images['alignments'] = [tuple(image) for image in images.get('alignments', [])]
+        return cls(protein_name=payload['protein_name'],
+                   protein_id=payload['protein_id'],
+                   protein_information={_decode_organism(o): data for o, data in payload['protein_information']},
+                   proteins={_decode_organism(o): _decode_protein(p) for o, p in payload['proteins']},
+                   images=images)
+
+    def save(self, path: Path) -> str:
+        """
+        Saves this snapshot, atomically replacing any existing file.
+
+        Args:
+            path (Path): Output path.
+
+        Returns:
+            str: Output path.
+        """
+        path = Path(path)
+        ensure_directory(path.parent)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        tmp_path.write_bytes(self.to_bytes())
+        os.replace(tmp_path, path)
+        return str(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "Snapshot":
+        """
+        Loads a snapshot saved with save.
+
+        Args:
+            path (Path): Snapshot path.
+
+        Returns:
+            Snapshot: The saved snapshot.
+        """
+        return cls.from_bytes(Path(path).read_bytes())
@@ -0,0 +1,84 @@
+from alignment.pairwise import align_pairs
+
+class CandidateRanker():
+    """
+    Represents an automatic ranker of ortholog candidates for a human protein.
+    Each candidate is scored from its alignment to the human sequence, how completely its entry is annotated,
+    and whether it is reviewed (Swiss-Prot).
+
+    Attributes:
+        weights (tuple): Weights of identity, annotation completeness and reviewed status; they sum to 1.
+        margin (float): Minimum score lead of the top candidate over the runner-up to accept it without asking.
+    """
+    def __init__(self, weights: tuple = (0.7, 0.15, 0.15), margin: float = 0.05):
+        """
+        Constructor for CandidateRanker.
+
+        Args:
+            weights (tuple): Weights of identity, annotation completeness and reviewed status.
+            margin (float): Minimum score lead of a clear winner.
+        """
+        self.weights = weights
+        self.margin = margin
+
+    @staticmethod
+    def completeness(entry: dict) -> float:
+        """
+        Gets the fraction of annotation fields present in a UniProtKB entry.
+
+        Args:
+            entry (dict): UniProtKB entry.
+
+        Returns:
+            float: Completeness between 0 and 1.
+        """
+        description = entry.get('proteinDescription') or {}
+        comment_types = {comment.get('commentType') for comment in entry.get('comments') or []}
+        databases = {xref.get('database') for xref in entry.get('uniProtKBCrossReferences') or []}
+        checks = [
+            bool(description.get('recommendedName')),
+            bool(entry.get('genes')),
+            "FUNCTION" in comment_types,
+            "SUBCELLULAR LOCATION" in comment_types,
+            "TISSUE SPECIFICITY" in comment_types,
+            "GeneID" in databases,
+            "STRING" in databases,
+            "PDB" in databases,
+        ]
+        return sum(checks) / len(checks)
+
+    @staticmethod
+    def reviewed(entry: dict) -> bool:
+        """
+        Whether a UniProtKB entry is reviewed (Swiss-Prot).
+        """
+        return entry.get('entryType', '').startswith('UniProtKB reviewed')
+
+    def rank(self, human_sequence: str, options: list) -> tuple:
+        """
+        Scores and sorts ortholog candidates. Each option gains 'identity' and 'score' keys.
+
+        Args:
+            human_sequence (str): Human protein sequence.
+            options (list): Dicts with 'accession', 'source' and 'entry' (UniProtKB entry with sequence) keys.
+
+        Returns:
+            tuple: Options sorted best first, and whether the top one wins by at least margin.
+        """
+        scorable = [option for option in options if (option.get('entry') or {}).get('sequence')]
+        alignments = align_pairs([(human_sequence, option['entry']['sequence']['value']) for option in scorable])
+
+        w_identity, w_complete, w_reviewed = self.weights
+        for option in options:
+            option['identity'] = None
+            option['score'] = 0.0
+        for option, alignment in zip(scorable, alignments):
+            entry = option['entry']
+            option['identity'] = float(alignment.identity)
+            option['score'] = round(float(w_identity * alignment.identity / 100
+                                    + w_complete * self.completeness(entry)
+                                    + w_reviewed * self.reviewed(entry)), 3)
+
+        ranked = sorted(options, key=lambda option: option['score'], reverse=True)
+        clear = len(ranked) <= 1 or (ranked[0]['score'] - ranked[1]['score'] >= self.margin)
+        return ranked, clear
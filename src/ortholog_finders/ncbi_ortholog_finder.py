@@ -1,21 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from client.accession_cache import AccessionCache
 from client.ncbi_client import NCBIClient
 
 class NCBIOrthologFinder():
+    """
+    Represents an ortholog finder backed by NCBI Gene.
+    Gene-to-protein lookups run concurrently within the NCBI client's rate budget and are cached on disk.
+
+    Attributes:
+        ncbi_client (NCBIClient): NCBI client.
+        accession_cache (AccessionCache): Persistent gene ID to protein reference cache.
+        max_workers (int): Concurrent gene lookups.
+    """
     ncbi_client = NCBIClient()
+    accession_cache = AccessionCache(Path(__file__).parent.parent.parent / ".ncbi_cache" / "gene_accessions.sqlite3")
+    max_workers = 4
+
+    def _protein_reference(self, gene_id):
+        """
+        Gets the protein reference of a gene, from the cache if fresh.
+        """
+        reference = self.accession_cache.get(gene_id)
+        if reference:
+            return reference
+        reference = self.ncbi_client.get_protein_reference_id(gene_id)
+        if reference:
+            self.accession_cache.put(gene_id, reference)
+        return reference
     
     def get_orthologs(self, gene_id, taxon_list):
         data = self.ncbi_client.get_orthologs(gene_id, taxon_list)
         
         tax_gene_map = {
             report['gene']['tax_id']: report['gene']['gene_id']
-            for report in data['reports']
+            for report in data.get('reports', [])
             if 'gene' in report and 'tax_id' in report['gene'] and 'gene_id' in report['gene']
         }
+        if not tax_gene_map:
+            return {}
         
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tax_gene_map))) as executor:
+            references = executor.map(self._protein_reference, tax_gene_map.values())
+
         final_map = {}
-        for tax_id, g_id in tax_gene_map.items():
-            protein_ref = self.ncbi_client.get_protein_reference_id(g_id)
+        for tax_id, protein_ref in zip(tax_gene_map, references):
             if protein_ref:
                 final_map[tax_id] = protein_ref
 
-        return final_map
\ No newline at end of file
+        return final_map
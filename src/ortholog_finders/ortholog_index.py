@@ -0,0 +1,198 @@
+import argparse
+import gzip
+import os
+import sqlite3
+from pathlib import Path
+from utils.file_utils import ensure_directory
+
+HUMAN_TAX_ID = "9606"
+_BATCH = 50_000
+
+# UniProt accession ranks: reviewed (Swiss-Prot), status unknown, unreviewed (TrEMBL)
+_REVIEWED, _UNKNOWN, _UNREVIEWED = 0, 1, 2
+# RefSeq record status ranks, best first
+_REFSEQ_STATUS = {"REVIEWED": 0, "VALIDATED": 1, "PROVISIONAL": 2, "PREDICTED": 3, "INFERRED": 4, "MODEL": 5}
+
+def _open_text(path: Path):
+    """
+    Opens a plain or gzipped text dump.
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt")
+    return open(path)
+
+
+def _batched(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= _BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class OrthologIndex():
+    """
+    Represents an offline index of human gene orthologs and their protein accessions,
+    built from the NCBI gene_orthologs and gene2accession dumps and the UniProt idmapping dump.
+
+    Attributes:
+        path (Path): SQLite database path.
+    """
+    def __init__(self, path: Path):
+        """
+        Constructor for OrthologIndex.
+
+        Args:
+            path (Path): SQLite database path.
+        """
+        self.path = Path(path)
+
+    @property
+    def available(self) -> bool:
+        """
+        Whether the index has been built.
+        """
+        return self.path.exists()
+
+    def build(self, gene_orthologs: Path, gene2accession: Path, idmapping: Path):
+        """
+        Builds the index from the dumps, replacing any previous index. Only rows relating to human genes are kept.
+
+        Args:
+            gene_orthologs (Path): NCBI gene_orthologs(.gz).
+            gene2accession (Path): NCBI gene2accession(.gz).
+            idmapping (Path): UniProt idmapping.dat(.gz).
+        """
+        ensure_directory(self.path.parent)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.unlink(missing_ok=True)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("CREATE TABLE orthologs (human_gene_id TEXT, tax_id TEXT, gene_id TEXT)")
+            conn.execute("CREATE TABLE gene_protein (gene_id TEXT, source TEXT, accession TEXT, rank INTEGER)")
+
+            genes = set()
+            for batch in _batched(self._ortholog_rows(gene_orthologs)):
+                conn.executemany("INSERT INTO orthologs VALUES (?, ?, ?)", batch)
+                genes.update(gene_id for _, _, gene_id in batch)
+            for batch in _batched(self._uniprot_rows(idmapping, genes)):
+                conn.executemany("INSERT INTO gene_protein VALUES (?, 'uniprot', ?, ?)", batch)
+            for batch in _batched(self._refseq_rows(gene2accession, genes)):
+                conn.executemany("INSERT INTO gene_protein VALUES (?, 'ncbi', ?, ?)", batch)
+
+            conn.execute("CREATE INDEX orthologs_human ON orthologs (human_gene_id, tax_id)")
+            conn.execute("CREATE INDEX gene_protein_gene ON gene_protein (gene_id, rank)")
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _ortholog_rows(path: Path):
+        """
+        Yields (human gene ID, ortholog tax ID, ortholog gene ID) rows of gene_orthologs.
+        """
+        with _open_text(path) as fh:
+            for line in fh:
+                if line.startswith("#"):
+                    continue
+                tax_id, gene_id, _, other_tax_id, other_gene_id = line.rstrip("\n").split("\t")[:5]
+                if tax_id == HUMAN_TAX_ID:
+                    yield gene_id, other_tax_id, other_gene_id
+                elif other_tax_id == HUMAN_TAX_ID:
+                    yield other_gene_id, tax_id, gene_id
+
+    @staticmethod
+    def _review_rank(accession: str, entry_name: str | None) -> int:
+        """
+        Ranks an accession by review status, read from its UniProtKB entry name: unreviewed (TrEMBL) entries
+        are named ACCESSION_SPECIES, reviewed (Swiss-Prot) entries get a mnemonic name.
+        """
+        if entry_name is None:
+            return _UNKNOWN
+        return _UNREVIEWED if entry_name.split("_")[0] == accession else _REVIEWED
+
+    @classmethod
+    def _uniprot_rows(cls, path: Path, genes: set):
+        """
+        Yields (gene ID, UniProt accession, rank) rows of idmapping.dat.
+        Reviewed (Swiss-Prot) accessions rank ahead of unreviewed (TrEMBL) ones, judged by the UniProtKB-ID
+        row of each accession; accessions without one rank in between. Equal ranks are ordered by accession
+        at query time. The dump lists each accession's rows together, which is relied on to pair them.
+        """
+        with _open_text(path) as fh:
+            current, entry_name, gene_ids = None, None, []
+            for line in fh:
+                accession, id_type, value = line.rstrip("\n").split("\t")[:3]
+                if accession != current:
+                    for gene_id in gene_ids:
+                        yield gene_id, current, cls._review_rank(current, entry_name)
+                    current, entry_name, gene_ids = accession, None, []
+                if id_type == "UniProtKB-ID":
+                    entry_name = value
+                elif id_type == "GeneID" and value in genes and "-" not in accession:
+                    gene_ids.append(value)
+            for gene_id in gene_ids:
+                yield gene_id, current, cls._review_rank(current, entry_name)
+
+    @staticmethod
+    def _refseq_rows(path: Path, genes: set):
+        """
+        Yields (gene ID, RefSeq protein accession, rank) rows of gene2accession.
+        RefSeq proteins rank after UniProt ones, curated (NP_) ahead of predicted (XP_), then by record status.
+        """
+        with _open_text(path) as fh:
+            for line in fh:
+                if line.startswith("#"):
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                gene_id, status, protein = fields[1], fields[2], fields[5]
+                if gene_id in genes and protein != "-" and protein[:3] in ("NP_", "XP_"):
+                    rank = 10 + (0 if protein.startswith("NP_") else 10) + _REFSEQ_STATUS.get(status, len(_REFSEQ_STATUS))
+                    yield gene_id, protein, rank
+
+    def get_orthologs(self, gene_id, taxon_list) -> dict:
+        """
+        Gets the best protein reference of each ortholog of a human gene.
+
+        Args:
+            gene_id: Human NCBI gene ID.
+            taxon_list (list): Tax IDs of the organisms of interest.
+
+        Returns:
+            dict: Tax ID (str) to (source, accession), in the shape of NCBIOrthologFinder.get_orthologs.
+        """
+        if not self.available or not taxon_list:
+            return {}
+        taxa = [str(tax_id) for tax_id in taxon_list]
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT o.tax_id, p.source, p.accession FROM orthologs o "
+                "JOIN gene_protein p ON p.gene_id = o.gene_id "
+                f"WHERE o.human_gene_id = ? AND o.tax_id IN ({', '.join('?' * len(taxa))}) "
+                "ORDER BY o.tax_id, p.rank, p.accession",
+                [str(gene_id), *taxa]).fetchall()
+        finally:
+            conn.close()
+
+        final_map = {}
+        for tax_id, source, accession in rows:
+            final_map.setdefault(tax_id, (source, accession))
+        return final_map
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline ortholog index.")
+    parser.add_argument("--gene-orthologs", required=True, help="NCBI gene_orthologs(.gz)")
+    parser.add_argument("--gene2accession", required=True, help="NCBI gene2accession(.gz)")
+    parser.add_argument("--idmapping", required=True, help="UniProt idmapping.dat(.gz)")
+    parser.add_argument("--output", default=Path(__file__).parent.parent.parent / ".ortholog_index" / "orthologs.sqlite3")
+    args = parser.parse_args()
+    OrthologIndex(args.output).build(args.gene_orthologs, args.gene2accession, args.idmapping)
@@ -0,0 +1,210 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from client.uniprot_client import UniProtClient
+from models.organism import Organism, CustomOrganism
+from utils.file_utils import ensure_directory
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS proteomes (tax_id INTEGER PRIMARY KEY, entries INTEGER, updated REAL);
+CREATE TABLE IF NOT EXISTS entries (
+    accession TEXT PRIMARY KEY, tax_id INTEGER, reviewed INTEGER,
+    gene_names TEXT, protein_names TEXT, sequence TEXT, entry BLOB);
+CREATE INDEX IF NOT EXISTS entries_tax ON entries (tax_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    gene_names, protein_names, content='entries', content_rowid='rowid');
+"""
+
+def _gene_names(entry: dict) -> list:
+    names = []
+    for gene in entry.get('genes') or []:
+        if gene.get('geneName'):
+            names.append(gene['geneName']['value'])
+        names.extend(synonym['value'] for synonym in gene.get('synonyms') or [])
+    return names
+
+
+def _protein_names(entry: dict) -> list:
+    description = entry.get('proteinDescription') or {}
+    names = []
+    if description.get('recommendedName'):
+        names.append(description['recommendedName']['fullName']['value'])
+    for key in ('alternativeNames', 'submissionNames'):
+        names.extend(name['fullName']['value'] for name in description.get(key) or [])
+    return names
+
+
+def _phrase(text: str) -> str:
+    """
+    Quotes text as an FTS5 phrase.
+    """
+    return '"' + text.replace('"', '""') + '"'
+
+
+class ProteomeStore():
+    """
+    Represents a local store of organism reference proteomes, full-text indexed on gene and protein names and indexed on tax id.
+    Answers the UniProtKB searches of UniRefOrthologFinder without network requests.
+    Each thread keeps one connection to the database, and the schema is created once per store.
+
+    Attributes:
+        path (Path): SQLite database path.
+    """
+    def __init__(self, path: Path):
+        """
+        Constructor for ProteomeStore.
+
+        Args:
+            path (Path): SQLite database path.
+        """
+        self.path = Path(path)
+        self._loaded = None
+        self._ready = False
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Gets this thread's connection, opened on its first use. The schema is created on the first connection only.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if not self._ready:
+                ensure_directory(self.path.parent)
+            conn = sqlite3.connect(self.path, timeout=30)
+            if not self._ready:
+                conn.executescript(_SCHEMA)
+                self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def loaded_tax_ids(self) -> set:
+        """
+        Gets the tax ids whose proteomes are stored.
+
+        Returns:
+            set: Tax ids.
+        """
+        if self._loaded is None:
+            if not self.path.exists():
+                return set()
+            conn = self._connect()
+            self._loaded = {tax_id for (tax_id,) in conn.execute("SELECT tax_id FROM proteomes")}
+        return self._loaded
+
+    def has(self, tax_id) -> bool:
+        """
+        Whether the proteome of an organism is stored.
+        """
+        return int(tax_id) in self.loaded_tax_ids()
+
+    def load(self, tax_id, entries: list):
+        """
+        Stores an organism's proteome, replacing any previous copy.
+
+        Args:
+            tax_id (int): Organism taxonomic ID.
+            entries (list): UniProtKB entries.
+        """
+        rows = []
+        for entry in entries:
+            rows.append((entry['primaryAccession'], int(tax_id),
+                         int(entry.get('entryType', '').startswith('UniProtKB reviewed')),
+                         " | ".join(_gene_names(entry)), " | ".join(_protein_names(entry)),
+                         (entry.get('sequence') or {}).get('value', ''),
+                         zlib.compress(json.dumps(entry).encode())))
+
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT INTO entries_fts (entries_fts, rowid, gene_names, protein_names) "
+                         "SELECT 'delete', rowid, gene_names, protein_names FROM entries WHERE tax_id = ?", (int(tax_id),))
+            conn.execute("DELETE FROM entries WHERE tax_id = ?", (int(tax_id),))
+            conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT INTO entries_fts (rowid, gene_names, protein_names) "
+                         "SELECT rowid, gene_names, protein_names FROM entries WHERE tax_id = ?", (int(tax_id),))
+            conn.execute("INSERT OR REPLACE INTO proteomes VALUES (?, ?, ?)", (int(tax_id), len(rows), time.time()))
+        self._loaded = None
+
+    def download(self, organisms: list, uniprot_client: UniProtClient | None = None):
+        """
+        Downloads and stores the reference proteomes of the given organisms.
+
+        Args:
+            organisms (list): Organisms or CustomOrganisms.
+            uniprot_client (UniProtClient): Client to download with.
+        """
+        uniprot_client = uniprot_client or UniProtClient()
+        for organism in organisms:
+            entries = uniprot_client.stream_proteome(organism.tax_id)
+            if entries:
+                self.load(organism.tax_id, entries)
+
+    def search(self, protein_name: str, gene: str, tax_id) -> dict:
+        """
+        Searches an organism's stored proteome by protein name and gene name, like the UniProtKB query
+        "protein_name:... AND gene:... AND taxonomy_id:...". Reviewed entries come first, then by relevance.
+
+        Args:
+            protein_name (str): Protein name.
+            gene (str): Gene name, matched exactly.
+            tax_id (int): Organism taxonomic ID.
+
+        Returns:
+            dict: {'results': [...]} of UniProtKB entries, in the shape of the remote search.
+        """
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT e.gene_names, e.entry FROM entries_fts f JOIN entries e ON e.rowid = f.rowid "
+            "WHERE entries_fts MATCH ? AND e.tax_id = ? ORDER BY e.reviewed DESC, bm25(entries_fts)",
+            (f"gene_names:{_phrase(gene)} AND protein_names:{_phrase(protein_name)}", int(tax_id))).fetchall()
+        gene = gene.lower()
+        return {'results': [json.loads(zlib.decompress(entry))
+                            for gene_names, entry in rows
+                            if gene in (name.lower() for name in gene_names.split(" | "))]}
+
+
+    def sequences(self, tax_id) -> tuple:
+        """
+        Gets the stored sequences of an organism.
+
+        Args:
+            tax_id (int): Organism taxonomic ID.
+
+        Returns:
+            tuple: Accessions (list) and sequences (list), in the same order.
+        """
+        conn = self._connect()
+        rows = conn.execute("SELECT accession, sequence FROM entries WHERE tax_id = ? ORDER BY rowid", (int(tax_id),)).fetchall()
+        return [accession for accession, _ in rows], [sequence for _, sequence in rows]
+
+    def entry(self, accession: str) -> dict | None:
+        """
+        Gets a stored UniProtKB entry.
+
+        Args:
+            accession (str): UniProt accession.
+
+        Returns:
+            dict: The entry, or None if not stored.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT entry FROM entries WHERE accession = ?", (accession,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download organism reference proteomes into the local proteome store.")
+    parser.add_argument("--organisms", nargs="*", default=[o.name for o in Organism if o != Organism.HUMAN],
+                        help="Organism names (default: every predefined organism except human)")
+    parser.add_argument("--custom", nargs="*", default=[], metavar="NAME:TAX_ID",
+                        help="Custom organisms, e.g. 'Canis lupus:9615'")
+    parser.add_argument("--output", default=Path(__file__).parent.parent.parent / ".proteome_store" / "proteomes.sqlite3")
+    args = parser.parse_args()
+
+    organisms = [Organism[name] for name in args.organisms]
+    for custom in args.custom:
+        name, tax_id = custom.rsplit(":", 1)
+        organisms.append(CustomOrganism(name, int(tax_id)))
+    ProteomeStore(args.output).download(organisms)
@@ -1,8 +1,68 @@
+import logging
+from pathlib import Path
+from alignment.homology_search import KmerIndex
 from client.uniprot_client import UniProtClient
 from models.organism import Organism, CustomOrganism
+from ortholog_finders.candidate_ranker import CandidateRanker
+from ortholog_finders.proteome_store import ProteomeStore
+
+logger = logging.getLogger(__name__)
 
 class UniRefOrthologFinder():
     uniprot_client = UniProtClient()
+    proteome_store = ProteomeStore(Path(__file__).parent.parent.parent / ".proteome_store" / "proteomes.sqlite3")
+    kmer_indexes = {}
+    candidate_ranker = CandidateRanker()
+
+    def _choose(self, organism_name, human_sequence, options, selection_callback=None) -> dict | None:
+        """
+        Picks one of several ortholog candidates. A clear winner of the automatic ranking is accepted;
+        close calls are left to selection_callback.
+
+        Returns:
+            dict: UniProtKB entry of the chosen candidate, {} if there is no candidate, or None if the selection is pending.
+        """
+        if not options:
+            return {}
+        ranked, clear = self.candidate_ranker.rank(human_sequence, options)
+        if clear or not selection_callback:
+            return ranked[0]['entry']
+        chosen_ortholog = selection_callback(organism_name, ranked)
+        if not chosen_ortholog:
+            return None
+        return next((option['entry'] for option in ranked if option['accession'] == chosen_ortholog), ranked[0]['entry'])
+
+    def _search(self, rec_name, gene, tax_id) -> dict:
+        """
+        Searches UniProtKB by protein name, gene name and organism, locally if the organism's proteome is stored.
+        The store only holds the reference proteome and matches names strictly, so an empty local result
+        falls back to the online search.
+        """
+        if self.proteome_store.has(tax_id):
+            local = self.proteome_store.search(rec_name, gene, tax_id)
+            if local.get('results'):
+                return local
+        return self.uniprot_client.get_entry(protein_id=rec_name, gene=gene, organism=tax_id, kb=True, search=True)
+
+    def _kmer_index(self, tax_id) -> KmerIndex:
+        """
+        Gets the k-mer index of an organism's stored proteome, built on first use and kept for the process.
+        """
+        tax_id = int(tax_id)
+        if tax_id not in self.kmer_indexes:
+            self.kmer_indexes[tax_id] = KmerIndex(*self.proteome_store.sequences(tax_id))
+        return self.kmer_indexes[tax_id]
+
+    def _homology_search(self, sequence, tax_id) -> list:
+        """
+        Searches an organism's stored proteome for homologs of a sequence. Used when name-based lookups find nothing.
+
+        Returns:
+            list: HomologyHits, best first. Empty if the proteome is not stored.
+        """
+        if not sequence or not self.proteome_store.has(tax_id):
+            return []
+        return self._kmer_index(tax_id).search(sequence)
     
     def get_ortholog_ids(self, protein_id, organism, selection_callback=None):
         """
@@ -11,15 +71,18 @@ class UniRefOrthologFinder():
         Args:
             protein_id: UniProt protein ID
             organism: Organism enum or CustomOrganism instance
-            selection_callback: Optional callback function for user selection when multiple orthologs are found.
+            selection_callback: Optional callback function for user selection when multiple orthologs are found
+                              and the automatic ranking has no clear winner.
                               Should accept (organism_name, options_list) and return selected accession.
-                              If None, auto-selects first option.
+                              Options are ranked best first and carry 'score' and 'identity' keys.
+                              If None, auto-selects the top-ranked option.
         """
         human_data =  self.uniprot_client.get_entry(protein_id)
         uniref_data = self.uniprot_client.get_entry(protein_id, ref=True)
     
         protein_name = human_data['genes'][0]['geneName']['value']
         rec_name=human_data['proteinDescription']['recommendedName']['fullName']['value']
+        human_sequence = human_data.get('sequence', {}).get('value')
 
         orthologs = [organism]
         data = {}
@@ -30,50 +93,59 @@ class UniRefOrthologFinder():
                 if match:
                     match_id = result['accessions'][0]
                     uniref_r = self.uniprot_client.get_entry(protein_id=match_id, kb=True)
-                    search_r = self.uniprot_client.get_entry(protein_id=rec_name, gene=protein_name, organism=match.value[1], kb=True, search=True)
-                    if uniref_r['primaryAccession'] == search_r['results'][0]['primaryAccession']:
+                    search_r = self._search(rec_name, protein_name, match.value[1])
+                    search_results = search_r.get('results') or []
+                    # Nothing found by name leaves the UniRef member uncontested
+                    if not search_results or uniref_r['primaryAccession'] == search_results[0]['primaryAccession']:
                         data = uniref_r
                     else:
-                        # Multiple options found - need user selection
+                        # Multiple options found - rank them, asking the user only on a close call
                         options = []
                         # Add UniRef accessions
                         for acc in result['accessions']:
                             options.append({'accession': acc, 'source': 'UniRef', 'entry': uniref_r if acc == match_id else None})
                         # Add search results
-                        for entry in search_r['results']:
+                        for entry in search_results:
                             if entry['primaryAccession'] not in result['accessions']:
                                 options.append({'accession': entry['primaryAccession'], 'source': 'UniProtKB Search', 'entry': entry})
                         
-                        if len(options) > 1 and selection_callback:
-                            chosen_ortholog = selection_callback(match.value[0], options)
-                            if chosen_ortholog:
-                                data = self.uniprot_client.get_entry(chosen_ortholog, kb=True)
-                            else:
-                                # Selection pending - return empty dict to indicate selection needed
-                                return {}
-                        else:
-                            # Auto-select first option if no callback or only one option
-                            chosen_ortholog = options[0]['accession'] if options else None
-                            if chosen_ortholog:
-                                data = self.uniprot_client.get_entry(chosen_ortholog, kb=True)
+                        # Fetch the missing entries in one query rather than one request each
+                        missing = [option['accession'] for option in options if option['entry'] is None]
+                        fetched = {entry['primaryAccession']: entry for entry in self.uniprot_client.get_entries(missing)}
+                        unfetched = [accession for accession in missing if accession not in fetched]
+                        if unfetched:
+                            # The batch failed or skipped these; fetch them one by one as before batching
+                            logger.warning("Batched UniProtKB fetch missed %s; fetching them one by one", unfetched)
+                            for accession in unfetched:
+                                fetched[accession] = self.uniprot_client.get_entry(accession, kb=True)
+                        for option in options:
+                            if option['entry'] is None:
+                                option['entry'] = fetched.get(option['accession'], {})
+                        chosen_entry = self._choose(match.value[0], human_sequence, options, selection_callback)
+                        if chosen_entry is None:
+                            # Selection pending - return empty dict to indicate selection needed
+                            return {}
+                        data = chosen_entry
                     orthologs.remove(match)
                 if not orthologs: break
         
         for org in orthologs:
-            r = self.uniprot_client.get_entry(protein_id=rec_name, gene=protein_name, organism=org.value[1], kb=True, search=True)
-            if r['results']:
-                if len(r['results']) > 1 and selection_callback:
-                    # Multiple search results - need user selection
+            r = self._search(rec_name, protein_name, org.value[1])
+            if r.get('results'):
+                if len(r['results']) > 1:
                     options = [{'accession': entry['primaryAccession'], 'source': 'UniProtKB Search', 'entry': entry} 
                               for entry in r['results']]
-                    chosen_ortholog = selection_callback(org.value[0], options)
-                    if chosen_ortholog:
-                        chosen_entry = next((opt['entry'] for opt in options if opt['accession'] == chosen_ortholog), None)
-                        data = chosen_entry if chosen_entry else r['results'][0]
-                    else:
+                    chosen_entry = self._choose(org.value[0], human_sequence, options, selection_callback)
+                    if chosen_entry is None:
                         # Selection pending - return empty dict to indicate selection needed
                         return {}
+                    data = chosen_entry
                 else:
                     data = r['results'][0]
+            else:
+                # Nothing by name: fall back to a homology search of the organism's stored proteome
+                hits = self._homology_search(human_sequence, org.value[1])
+                if hits:
+                    data = self.proteome_store.entry(hits[0].accession)
            
         return data
\ No newline at end of file
@@ -0,0 +1,161 @@
+import hashlib
+import io
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image
+from utils.file_utils import ensure_directory
+
+EMU_PER_INCH = 914400
+
+# python-pptx embeds these formats; WebP is not a valid pptx image type
+_FORMATS = {"PNG": ".png", "JPEG": ".jpg"}
+
+
+class ImagePipeline:
+    """
+    Represents a pool of threads that prepare images for embedding in slides. Each image is decoded once,
+    rotated if asked, resampled to the physical size of its slot at the target DPI (never enlarged)
+    and re-encoded compressed. Results are cached on disk by source content and settings; sources are not modified.
+
+    Attributes:
+        cache_dir (Path): Directory of prepared images.
+        dpi (int): Target resolution on the slide.
+        format (str): Output format, "PNG" (lossless) or "JPEG".
+        quality (int): JPEG quality.
+        max_workers (int): Number of threads.
+    """
+    def __init__(self, cache_dir: Path, dpi: int = 150, format: str = "PNG", quality: int = 85, max_workers: int = 4):
+        """
+        Constructor for ImagePipeline.
+
+        Args:
+            cache_dir (Path): Directory of prepared images.
+            dpi (int): Target resolution on the slide.
+            format (str): Output format, "PNG" or "JPEG". Images with transparency are always written as PNG.
+            quality (int): JPEG quality.
+            max_workers (int): Number of threads.
+        """
+        if format not in _FORMATS:
+            raise ValueError(f"Unsupported image format: {format}")
+        self.cache_dir = Path(cache_dir)
+        self.dpi = dpi
+        self.format = format
+        self.quality = quality
+        self.max_workers = max_workers
+        self._file_hashes = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _file_hash(self, path: str) -> str:
+        """
+        Hashes a source image, memoized on path, size and modification time.
+        """
+        stat = os.stat(path)
+        memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._file_hashes.get(memo_key)
+        if digest is None:
+            with open(path, 'rb') as fh:
+                digest = hashlib.sha256(fh.read()).hexdigest()
+            with self._lock:
+                self._file_hashes[memo_key] = digest
+        return digest
+
+    def target_size(self, size: tuple, box: tuple, rotate: str | None = None, cover: bool = True) -> tuple:
+        """
+        Gets the pixel size an image is resampled to.
+
+        Args:
+            size (tuple): Source (width, height) in pixels.
+            box (tuple): Slot (width, height) in EMU.
+            rotate (str): "vertical" or "horizontal" to turn the image 90 degrees into that orientation, or None.
+            cover (bool): Whether the image fills the slot and is cropped (picture placeholders) rather than fitted inside it.
+
+        Returns:
+            tuple: Rotated (width, height) in pixels, and whether to rotate.
+        """
+        width, height = size
+        turn = (rotate == "vertical" and width > height) or (rotate == "horizontal" and width < height)
+        if turn:
+            width, height = height, width
+        box_width = box[0] / EMU_PER_INCH * self.dpi
+        box_height = box[1] / EMU_PER_INCH * self.dpi
+        scale = (max if cover else min)(box_width / width, box_height / height)
+        scale = min(scale, 1.0)
+        return (max(1, round(width * scale)), max(1, round(height * scale))), turn
+
+    def _prepare(self, path: str, box: tuple, rotate: str | None, cover: bool) -> str:
+        spec = f"{self._file_hash(path)}:{box[0]}x{box[1]}:{rotate}:{cover}:{self.dpi}:{self.format}:{self.quality}"
+        key = hashlib.sha256(spec.encode()).hexdigest()
+        for suffix in _FORMATS.values():
+            cached = self.cache_dir / f"{key}{suffix}"
+            if cached.exists():
+                return str(cached)
+
+        with Image.open(path) as img:
+            (width, height), turn = self.target_size(img.size, box, rotate, cover)
+            # Scale the resolution with the pixels so the image keeps its physical size when placed without a slot size
+            source_dpi = img.info.get("dpi", (72, 72))
+            scale = width / (img.height if turn else img.width)
+            dpi = tuple(round(float(d) * scale, 2) for d in (source_dpi[::-1] if turn else source_dpi))
+            # JPEG sources decode directly at a reduced scale when much larger than needed
+            img.draft(img.mode, (height, width) if turn else (width, height))
+            if turn:
+                img = img.transpose(Image.Transpose.ROTATE_90)
+            if img.size != (width, height):
+                img = img.resize((width, height), Image.Resampling.LANCZOS)
+
+            transparent = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+            buffer = io.BytesIO()
+            if self.format == "JPEG" and not transparent:
+                img.convert("RGB").save(buffer, "JPEG", quality=self.quality, optimize=True, progressive=True, dpi=dpi)
+                suffix = _FORMATS["JPEG"]
+            else:
+                img.save(buffer, "PNG", optimize=True, dpi=dpi)
+                suffix = _FORMATS["PNG"]
+
+        ensure_directory(self.cache_dir)
+        out_path = self.cache_dir / f"{key}{suffix}"
+        tmp_path = out_path.with_name(f".{out_path.name}.{uuid.uuid4().hex}")
+        tmp_path.write_bytes(buffer.getvalue())
+        os.replace(tmp_path, out_path)
+        return str(out_path)
+
+    def submit(self, path: str, box: tuple, rotate: str | None = None, cover: bool = True) -> Future:
+        """
+        Submits an image for preparation.
+
+        Args:
+            path (str): Source image path.
+            box (tuple): Slot (width, height) in EMU, e.g. a placeholder's (width, height).
+            rotate (str): "vertical" or "horizontal" to turn the image into that orientation, or None.
+            cover (bool): Whether the image fills the slot and is cropped rather than fitted inside it.
+
+        Returns:
+            Future: Resolves to the prepared image path.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="image-pipeline")
+            return self._executor.submit(self._prepare, str(path), (int(box[0]), int(box[1])), rotate, cover)
+
+    def prepare(self, path: str, box: tuple, rotate: str | None = None, cover: bool = True) -> str:
+        """
+        Prepares an image and waits for it.
+
+        Returns:
+            str: Prepared image path.
+        """
+        return self.submit(path, box, rotate, cover).result()
+
+    def shutdown(self):
+        """
+        Stops the threads.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
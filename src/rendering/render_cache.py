@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from rendering.render_job import RenderJob
+from utils.file_utils import ensure_directory
+
+class RenderCache:
+    """
+    Represents an on-disk cache of rendered structure images.
+    Entries are keyed by a hash of the structure file contents and the job's annotation ranges, colors and view settings.
+
+    Attributes:
+        cache_dir (Path): Cache directory.
+    """
+    def __init__(self, cache_dir: Path):
+        """
+        Constructor for RenderCache.
+
+        Args:
+            cache_dir (Path): Cache directory.
+        """
+        self.cache_dir = Path(cache_dir)
+        self._file_hashes = {}
+
+    def _file_hash(self, path: str) -> str:
+        """
+        Hashes a structure file, memoized on path, size and modification time.
+        """
+        stat = os.stat(path)
+        memo_key = (path, stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._file_hashes:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    digest.update(chunk)
+            self._file_hashes[memo_key] = digest.hexdigest()
+        return self._file_hashes[memo_key]
+
+    def key(self, job: RenderJob) -> str:
+        """
+        Gets the cache key of the given job.
+
+        Args:
+            job (RenderJob): Render job.
+
+        Returns:
+            str: Hex digest identifying the job's output.
+        """
+        spec = {
+            "objects": [(name, self._file_hash(path)) for name, path in job.objects],
+            "selections": job.selections,
+            "colors": job.colors,
+            "residue_colors": job.residue_colors,
+            "settings": job.settings,
+            "view": job.view,
+            "width": job.width,
+            "ray": job.ray,
+            "pse": job.pse_path is not None,
+        }
+        return hashlib.sha256(json.dumps(spec, sort_keys=True, default=list).encode()).hexdigest()
+
+    def _entry_paths(self, key: str) -> tuple:
+        entry_dir = self.cache_dir / key[:2]
+        return entry_dir / f"{key}.png", entry_dir / f"{key}.pse"
+
+    def get(self, job: RenderJob) -> bool:
+        """
+        Copies cached outputs of the given job to its output paths.
+
+        Args:
+            job (RenderJob): Render job.
+
+        Returns:
+            bool: True if the job was served from the cache.
+        """
+        png_path, pse_path = self._entry_paths(self.key(job))
+        if not png_path.exists() or (job.pse_path and not pse_path.exists()):
+            return False
+        ensure_directory(Path(job.png_path).parent)
+        shutil.copyfile(png_path, job.png_path)
+        if job.pse_path:
+            shutil.copyfile(pse_path, job.pse_path)
+        return True
+
+    def put(self, job: RenderJob):
+        """
+        Stores the rendered outputs of the given job.
+
+        Args:
+            job (RenderJob): Rendered job.
+        """
+        png_path, pse_path = self._entry_paths(self.key(job))
+        ensure_directory(png_path.parent)
+        if job.pse_path:
+            self._copy_atomic(job.pse_path, pse_path)
+        # The png is written last; its presence marks a complete entry
+        self._copy_atomic(job.png_path, png_path)
+
+    @staticmethod
+    def _copy_atomic(src: str, dst: Path):
+        tmp_path = dst.with_name(f"{dst.name}.{os.getpid()}.tmp")
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
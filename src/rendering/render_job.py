@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class RenderJob:
+    """
+    Represents a declarative PyMOL rendering job.
+
+    Attributes:
+        objects (tuple): (object name, structure file path) pairs to load.
+        png_path (str): Output image path.
+        selections (tuple): (object name, selection expression) pairs to create as new objects.
+        colors (tuple): (color, selection expression) pairs, applied in order.
+        residue_colors (tuple): (object name, (start, end, color) runs) pairs, applied after colors in one bulk assignment per object.
+        settings (tuple): (PyMOL setting, value) pairs applied before rendering.
+        view (str): "orient" or "zoom".
+        width (int): Image width in pixels.
+        ray (bool): Whether to ray-trace the image.
+        pse_path (str): Optional output PyMOL session path.
+    """
+    objects: tuple
+    png_path: str
+    selections: tuple = ()
+    colors: tuple = ()
+    residue_colors: tuple = ()
+    settings: tuple = ()
+    view: str = "orient"
+    width: int = 2000
+    ray: bool = True
+    pse_path: str | None = None
@@ -0,0 +1,143 @@
+import os
+from concurrent.futures import Future
+from rendering.render_cache import RenderCache
+from rendering.render_job import RenderJob
+from utils.process_pool import process_pool
+
+_pymol = None
+
+def _init_worker(max_threads: int):
+    """
+    Starts a private PyMOL instance for this worker process.
+
+    Args:
+        max_threads (int): Ray-tracing threads available to this worker.
+    """
+    global _pymol
+    import pymol2
+    _pymol = pymol2.PyMOL()
+    _pymol.start()
+    _pymol.cmd.set("max_threads", max_threads)
+
+
+def _color_residues(cmd, name: str, runs: tuple):
+    """
+    Colors residues of an object from (start, end, color) runs with a single alter over its atoms,
+    instead of one selection per run.
+    """
+    if not runs:
+        return
+    lookup = {}
+    for start, end, color in runs:
+        index = cmd.get_color_index(color)
+        lookup.update(dict.fromkeys(range(start, end + 1), index))
+    cmd.alter(name, "color = lookup.get(resv, color)", space={"lookup": lookup})
+    cmd.recolor()
+
+
+def _render(job: RenderJob) -> str:
+    """
+    Renders a single job in this worker's PyMOL instance.
+
+    Args:
+        job (RenderJob): Job to render.
+
+    Returns:
+        str: Path to the rendered image.
+    """
+    cmd = _pymol.cmd
+    try:
+        for name, path in job.objects:
+            cmd.load(path, name)
+        for name, selection in job.selections:
+            cmd.create(name, selection)
+        for color, selection in job.colors:
+            cmd.color(color, selection)
+        for name, runs in job.residue_colors:
+            _color_residues(cmd, name, runs)
+        for setting, value in job.settings:
+            cmd.set(setting, value)
+
+        if job.view == "zoom":
+            cmd.zoom()
+        else:
+            cmd.orient()
+
+        cmd.png(job.png_path, width=job.width, ray=int(job.ray))
+        if job.pse_path:
+            cmd.save(job.pse_path)
+    finally:
+        cmd.delete("all")
+        for setting, _ in job.settings:
+            cmd.unset(setting)
+    return job.png_path
+
+
+class RenderPool:
+    """
+    Represents a pool of worker processes, each with its own PyMOL instance.
+    Workers are started lazily on the first submitted job.
+
+    Attributes:
+        max_workers (int): Number of worker processes.
+        cache (RenderCache): Optional cache of previously rendered jobs.
+    """
+    def __init__(self, max_workers: int | None = None, cache: RenderCache | None = None):
+        """
+        Constructor for RenderPool.
+
+        Args:
+            max_workers (int): Number of worker processes. Defaults to half the CPU count.
+            cache (RenderCache): Optional cache of previously rendered jobs.
+        """
+        self.cache = cache
+        cpus = os.cpu_count() or 1
+        self.max_workers = max_workers or max(1, cpus // 2)
+        self._max_threads = max(1, cpus // self.max_workers)
+        self._executor = None
+
+    def submit(self, job: RenderJob) -> Future:
+        """
+        Submits a job for rendering.
+
+        Args:
+            job (RenderJob): Job to render.
+
+        Returns:
+            Future: Resolves to the rendered image path.
+        """
+        if self.cache and self.cache.get(job):
+            future = Future()
+            future.set_result(job.png_path)
+            return future
+
+        if self._executor is None:
+            self._executor = process_pool(self.max_workers, initializer=_init_worker, initargs=(self._max_threads,))
+        future = self._executor.submit(_render, job)
+        if self.cache:
+            def store(done: Future):
+                if not done.cancelled() and done.exception() is None:
+                    self.cache.put(job)
+            future.add_done_callback(store)
+        return future
+
+    def render(self, jobs: list) -> list:
+        """
+        Renders the given jobs in parallel.
+
+        Args:
+            jobs (list): RenderJobs to render.
+
+        Returns:
+            list: Rendered image paths, in job order.
+        """
+        futures = [self.submit(job) for job in jobs]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """
+        Stops the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,32 @@
+from enum import Enum
+
+class RenderProfile(Enum):
+    """
+    Represents a render quality tier for structure images.
+    """
+    DRAFT = (800, False, None, (("antialias", 0), ("ray_shadows", 0)))
+    SLIDE = (None, True, 150, ())
+    PUBLICATION = (None, True, None, (("antialias", 2),))
+
+    def __init__(self, width, ray, dpi, settings):
+        self.fixed_width = width
+        self.ray = ray
+        self.dpi = dpi
+        self.settings = settings
+
+    def image_width(self, size_inches: float, default: int) -> int:
+        """
+        Gets the image width in pixels for this profile.
+
+        Args:
+            size_inches (float): Long edge of the slide slot the image fills, in inches, or None if unknown.
+            default (int): Full-resolution width used when this profile has no width of its own.
+
+        Returns:
+            int: Image width in pixels.
+        """
+        if self.fixed_width:
+            return self.fixed_width
+        if self.dpi and size_inches:
+            return int(round(size_inches * self.dpi))
+        return default
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+import numpy as np
+from models.annotation import Annotation
+
+_ANNOTATIONS = list(Annotation)
+
+# Overlap rule: where annotations overlap, the higher priority one colors the residue.
+# Narrow, site-level features win over the domains that contain them.
+PRIORITY = {
+    Annotation.CHAIN: 0,
+    Annotation.ECD: 1,
+    Annotation.CYTO: 1,
+    Annotation.SIGNAL: 2,
+    Annotation.TM: 3,
+    Annotation.GLYCOSYLATION: 4,
+}
+
+@dataclass
+class ResidueColors:
+    """
+    Represents per-residue annotation colors of a protein.
+
+    Attributes:
+        codes (np.ndarray): Index into Annotation members per residue (index 0 is residue 1), -1 if unannotated.
+        priority (np.ndarray): Priority of the annotation coloring each residue, -1 if unannotated.
+    """
+    codes: np.ndarray
+    priority: np.ndarray
+
+    @classmethod
+    def from_annotations(cls, annotations: dict, length: int) -> "ResidueColors":
+        """
+        Paints annotation ranges into per-residue arrays in one pass, resolving overlaps by PRIORITY.
+        Among annotations of equal priority, the later range wins.
+
+        Args:
+            annotations (dict): Annotation to list of (start, end) ranges.
+            length (int): Sequence length.
+
+        Returns:
+            ResidueColors: Per-residue colors.
+        """
+        codes = np.full(length, -1, dtype=np.int8)
+        priority = np.full(length, -1, dtype=np.int8)
+        for annotation, ranges in annotations.items():
+            code, rank = _ANNOTATIONS.index(annotation), PRIORITY[annotation]
+            for start, end in ranges:
+                segment = slice(max(start, 1) - 1, min(end, length))
+                wins = priority[segment] <= rank
+                codes[segment][wins] = code
+                priority[segment][wins] = rank
+        return cls(codes=codes, priority=priority)
+
+    def runs(self, start: int = 1, end: int | None = None) -> tuple:
+        """
+        Gets the colored residue runs, optionally restricted to a residue range.
+
+        Args:
+            start (int): First residue.
+            end (int): Last residue. Defaults to the sequence end.
+
+        Returns:
+            tuple: (start, end, color) runs of consecutive residues sharing an annotation color.
+        """
+        end = len(self.codes) if end is None else min(end, len(self.codes))
+        codes = self.codes[start - 1:end]
+        if not len(codes):
+            return ()
+        edges = np.flatnonzero(np.diff(codes)) + 1
+        run_starts = np.concatenate(([0], edges))
+        run_ends = np.concatenate((edges, [len(codes)]))
+        return tuple((int(s) + start, int(e) + start - 1, _ANNOTATIONS[codes[s]].color)
+                     for s, e in zip(run_starts, run_ends) if codes[s] >= 0)
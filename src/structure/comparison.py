@@ -0,0 +1,179 @@
+import csv
+import os
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+import numpy as np
+from PIL import Image, ImageDraw
+from alignment.pairwise import align
+from structure.coordinates import ca_atoms, load_coordinates, residue_sequence
+from structure.superposition import batch_superpose
+from utils.file_utils import ensure_directory, safe_open_write
+from utils.process_pool import process_pool
+
+def _pair_coordinates(path_a: str, path_b: str) -> tuple:
+    """
+    Pairs CA atoms of two structures through a global alignment of their sequences, so residue numbering
+    offsets (signal peptides, indels) between orthologs do not shift the pairing.
+
+    Returns:
+        tuple: Paired coordinates of a and b, and the TM-score normalization length.
+    """
+    ca_a = ca_atoms(load_coordinates(path_a))
+    ca_b = ca_atoms(load_coordinates(path_b))
+    alignment = align(residue_sequence(ca_a), residue_sequence(ca_b))
+    paired = (alignment.index_a >= 0) & (alignment.index_b >= 0)
+    idx_a, idx_b = alignment.index_a[paired], alignment.index_b[paired]
+    return ca_a["xyz"][idx_a].astype(np.float64), ca_b["xyz"][idx_b].astype(np.float64), min(len(ca_a), len(ca_b))
+
+
+def _compare_batch(pairs: list) -> list:
+    """
+    Superposes a batch of structure pairs in a single vectorized pass.
+
+    Args:
+        pairs (list): (path_a, path_b) tuples.
+
+    Returns:
+        list: (rmsd, tm_score) per pair.
+    """
+    paired = [_pair_coordinates(a, b) for a, b in pairs]
+    max_len = max(max(len(a) for a, _, _ in paired), 1)
+
+    mobile = np.zeros((len(paired), max_len, 3))
+    target = np.zeros((len(paired), max_len, 3))
+    mask = np.zeros((len(paired), max_len))
+    norm_lengths = np.zeros(len(paired))
+    for k, (a, b, norm_length) in enumerate(paired):
+        mobile[k, :len(a)] = a
+        target[k, :len(b)] = b
+        mask[k, :len(a)] = 1.0
+        norm_lengths[k] = max(norm_length, 1)
+
+    rmsd, tm = batch_superpose(mobile, target, mask, norm_lengths)
+    empty = mask.sum(axis=1) < 3
+    rmsd[empty] = np.nan
+    tm[empty] = np.nan
+    return list(zip(rmsd.tolist(), tm.tolist()))
+
+
+@dataclass
+class StructureMatrix:
+    """
+    Represents an all-vs-all structural comparison.
+
+    Attributes:
+        labels (list): Structure labels, in matrix order.
+        rmsd (np.ndarray): Symmetric RMSD matrix (Å).
+        tm_score (np.ndarray): Symmetric TM-score matrix.
+    """
+    labels: list
+    rmsd: np.ndarray
+    tm_score: np.ndarray
+
+    def to_csv(self, path: Path) -> str:
+        """
+        Writes the RMSD and TM-score matrices as one long-format table.
+
+        Args:
+            path (Path): Output .csv path.
+
+        Returns:
+            str: Path to the table.
+        """
+        with safe_open_write(path, 'w') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["structure_a", "structure_b", "rmsd", "tm_score"])
+            for i, label_a in enumerate(self.labels):
+                for j, label_b in enumerate(self.labels):
+                    writer.writerow([label_a, label_b, round(self.rmsd[i, j], 2), round(self.tm_score[i, j], 3)])
+        return str(path)
+
+    def to_heatmap(self, path: Path, cell_size: int = 60) -> str:
+        """
+        Draws RMSD and TM-score heatmaps side by side.
+
+        Args:
+            path (Path): Output .png path.
+            cell_size (int): Cell edge length in pixels.
+
+        Returns:
+            str: Path to the heatmap image.
+        """
+        n = len(self.labels)
+        margin = 120
+        panel = n * cell_size
+        img = Image.new("RGB", (2 * (panel + margin) + margin // 2, panel + margin + 30), "white")
+        draw = ImageDraw.Draw(img)
+
+        finite = self.rmsd[np.isfinite(self.rmsd)]
+        rmsd_max = max(float(finite.max()), 1e-6) if finite.size else 1.0
+        panels = [
+            ("RMSD (A)", self.rmsd / rmsd_max, self.rmsd, "{:.2f}"),
+            ("TM-score", 1.0 - self.tm_score, self.tm_score, "{:.2f}"),
+        ]
+
+        for p, (title, scaled, values, fmt) in enumerate(panels):
+            x0 = margin + p * (panel + margin)
+            y0 = margin
+            draw.text((x0, 10), title, fill="black")
+            for i, label in enumerate(self.labels):
+                draw.text((x0 - margin + 5, y0 + i * cell_size + cell_size // 2 - 5), label[:16], fill="black")
+                draw.text((x0 + i * cell_size + 2, y0 - 20 - (i % 2) * 15), label[:8], fill="black")
+                for j in range(n):
+                    value = values[i, j]
+                    box = [x0 + j * cell_size, y0 + i * cell_size, x0 + (j + 1) * cell_size - 1, y0 + (i + 1) * cell_size - 1]
+                    if not np.isfinite(value):
+                        draw.rectangle(box, fill=(200, 200, 200))
+                        continue
+                    # white (similar) to red (dissimilar)
+                    shade = int(255 * (1.0 - min(max(scaled[i, j], 0.0), 1.0)))
+                    draw.rectangle(box, fill=(255, shade, shade))
+                    draw.text((box[0] + 5, box[1] + cell_size // 2 - 5), fmt.format(value), fill="black")
+
+        ensure_directory(Path(path).parent)
+        img.save(str(path))
+        return str(path)
+
+
+def compare_structures(structures: dict, batch_size: int = 16, max_workers: int | None = None) -> StructureMatrix:
+    """
+    Computes all-vs-all RMSD and TM-score for the given structures.
+    Pairs are superposed in vectorized batches, and batches are spread across processes.
+
+    Args:
+        structures (dict): Structure label to PDB path.
+        batch_size (int): Number of pairs superposed per vectorized batch.
+        max_workers (int): Maximum worker processes. Defaults to the CPU count.
+
+    Returns:
+        StructureMatrix: Pairwise comparison matrix.
+    """
+    labels = list(structures)
+    paths = [str(structures[label]) for label in labels]
+    n = len(labels)
+
+    rmsd = np.zeros((n, n))
+    tm_score = np.ones((n, n))
+
+    index_pairs = list(combinations(range(n), 2))
+    batches = [index_pairs[k:k + batch_size] for k in range(0, len(index_pairs), batch_size)]
+    path_batches = [[(paths[i], paths[j]) for i, j in batch] for batch in batches]
+
+    if path_batches:
+        # Build the coordinate caches up front so workers only memory-map them
+        for path in paths:
+            load_coordinates(path)
+        workers = min(max_workers or os.cpu_count() or 1, len(path_batches))
+        if workers > 1:
+            with process_pool(workers) as executor:
+                results = list(executor.map(_compare_batch, path_batches))
+        else:
+            results = [_compare_batch(batch) for batch in path_batches]
+
+        for batch, batch_results in zip(batches, results):
+            for (i, j), (pair_rmsd, pair_tm) in zip(batch, batch_results):
+                rmsd[i, j] = rmsd[j, i] = pair_rmsd
+                tm_score[i, j] = tm_score[j, i] = pair_tm
+
+    return StructureMatrix(labels=labels, rmsd=rmsd, tm_score=tm_score)
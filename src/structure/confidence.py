@@ -0,0 +1,61 @@
+import numpy as np
+from structure.coordinates import ca_atoms
+
+def residue_plddt(atoms: np.ndarray) -> tuple:
+    """
+    Gets per-residue pLDDT from an AlphaFold model, which stores it in the B-factor column.
+
+    Args:
+        atoms (np.ndarray): Atoms with ATOM_DTYPE fields.
+
+    Returns:
+        tuple: Residue numbers (N,) and pLDDT values (N,).
+    """
+    ca = ca_atoms(atoms)
+    return np.asarray(ca["resi"]), np.asarray(ca["b_factor"])
+
+
+def confident_segments(resi: np.ndarray, plddt: np.ndarray, start: int, end: int, threshold: float = 70.0,
+                       min_length: int = 5, max_gap: int = 3) -> list:
+    """
+    Finds confidently predicted segments inside a residue range.
+    Short low-confidence interruptions are bridged, and segments shorter than min_length are dropped.
+
+    Args:
+        resi (np.ndarray): Residue numbers.
+        plddt (np.ndarray): Per-residue pLDDT.
+        start (int): First residue of the range.
+        end (int): Last residue of the range.
+        threshold (float): Minimum pLDDT of a confident residue.
+        min_length (int): Minimum segment length, in residues.
+        max_gap (int): Longest low-confidence stretch bridged inside a segment.
+
+    Returns:
+        list: (start, end) residue ranges, in order. Falls back to [(start, end)] if nothing is confident.
+    """
+    mask = (resi >= int(start)) & (resi <= int(end)) & (plddt >= threshold)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    run_starts, run_ends = edges[::2], edges[1::2]
+
+    if len(run_starts):
+        gaps = run_starts[1:] - run_ends[:-1]
+        split = gaps > max_gap
+        run_starts = run_starts[np.concatenate(([True], split))]
+        run_ends = run_ends[np.concatenate((split, [True]))]
+
+    keep = (run_ends - run_starts) >= min_length
+    segments = [(int(resi[s]), int(resi[e - 1])) for s, e in zip(run_starts[keep], run_ends[keep])]
+    return segments or [(int(start), int(end))]
+
+
+def ranges_selection(ranges: list) -> str:
+    """
+    Formats residue ranges as a PyMOL residue selection.
+
+    Args:
+        ranges (list): (start, end) residue ranges.
+
+    Returns:
+        str: Selection such as "resi 25-80+95-140".
+    """
+    return "resi " + "+".join(f"{start}-{end}" for start, end in ranges)
@@ -0,0 +1,154 @@
+import os
+import shlex
+from pathlib import Path
+import numpy as np
+
+ATOM_DTYPE = np.dtype([
+    ("resi", "<i4"),
+    ("name", "S4"),
+    ("resn", "S3"),
+    ("chain", "S1"),
+    ("xyz", "<f4", (3,)),
+    ("b_factor", "<f4"),
+])
+
+# Standard and common modified residues; anything else reads as X
+THREE_TO_ONE = {
+    b"ALA": "A", b"ARG": "R", b"ASN": "N", b"ASP": "D", b"CYS": "C", b"GLN": "Q", b"GLU": "E", b"GLY": "G",
+    b"HIS": "H", b"ILE": "I", b"LEU": "L", b"LYS": "K", b"MET": "M", b"PHE": "F", b"PRO": "P", b"SER": "S",
+    b"THR": "T", b"TRP": "W", b"TYR": "Y", b"VAL": "V", b"MSE": "M", b"SEC": "U", b"PYL": "O",
+}
+
+def parse_pdb(path: str) -> np.ndarray:
+    """
+    Parses ATOM records of a PDB file into a structured array.
+
+    Args:
+        path (str): Path to PDB file.
+
+    Returns:
+        np.ndarray: Atoms with ATOM_DTYPE fields.
+    """
+    rows = []
+    with open(path) as fh:
+        for line in fh:
+            if line.startswith("ATOM"):
+                rows.append((int(line[22:26]),
+                             line[12:16].strip(),
+                             line[17:20].strip(),
+                             line[21:22],
+                             (float(line[30:38]), float(line[38:46]), float(line[46:54])),
+                             float(line[60:66] or 0)))
+            elif line.startswith("ENDMDL"):
+                break
+    return np.array(rows, dtype=ATOM_DTYPE)
+
+
+def parse_mmcif(path: str) -> np.ndarray:
+    """
+    Parses the ATOM rows of the _atom_site loop of an mmCIF file into a structured array.
+
+    Args:
+        path (str): Path to mmCIF file.
+
+    Returns:
+        np.ndarray: Atoms with ATOM_DTYPE fields.
+    """
+    columns = []
+    rows = []
+    with open(path) as fh:
+        for line in fh:
+            if line.startswith("_atom_site."):
+                columns.append(line.strip().split(".", 1)[1])
+                continue
+            if not columns:
+                continue
+            if line.startswith(("ATOM", "HETATM")):
+                values = shlex.split(line) if '"' in line or "'" in line else line.split()
+                rows.append(values)
+            elif rows and (line.startswith("#") or line.startswith("loop_")):
+                break
+
+    col = {name: i for i, name in enumerate(columns)}
+    name_col = col.get("auth_atom_id", col.get("label_atom_id"))
+    resn_col = col.get("auth_comp_id", col.get("label_comp_id"))
+    resi_col = col.get("auth_seq_id", col.get("label_seq_id"))
+    chain_col = col.get("auth_asym_id", col.get("label_asym_id"))
+    model_col = col.get("pdbx_PDB_model_num")
+    first_model = rows[0][model_col] if rows and model_col is not None else None
+
+    atoms = [(int(r[resi_col]),
+              r[name_col],
+              r[resn_col],
+              r[chain_col][:1],
+              (float(r[col["Cartn_x"]]), float(r[col["Cartn_y"]]), float(r[col["Cartn_z"]])),
+              float(r[col["B_iso_or_equiv"]]))
+             for r in rows
+             if r[col["group_PDB"]] == "ATOM" and (first_model is None or r[model_col] == first_model)]
+    return np.array(atoms, dtype=ATOM_DTYPE)
+
+
+def coordinates_cache_path(structure_path: str) -> Path:
+    """
+    Gets the path of the binary coordinate cache kept next to a structure file.
+
+    Args:
+        structure_path (str): Path to PDB or mmCIF file.
+
+    Returns:
+        Path: Path to the .npy cache.
+    """
+    return Path(structure_path).with_suffix(".npy")
+
+
+def load_coordinates(structure_path: str) -> np.ndarray:
+    """
+    Loads the atoms of a structure as a read-only memory-mapped structured array.
+    The structure file is parsed once and persisted as a .npy next to it; later loads map that file,
+    so processes reading the same structure share its pages.
+
+    Args:
+        structure_path (str): Path to PDB or mmCIF file.
+
+    Returns:
+        np.ndarray: Atoms with ATOM_DTYPE fields.
+    """
+    cache_path = coordinates_cache_path(structure_path)
+    # Structures materialized from the artifact store keep the stored file's mtime; linking updates ctime
+    structure_stat = os.stat(structure_path)
+    changed = max(structure_stat.st_mtime_ns, structure_stat.st_ctime_ns)
+    if not cache_path.exists() or cache_path.stat().st_mtime_ns < changed:
+        if str(structure_path).lower().endswith((".cif", ".mmcif")):
+            atoms = parse_mmcif(structure_path)
+        else:
+            atoms = parse_pdb(structure_path)
+        tmp_path = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, atoms)
+        os.replace(tmp_path, cache_path)
+    return np.load(cache_path, mmap_mode="r")
+
+
+def ca_atoms(atoms: np.ndarray) -> np.ndarray:
+    """
+    Selects the CA atoms, one per residue.
+
+    Args:
+        atoms (np.ndarray): Atoms with ATOM_DTYPE fields.
+
+    Returns:
+        np.ndarray: CA atoms.
+    """
+    return atoms[atoms["name"] == b"CA"]
+
+
+def residue_sequence(atoms: np.ndarray) -> str:
+    """
+    Gets the one-letter sequence of the given residue atoms, e.g. the output of ca_atoms.
+
+    Args:
+        atoms (np.ndarray): One atom per residue, with ATOM_DTYPE fields.
+
+    Returns:
+        str: Sequence, with X for unknown residues.
+    """
+    return "".join(THREE_TO_ONE.get(bytes(resn), "X") for resn in atoms["resn"])
@@ -0,0 +1,82 @@
+import numpy as np
+
+def tm_d0(length) -> np.ndarray:
+    """
+    Calculates the TM-score distance scale d0 for the given normalization length(s).
+
+    Args:
+        length: Normalization length (int or array of ints).
+
+    Returns:
+        np.ndarray: d0 value(s) in Å.
+    """
+    length = np.maximum(np.asarray(length, dtype=np.float64), 22.0)
+    return np.maximum(1.24 * np.cbrt(length - 15.0) - 1.8, 0.5)
+
+
+def batch_kabsch(mobile: np.ndarray, target: np.ndarray, weights: np.ndarray) -> tuple:
+    """
+    Computes the optimal weighted superposition of a batch of paired coordinate sets.
+
+    Args:
+        mobile (np.ndarray): Mobile coordinates, shape (B, L, 3).
+        target (np.ndarray): Target coordinates, shape (B, L, 3).
+        weights (np.ndarray): Per-pair weights, shape (B, L). Padding positions must be 0.
+
+    Returns:
+        tuple: Rotations (B, 3, 3) and translations (B, 3) mapping mobile onto target.
+    """
+    w = weights[..., None]
+    w_sum = np.maximum(w.sum(axis=1), 1e-12)
+    mobile_center = (w * mobile).sum(axis=1) / w_sum
+    target_center = (w * target).sum(axis=1) / w_sum
+
+    mobile_c = mobile - mobile_center[:, None, :]
+    target_c = target - target_center[:, None, :]
+
+    covariance = np.einsum("bli,blj->bij", w * mobile_c, target_c)
+    u, _, vt = np.linalg.svd(covariance)
+    d = np.sign(np.linalg.det(np.matmul(u, vt)))
+    d[d == 0] = 1.0
+    correction = np.ones((len(d), 3))
+    correction[:, 2] = d
+    rotation = np.matmul(u * correction[:, None, :], vt)
+
+    translation = target_center - np.einsum("bi,bij->bj", mobile_center, rotation)
+    return rotation, translation
+
+
+def batch_superpose(mobile: np.ndarray, target: np.ndarray, mask: np.ndarray, norm_lengths: np.ndarray, iterations: int = 3) -> tuple:
+    """
+    Superposes a batch of paired coordinate sets and scores each pair with RMSD and TM-score.
+    The superposition is refined by reweighting pairs with their TM-score contribution.
+
+    Args:
+        mobile (np.ndarray): Mobile coordinates, shape (B, L, 3).
+        target (np.ndarray): Target coordinates, shape (B, L, 3).
+        mask (np.ndarray): 1 for paired positions and 0 for padding, shape (B, L).
+        norm_lengths (np.ndarray): TM-score normalization length per pair, shape (B,).
+        iterations (int): Number of TM-weighted refinement passes.
+
+    Returns:
+        tuple: RMSD (B,) and TM-score (B,) arrays.
+    """
+    mask = mask.astype(np.float64)
+    d0 = tm_d0(norm_lengths)[:, None]
+    n_pairs = np.maximum(mask.sum(axis=1), 1.0)
+
+    rotation, translation = batch_kabsch(mobile, target, mask)
+    rmsd = None
+    best_tm = np.zeros(len(mobile))
+
+    for i in range(iterations + 1):
+        moved = np.einsum("bli,bij->blj", mobile, rotation) + translation[:, None, :]
+        dist2 = ((moved - target) ** 2).sum(axis=-1)
+        if rmsd is None:
+            rmsd = np.sqrt((dist2 * mask).sum(axis=1) / n_pairs)
+        tm_weights = mask / (1.0 + dist2 / d0 ** 2)
+        best_tm = np.maximum(best_tm, tm_weights.sum(axis=1) / norm_lengths)
+        if i < iterations:
+            rotation, translation = batch_kabsch(mobile, target, tm_weights)
+
+    return rmsd, best_tm
@@ -0,0 +1,229 @@
+import argparse
+import fcntl
+import hashlib
+import os
+import shutil
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from utils.file_utils import ensure_directory
+
+# Linux ioctl that clones a file's extents (reflink) on copy-on-write filesystems
+_FICLONE = 0x40049409
+# Version 1 replaced the path-only refs table with stat-checked references and per-object reference counts
+_SCHEMA_VERSION = 1
+
+class ArtifactStore:
+    """
+    Represents a content-addressed store of output files (structures, sequences, features).
+    Each distinct content is kept once under its SHA-256 and materialized into output directories as a hardlink,
+    or a reflink or copy where hardlinks are not possible. Materialized paths are recorded as references,
+    with the file's inode, size and modification time, and each content keeps a count of its references;
+    gc() drops references whose file changed and deletes contents no longer referenced.
+
+    Stored contents are read-only, and so are hardlinked outputs, which share their inode. Outputs materialized
+    writable are reflinks or copies of their own. store() holds a shared lock and gc() an exclusive one,
+    across processes, so content is never collected between being stored and being materialized.
+
+    Attributes:
+        root (Path): Store directory.
+    """
+    def __init__(self, root: Path):
+        """
+        Constructor for ArtifactStore.
+
+        Args:
+            root (Path): Store directory.
+        """
+        self.root = Path(root)
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            ensure_directory(self.root / "objects")
+        conn = sqlite3.connect(self.root / "refs.sqlite3", timeout=30)
+        if not self._ready:
+            with conn:
+                if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                    # Older references carry no stat to check; their contents are collected once unused
+                    conn.execute("DROP TABLE IF EXISTS refs")
+                    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                conn.execute("CREATE TABLE IF NOT EXISTS refs (path TEXT PRIMARY KEY, digest TEXT NOT NULL, "
+                             "inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)")
+                conn.execute("CREATE TABLE IF NOT EXISTS objects (digest TEXT PRIMARY KEY, refcount INTEGER NOT NULL)")
+            self._ready = True
+        return conn
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        """
+        Holds the store lock: shared while storing and materializing, exclusive while collecting garbage.
+        """
+        ensure_directory(self.root)
+        with open(self.root / "lock", 'a') as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    def object_path(self, digest: str) -> Path:
+        """
+        Gets the path of stored content.
+
+        Args:
+            digest (str): SHA-256 hex digest.
+
+        Returns:
+            Path: Object path.
+        """
+        return self.root / "objects" / digest[:2] / digest
+
+    def _put(self, content: bytes) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.object_path(digest)
+        if not path.exists():
+            ensure_directory(path.parent)
+            tmp_path = path.with_name(f".{digest}.{uuid.uuid4().hex}")
+            tmp_path.write_bytes(content)
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, path)
+        return digest
+
+    def put(self, content: bytes) -> str:
+        """
+        Stores content unless already present. Content without references may be collected by the next gc();
+        use store() to store and materialize it in one step.
+
+        Args:
+            content (bytes): Content.
+
+        Returns:
+            str: SHA-256 hex digest of the content.
+        """
+        with self._locked():
+            return self._put(content)
+
+    @staticmethod
+    def _reflink(source: Path, dest: Path) -> bool:
+        try:
+            with open(source, 'rb') as src, open(dest, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return True
+        except OSError:
+            dest.unlink(missing_ok=True)
+            return False
+
+    def _materialize(self, digest: str, dest: Path, writable: bool, mode: int) -> str:
+        source = self.object_path(digest)
+        dest = Path(dest)
+        try:
+            if not writable and os.path.samefile(source, dest):
+                return str(dest)
+        except OSError:
+            pass
+
+        tmp_path = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}")
+        try:
+            if writable:
+                raise OSError("writable outputs are not hardlinked")
+            os.link(source, tmp_path)
+        except OSError:
+            if not self._reflink(source, tmp_path):
+                shutil.copyfile(source, tmp_path)
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, dest)
+        stat = os.stat(dest)
+
+        path = str(dest.resolve())
+        conn = self._connect()
+        try:
+            with conn:
+                previous = conn.execute("SELECT digest FROM refs WHERE path = ?", (path,)).fetchone()
+                if previous:
+                    conn.execute("UPDATE objects SET refcount = refcount - 1 WHERE digest = ?", previous)
+                conn.execute("INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?)",
+                             (path, digest, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+                conn.execute("INSERT INTO objects VALUES (?, 1) ON CONFLICT (digest) DO UPDATE SET refcount = refcount + 1",
+                             (digest,))
+        finally:
+            conn.close()
+        return str(dest)
+
+    def materialize(self, digest: str, dest: Path, writable: bool = False, mode: int = 0o644) -> str:
+        """
+        Places stored content at dest, atomically replacing any existing file, and records the reference.
+
+        Args:
+            digest (str): SHA-256 hex digest of stored content.
+            dest (Path): Output path.
+            writable (bool): Whether dest is a reflink or copy of its own rather than a read-only hardlink.
+            mode (int): File permission mode of reflinks and copies.
+
+        Returns:
+            str: Output path.
+        """
+        with self._locked():
+            return self._materialize(digest, dest, writable, mode)
+
+    def store(self, content: bytes, dest: Path, writable: bool = False, mode: int = 0o644) -> str:
+        """
+        Stores content and materializes it at dest, under one lock so gc() cannot collect it in between.
+
+        Args:
+            content (bytes): Content.
+            dest (Path): Output path.
+            writable (bool): Whether dest is a reflink or copy of its own rather than a read-only hardlink.
+            mode (int): File permission mode of reflinks and copies.
+
+        Returns:
+            str: Output path.
+        """
+        with self._locked():
+            return self._materialize(self._put(content), dest, writable, mode)
+
+    def gc(self) -> int:
+        """
+        Drops references whose path was deleted, replaced or modified since it was materialized,
+        then deletes contents left without references. Holds the store lock exclusively.
+
+        Returns:
+            int: Bytes freed.
+        """
+        with self._locked(exclusive=True):
+            conn = self._connect()
+            try:
+                stale = []
+                for path, digest, inode, size, mtime_ns in conn.execute("SELECT * FROM refs"):
+                    try:
+                        stat = os.stat(path)
+                        alive = (stat.st_ino, stat.st_size, stat.st_mtime_ns) == (inode, size, mtime_ns)
+                    except OSError:
+                        alive = False
+                    if not alive:
+                        stale.append((path, digest))
+                with conn:
+                    conn.executemany("DELETE FROM refs WHERE path = ?", [(path,) for path, _ in stale])
+                    conn.executemany("UPDATE objects SET refcount = refcount - 1 WHERE digest = ?",
+                                     [(digest,) for _, digest in stale])
+                    conn.execute("DELETE FROM objects WHERE refcount <= 0")
+                referenced = {digest for (digest,) in conn.execute("SELECT digest FROM objects")}
+            finally:
+                conn.close()
+
+            freed = 0
+            for path in (self.root / "objects").glob("*/*"):
+                if path.name.startswith("."):
+                    continue
+                if path.name not in referenced:
+                    freed += path.stat().st_size
+                    path.unlink()
+            return freed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Garbage-collect the artifact store.")
+    parser.add_argument("--root", default=Path(__file__).parent.parent.parent / ".artifact_store")
+    args = parser.parse_args()
+    print(f"Freed {ArtifactStore(args.root).gc()} bytes")
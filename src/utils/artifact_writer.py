@@ -0,0 +1,202 @@
+import os
+import queue
+import threading
+from pathlib import Path
+from utils.artifact_store import ArtifactStore
+from utils.file_utils import ensure_directory
+
+class ArtifactWriter:
+    """
+    Represents a write-behind file writer. Writes are queued and performed by a background thread,
+    so callers do not block on disk I/O. Directories are created once and remembered, and written files
+    are only fsynced at barrier().
+
+    Readers of a queued file call wait(path); external tools should be preceded by flush() or barrier().
+    An error raised by a background write is recorded against its path and re-raised by the next wait of that path,
+    or by the next flush or barrier.
+
+    Attributes:
+        store (ArtifactStore): Optional content-addressed store; files are then materialized from it, as shared
+            read-only hardlinks when written with a read-only mode, else as writable reflinks or copies.
+        written (list): Paths written since the last barrier.
+    """
+    def __init__(self, store: ArtifactStore | None = None):
+        """
+        Constructor for ArtifactWriter. The background thread starts on the first write.
+
+        Args:
+            store (ArtifactStore): Optional content-addressed store that deduplicates written files.
+        """
+        self.store = store
+        self.written = []
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._directories = set()
+        self._lock = threading.Lock()
+        self._errors = {}
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, content, mode, done = item
+                try:
+                    self._write(path, content, mode)
+                except Exception as e:
+                    # Any failure must reach the caller; the thread keeps serving the queue
+                    with self._lock:
+                        self._errors.setdefault(path, e)
+                finally:
+                    with self._lock:
+                        if self._pending.get(path) is done:
+                            del self._pending[path]
+                    done.set()
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path: Path, content, mode: int):
+        """
+        Writes one file, creating its directory only if not seen before.
+        """
+        if path.parent not in self._directories:
+            ensure_directory(path.parent)
+            self._directories.add(path.parent)
+        try:
+            self._write_file(path, content, mode)
+        except FileNotFoundError:
+            # The directory was removed since it was cached
+            ensure_directory(path.parent)
+            self._write_file(path, content, mode)
+        with self._lock:
+            self.written.append(path)
+
+    def _write_file(self, path: Path, content, mode: int):
+        if self.store is not None:
+            content = content.encode('utf-8') if isinstance(content, str) else content
+            self.store.store(content, path, writable=bool(mode & 0o222), mode=mode)
+            return
+        if isinstance(content, str):
+            path.write_text(content, encoding='utf-8')
+        else:
+            path.write_bytes(content)
+        os.chmod(path, mode)
+
+    def _submit(self, path: Path, content, mode: int) -> str:
+        path = Path(path)
+        done = threading.Event()
+        with self._lock:
+            self._pending[path] = done
+            self._ensure_thread()
+        self._queue.put((path, content, mode, done))
+        return str(path)
+
+    def write_text(self, path: Path, content: str, mode: int = 0o644) -> str:
+        """
+        Queues a text file write.
+
+        Args:
+            path (Path): Output path.
+            content (str): Text content.
+            mode (int): File permission mode. Read-only files written through the store are shared hardlinks.
+
+        Returns:
+            str: Output path.
+        """
+        return self._submit(path, content, mode)
+
+    def write_bytes(self, path: Path, content: bytes, mode: int = 0o644) -> str:
+        """
+        Queues a binary file write.
+
+        Args:
+            path (Path): Output path.
+            content (bytes): Binary content.
+            mode (int): File permission mode. Read-only files written through the store are shared hardlinks.
+
+        Returns:
+            str: Output path.
+        """
+        return self._submit(path, content, mode)
+
+    def _raise_error(self, path: Path | None = None):
+        """
+        Raises the recorded error of the given path, or the first recorded error of any path.
+        """
+        with self._lock:
+            if path is not None:
+                error = self._errors.pop(path, None)
+            else:
+                error = next(iter(self._errors.values()), None)
+                self._errors.clear()
+        if error is not None:
+            raise error
+
+    def wait(self, path: Path):
+        """
+        Blocks until a queued write of the given path has completed. Returns immediately if none is queued.
+
+        Args:
+            path (Path): File path.
+
+        Raises:
+            Exception: The error raised by the background write of this path, if any.
+        """
+        path = Path(path)
+        with self._lock:
+            done = self._pending.get(path)
+        if done is not None:
+            done.wait()
+        self._raise_error(path)
+
+    def flush(self):
+        """
+        Blocks until every queued write has completed.
+
+        Raises:
+            Exception: The first error raised by a background write since the last flush, if any.
+        """
+        self._queue.join()
+        self._raise_error()
+
+    def barrier(self):
+        """
+        Flushes queued writes, then fsyncs the files written since the last barrier and their directories.
+        Call at stage boundaries, e.g. once all proteins of a passport are saved.
+        """
+        self.flush()
+        with self._lock:
+            written, self.written = self.written, []
+        directories = set()
+        for path in written:
+            with open(path, 'rb') as fh:
+                os.fsync(fh.fileno())
+            directories.add(path.parent)
+        for directory in directories:
+            try:
+                fd = os.open(directory, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def close(self):
+        """
+        Flushes queued writes and stops the background thread.
+        """
+        self.flush()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
@@ -0,0 +1,19 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Workers are spawned rather than forked: the parent has PyMOL loaded and runs background threads
+# (artifact writer, image pipeline) whose locks a forked child could inherit while held
+START_METHOD = "spawn"
+
+def process_pool(max_workers: int, **kwargs) -> ProcessPoolExecutor:
+    """
+    Creates a process pool whose workers start from a fresh interpreter.
+
+    Args:
+        max_workers (int): Number of worker processes.
+        **kwargs: Options passed to ProcessPoolExecutor, e.g. initializer and initargs.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD), **kwargs)
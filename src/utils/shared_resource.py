@@ -0,0 +1,27 @@
+import threading
+
+class SharedResource:
+    """
+    Represents a class attribute created on first access rather than at import, then shared by every instance
+    and subclass. Reading it from the class, e.g. Protein.artifact_writer, also creates it.
+
+    Attributes:
+        factory (callable): Creates the resource.
+    """
+    def __init__(self, factory):
+        """
+        Constructor for SharedResource.
+
+        Args:
+            factory (callable): Creates the resource; called once, without arguments.
+        """
+        self.factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+
+    def __get__(self, instance, owner=None):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self.factory()
+        return self._value
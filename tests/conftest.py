@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules are imported from src/, as when the app is run from there
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
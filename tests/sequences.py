@@ -0,0 +1,14 @@
+"""
+Small real protein sequences shared by the alignment tests (UniProt canonical sequences).
+"""
+
+# Insulin, human (P01308) and mouse (P01326)
+INSULIN_HUMAN = "MALWMRLLPLLALLALWGPDPAAAFVNQHLCGSHLVEALYLVCGERGFFYTPKTRREAEDLQVGQVELGGGPGAGSLQPLALEGSLQKRGIVEQCCTSICSLYQLENYCN"
+INSULIN_MOUSE = "MALWMRFLPLLALLFLWESHPTQAFVKQHLCGSHLVEALYLVCGERGFFYTPMSRREVEDPQVAQLELGGGPGAGDLQTLALEVAQQKRGIVDQCCTSICSLYQLENYCN"
+# Hemoglobin subunits alpha (P69905) and beta (P68871), human
+HBA_HUMAN = ("MVLSPADKTNVKAAWGKVGAHAGEYGAEALERMFLSFPTTKTYFPHFDLSHGSAQVKGHGKKVADALTNAVAHVDDMPNALSALSDLHAHKLRVDPVNFKLLSHCLLV"
+             "TLAAHLPAEFTPAVHASLDKFLASVSTVLTSKYR")
+HBB_HUMAN = ("MVHLTPEEKSAVTALWGKVNVDEVGGEALGRLLVVYPWTQRFFESFGDLSTPDAVMGNPKVKAHGKKVLGAFSDGLAHLDNLKGTFATLSELHCDKLHVDPENFRLLGN"
+             "VLVCVLAHHFGKEFTPPVQAAYQKVVAGVANALAHKYH")
+# Ubiquitin, human (P0CG48, first repeat)
+UBIQUITIN = "MQIFVKTLTGKTITLEVEPSDTIENVKAKIQDKEGIPPDQQRLIFAGKQLEDGRTLSDYNIQKESTLHLVLRLRGG"
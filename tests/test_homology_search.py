@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from alignment.homology_search import KmerIndex, banded_smith_waterman
+from alignment.pairwise import align
+from alignment.substitution import BLOSUM62, encode
+from tests.sequences import HBA_HUMAN, HBB_HUMAN, INSULIN_HUMAN, INSULIN_MOUSE, UBIQUITIN
+
+
+def reference_banded_score(query: str, target: str, diagonal: int, band: int, gap_open: float = 10, gap_extend: float = 1) -> float:
+    """
+    Smith-Waterman score over the cells with |j - i - diagonal| <= band, filled cell by cell.
+    """
+    a, b = encode(query), encode(target)
+    m, n = len(a), len(b)
+    neg = -np.inf
+    h = np.full((m + 1, n + 1), neg)
+    e = np.full((m + 1, n + 1), neg)
+    f = np.full((m + 1, n + 1), neg)
+    h[0, :] = 0
+    h[:, 0] = 0
+    best = 0
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            if abs((j - 1) - (i - 1) - diagonal) > band:
+                continue
+            e[i, j] = max(e[i - 1, j] - gap_extend, h[i - 1, j] - gap_open - gap_extend)
+            f[i, j] = max(f[i, j - 1] - gap_extend, h[i, j - 1] - gap_open - gap_extend)
+            h[i, j] = max(h[i - 1, j - 1] + BLOSUM62[a[i - 1], b[j - 1]], e[i, j], f[i, j], 0)
+            best = max(best, h[i, j])
+    return best
+
+
+@pytest.mark.parametrize("band", [2, 8, 32])
+def test_banded_matches_reference(band):
+    query = INSULIN_HUMAN
+    targets = [INSULIN_MOUSE, HBA_HUMAN, UBIQUITIN, INSULIN_HUMAN[20:]]
+    diagonals = np.array([0, 5, -3, -20])
+    scores = banded_smith_waterman(encode(query).astype(np.int64), [encode(t).astype(np.int64) for t in targets],
+                                   diagonals, band=band)
+    expected = [reference_banded_score(query, target, int(d), band) for target, d in zip(targets, diagonals)]
+    assert scores.tolist() == expected
+
+
+def test_wide_band_matches_full_local_alignment():
+    targets = [HBB_HUMAN, INSULIN_MOUSE]
+    scores = banded_smith_waterman(encode(HBA_HUMAN).astype(np.int64), [encode(t).astype(np.int64) for t in targets],
+                                   np.zeros(2, dtype=np.int64), band=len(HBB_HUMAN) + len(HBA_HUMAN))
+    assert scores.tolist() == [align(HBA_HUMAN, t, mode="local").score for t in targets]
+
+
+def test_search_ranks_the_ortholog_first():
+    index = KmerIndex(["HBA", "HBB", "UBQ", "INS"], [HBA_HUMAN, HBB_HUMAN, UBIQUITIN, INSULIN_MOUSE])
+    hits = index.search(INSULIN_HUMAN, evalue=1e-3)
+    assert hits[0].accession == "INS"
+    assert hits[0].score == align(INSULIN_HUMAN, INSULIN_MOUSE, mode="local").score
+    assert hits[0].identity > 80
+    assert all(hit.evalue <= 1e-3 for hit in hits)
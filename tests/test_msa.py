@@ -0,0 +1,56 @@
+from pathlib import Path
+import numpy as np
+from alignment.msa import kmer_distances, progressive_align, upgma
+from alignment.pairwise import align, score_columns
+from alignment.substitution import encode
+from tests.sequences import HBA_HUMAN, HBB_HUMAN, INSULIN_HUMAN, INSULIN_MOUSE, UBIQUITIN
+
+SEQUENCES = {"HBA_HUMAN": HBA_HUMAN, "INS_HUMAN": INSULIN_HUMAN, "HBB_HUMAN": HBB_HUMAN, "INS_MOUSE": INSULIN_MOUSE}
+
+
+def column_index(row: str) -> np.ndarray:
+    """
+    Index into the ungapped sequence per alignment column, -1 for gaps.
+    """
+    gaps = np.array([residue == "-" for residue in row])
+    index = np.cumsum(~gaps) - 1
+    index[gaps] = -1
+    return index
+
+
+def test_rows_keep_sequences_and_order():
+    alignment = progressive_align(SEQUENCES)
+    assert alignment.names == list(SEQUENCES)
+    assert len({len(row) for row in alignment.rows}) == 1
+    assert [row.replace("-", "") for row in alignment.rows] == list(SEQUENCES.values())
+    assert len(alignment.conservation) == len(alignment.rows[0])
+    assert np.all((alignment.conservation > 0) & (alignment.conservation <= 1))
+
+
+def test_two_sequences_match_pairwise_score():
+    alignment = progressive_align({"human": INSULIN_HUMAN, "mouse": INSULIN_MOUSE})
+    human, mouse = alignment.rows
+    score = score_columns(INSULIN_HUMAN, INSULIN_MOUSE, column_index(human), column_index(mouse))
+    assert score == align(INSULIN_HUMAN, INSULIN_MOUSE).score
+
+
+def test_guide_tree_joins_orthologs_first():
+    codes = [encode(seq) for seq in (UBIQUITIN, INSULIN_HUMAN, HBA_HUMAN, INSULIN_MOUSE)]
+    distances = kmer_distances(codes)
+    assert np.allclose(distances, distances.T) and np.all(np.diag(distances) == 0)
+    merges = upgma(distances)
+    assert len(merges) == 3
+    assert set(merges[0]) == {1, 3}
+
+
+def test_writers(tmp_path):
+    alignment = progressive_align(SEQUENCES)
+    fasta = Path(alignment.to_fasta(tmp_path / "msa.fasta")).read_text()
+    records = [block.split("\n", 1) for block in fasta.split(">")[1:]]
+    assert [name for name, _ in records] == list(SEQUENCES)
+    assert [body.replace("\n", "") for _, body in records] == alignment.rows
+
+    clustal = Path(alignment.to_clustal(tmp_path / "msa.aln")).read_text()
+    assert clustal.startswith("CLUSTAL W")
+    for name, row in zip(alignment.names, alignment.rows):
+        assert "".join(line.split()[1] for line in clustal.splitlines() if line.startswith(name + " ")) == row
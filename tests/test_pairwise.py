@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from alignment.pairwise import align, align_pairs, score_columns
+from alignment.substitution import BLOSUM62, encode
+from tests.sequences import HBA_HUMAN, HBB_HUMAN, INSULIN_HUMAN, INSULIN_MOUSE, UBIQUITIN
+
+PAIRS = [
+    (INSULIN_HUMAN, INSULIN_MOUSE),
+    (HBA_HUMAN, HBB_HUMAN),
+    (UBIQUITIN, HBA_HUMAN[:90]),
+    ("HEAGAWGHEE", "PAWHEAE"),
+]
+
+
+def reference_score(seq_a: str, seq_b: str, local: bool, gap_open: float = 10, gap_extend: float = 1) -> float:
+    """
+    Optimal Gotoh score, filled cell by cell.
+    """
+    a, b = encode(seq_a), encode(seq_b)
+    m, n = len(a), len(b)
+    neg = -np.inf
+    h = np.full((m + 1, n + 1), neg)
+    e = np.full((m + 1, n + 1), neg)
+    f = np.full((m + 1, n + 1), neg)
+    h[0, 0] = 0
+    for i in range(1, m + 1):
+        e[i, 0] = -(gap_open + gap_extend * i)
+        h[i, 0] = 0 if local else e[i, 0]
+    for j in range(1, n + 1):
+        f[0, j] = -(gap_open + gap_extend * j)
+        h[0, j] = 0 if local else f[0, j]
+    best = 0
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            e[i, j] = max(e[i - 1, j] - gap_extend, h[i - 1, j] - gap_open - gap_extend)
+            f[i, j] = max(f[i, j - 1] - gap_extend, h[i, j - 1] - gap_open - gap_extend)
+            h[i, j] = max(h[i - 1, j - 1] + BLOSUM62[a[i - 1], b[j - 1]], e[i, j], f[i, j])
+            if local:
+                h[i, j] = max(h[i, j], 0)
+                best = max(best, h[i, j])
+    return best if local else h[m, n]
+
+
+def assert_consistent(result, seq_a: str, seq_b: str):
+    # Every residue appears once and in order; no column pairs two gaps
+    for seq, index in ((seq_a, result.index_a), (seq_b, result.index_b)):
+        residues = index[index >= 0]
+        assert np.all(np.diff(residues) == 1)
+        assert len(residues) <= len(seq)
+    assert not np.any((result.index_a < 0) & (result.index_b < 0))
+
+
+@pytest.mark.parametrize("seq_a, seq_b", PAIRS)
+def test_global_matches_reference(seq_a, seq_b):
+    result = align(seq_a, seq_b)
+    assert result.score == reference_score(seq_a, seq_b, local=False)
+    assert_consistent(result, seq_a, seq_b)
+    assert result.aligned_a.replace("-", "") == seq_a
+    assert result.aligned_b.replace("-", "") == seq_b
+
+
+@pytest.mark.parametrize("seq_a, seq_b", PAIRS)
+def test_local_matches_reference(seq_a, seq_b):
+    result = align(seq_a, seq_b, mode="local")
+    assert result.score == reference_score(seq_a, seq_b, local=True)
+    assert_consistent(result, seq_a, seq_b)
+
+
+@pytest.mark.parametrize("mode", ["global", "local"])
+@pytest.mark.parametrize("seq_a, seq_b", PAIRS)
+def test_linear_memory_matches_full(seq_a, seq_b, mode):
+    full = align(seq_a, seq_b, mode=mode, linear_memory=False)
+    linear = align(seq_a, seq_b, mode=mode, linear_memory=True)
+    assert linear.score == full.score
+    assert score_columns(seq_a, seq_b, linear.index_a, linear.index_b) == linear.score
+
+
+def test_identity_of_identical_sequences():
+    result = align(UBIQUITIN, UBIQUITIN)
+    assert result.identity == 100.0
+    assert result.similarity == 100.0
+    assert result.aligned_a == UBIQUITIN
+
+
+def test_align_pairs_keeps_input_order():
+    results = align_pairs(PAIRS)
+    assert [result.score for result in results] == [align(seq_a, seq_b).score for seq_a, seq_b in PAIRS]
@@ -0,0 +1,80 @@
+import io
+import zipfile
+from pathlib import Path
+import pytest
+
+pytest.importorskip("pymol")
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+from models.portfolio import PortfolioWriter
+
+TEMPLATE = Path(__file__).resolve().parent.parent / "assets" / "template.pptx"
+
+
+def png(color: tuple) -> io.BytesIO:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format="PNG")
+    buffer.seek(0)
+    return buffer
+
+
+def passport(title: str, color: tuple) -> bytes:
+    """
+    A passport deck: the template with its title set and an image on the first slide.
+    """
+    deck = Presentation(TEMPLATE)
+    slide = deck.slides[0]
+    next(shape for shape in slide.shapes if shape.name == "Title 1").text_frame.text = title
+    slide.shapes.add_picture(png(color), Inches(1), Inches(1), width=Inches(2))
+    buffer = io.BytesIO()
+    deck.save(buffer)
+    return buffer.getvalue()
+
+
+def titles(deck: Presentation) -> list:
+    return [next(shape.text_frame.text for shape in slide.shapes if shape.name == "Title 1") for slide in deck.slides]
+
+
+def test_deck_reopens_with_every_passport(tmp_path):
+    template_slides = len(Presentation(TEMPLATE).slides)
+    with PortfolioWriter(tmp_path / "portfolio.pptx") as portfolio:
+        assert portfolio.add_pptx(passport("CD19 passport", (200, 30, 30))) == template_slides
+        portfolio.add_pptx(passport("CD22 passport", (30, 30, 200)))
+        portfolio.add_pptx(passport("CD79A passport", (200, 30, 30)))
+
+    deck = Presentation(tmp_path / "portfolio.pptx")
+    assert (portfolio.passports, portfolio.slides) == (3, 3 * template_slides)
+    assert len(deck.slides) == 3 * template_slides
+    assert titles(deck)[::template_slides] == ["CD19 passport", "CD22 passport", "CD79A passport"]
+    pictures = [shape for shape in deck.slides[template_slides].shapes if shape.shape_type == 13]
+    assert pictures[-1].image.size == (64, 48)
+
+    # The same image is stored once
+    with zipfile.ZipFile(tmp_path / "portfolio.pptx") as archive:
+        media = [name for name in archive.namelist() if name.startswith("ppt/media/") and name.endswith(".png")]
+    assert len(media) == 2
+    assert [path.name for path in tmp_path.iterdir()] == ["portfolio.pptx"]
+
+
+def test_other_template_is_rejected(tmp_path):
+    other = Presentation()
+    other.slides.add_slide(other.slide_layouts[0])
+    buffer = io.BytesIO()
+    other.save(buffer)
+
+    with PortfolioWriter(tmp_path / "portfolio.pptx") as portfolio:
+        portfolio.add_pptx(passport("CD19 passport", (200, 30, 30)))
+        with pytest.raises(ValueError, match="same template"):
+            portfolio.add_pptx(buffer.getvalue())
+    assert portfolio.passports == 1
+    assert len(Presentation(tmp_path / "portfolio.pptx").slides) == portfolio.slides
+
+
+def test_failure_discards_partial_deck(tmp_path):
+    with pytest.raises(RuntimeError):
+        with PortfolioWriter(tmp_path / "portfolio.pptx") as portfolio:
+            portfolio.add_pptx(passport("CD19 passport", (200, 30, 30)))
+            raise RuntimeError("passport failed")
+    assert not list(tmp_path.iterdir())
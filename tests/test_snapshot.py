@@ -0,0 +1,66 @@
+from pathlib import Path
+import numpy as np
+import pytest
+
+pytest.importorskip("pymol")
+
+from models.organism import CustomOrganism, Organism
+from models.protein_model.human_protein import HumanProtein
+from models.protein_model.ortholog import Ortholog
+from models.snapshot import SNAPSHOT_VERSION, Snapshot
+
+
+def protein_state(cls, organism, protein_id: str, **values) -> dict:
+    """
+    Slot values of a saved Protein, with files referenced under its output directory.
+    """
+    file_name = Path("output_INS") / f"{organism.name.lower()}_INS"
+    state = {slot: None for klass in cls.__mro__ for slot in getattr(klass, '__slots__', ()) if slot not in cls._CACHE_SLOTS}
+    state.update(id=protein_id, organism=organism, name="INS", string_id=f"{organism.tax_id}.{protein_id}",
+                 file_name=file_name, seq=str(file_name / f"{protein_id}.fasta"),
+                 features_path=str(file_name / f"{protein_id}_features.npz"), pred_pdb=str(file_name / f"{protein_id}.pdb"),
+                 pred_pdb_id=f"AF-{protein_id}-F1", from_ncbi=False)
+    state.update(values)
+    return state
+
+
+@pytest.fixture
+def snapshot() -> Snapshot:
+    human = HumanProtein.from_state(protein_state(HumanProtein, Organism.HUMAN, "P01308",
+                                                  passport_table_path="output_INS/human_INS/passport.json"))
+    mouse = Ortholog.from_state(protein_state(Ortholog, Organism.MOUSE, "P01326", identity=np.float64(80.9),
+                                              similarity=86.4, rmsd=0.52, aligned_ranges=[(25, 54), (90, 110)]))
+    dog = Ortholog.from_state(protein_state(Ortholog, CustomOrganism("Canis lupus", 9615), "P01321", from_ncbi=True))
+    return Snapshot(protein_name="INS", protein_id="P01308",
+                    protein_information={Organism.HUMAN: {'primaryAccession': 'P01308'},
+                                         Organism.MOUSE: {'primaryAccession': 'P01326'},
+                                         CustomOrganism("Canis lupus", 9615): ['ncbi', ">dog\nMALWMRLLPLLALLALWAPAPTRA"]},
+                    proteins={Organism.HUMAN: human, Organism.MOUSE: mouse, CustomOrganism("Canis lupus", 9615): dog},
+                    images={'structure': ("output_INS/structure.png", "Human INS"),
+                            'alignments': [("output_INS/alignment_1.png", "ECD")],
+                            'string_network': "output_INS/string.png"})
+
+
+def test_round_trip(snapshot, tmp_path):
+    path = Path(snapshot.save(tmp_path / "INS_snapshot.bin"))
+    loaded = Snapshot.load(path)
+
+    assert (loaded.protein_name, loaded.protein_id) == ("INS", "P01308")
+    assert loaded.protein_information == snapshot.protein_information
+    assert loaded.images == snapshot.images
+    assert list(loaded.proteins) == list(snapshot.proteins)
+    for organism, protein in snapshot.proteins.items():
+        assert type(loaded.proteins[organism]) is type(protein)
+        assert loaded.proteins[organism].state() == protein.state()
+    assert loaded.proteins[Organism.MOUSE].aligned_ranges == [(25, 54), (90, 110)]
+    assert loaded.proteins[Organism.MOUSE].identity == 80.9
+    assert loaded.proteins[Organism.HUMAN]._passport_table is None
+    assert not list(tmp_path.glob(".*"))
+
+
+def test_rejects_other_files_and_versions(snapshot):
+    content = snapshot.to_bytes()
+    with pytest.raises(ValueError, match="Not a passport snapshot"):
+        Snapshot.from_bytes(b"PK\x03\x04" + content[4:])
+    with pytest.raises(ValueError, match="schema version"):
+        Snapshot.from_bytes(content[:6] + (SNAPSHOT_VERSION + 1).to_bytes(2, "big") + content[8:])